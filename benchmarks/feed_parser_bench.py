@@ -0,0 +1,125 @@
+"""
+高速フィードパーサーと feedparser の解析速度を比較するベンチマーク
+
+使い方:
+    python -m benchmarks.feed_parser_bench [--entries 5000] [--repeat 3]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+import feedparser
+
+from src.fast_feed_parser import parse_feed_fast, parse_date_utc
+
+SUMMARY = "この記事はクラウドネイティブなアーキテクチャについての解説です。" * 4
+CONTENT = "<p>" + "本文のサンプルテキストです。" * 40 + "</p>"
+
+
+def build_rdf(n):
+    base = datetime(2025, 1, 1, tzinfo=timezone(timedelta(hours=9)))
+    items = []
+    for i in range(n):
+        date = (base - timedelta(minutes=i)).isoformat()
+        items.append(f"""<item rdf:about="https://example.com/rdf/{i}">
+<title>記事タイトル{i} - 日本経済新聞</title>
+<link>https://example.com/rdf/{i}</link>
+<description>{SUMMARY}</description>
+<content:encoded><![CDATA[{CONTENT}]]></content:encoded>
+<dc:date>{date}</dc:date>
+<hatena:bookmarkcount>{i}</hatena:bookmarkcount>
+</item>""")
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rdf:RDF xmlns="http://purl.org/rss/1.0/"
+ xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+ xmlns:content="http://purl.org/rss/1.0/modules/content/"
+ xmlns:dc="http://purl.org/dc/elements/1.1/"
+ xmlns:hatena="http://www.hatena.ne.jp/info/xmlns#">
+<channel rdf:about="https://example.com/rdf"><title>RDF</title>
+<link>https://example.com/</link><description>bench</description></channel>
+{''.join(items)}
+</rdf:RDF>""".encode("utf-8")
+
+
+def build_rss2(n):
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    items = []
+    for i in range(n):
+        date = (base - timedelta(minutes=i)).strftime("%a, %d %b %Y %H:%M:%S +0000")
+        items.append(f"""<item>
+<title>記事タイトル{i}</title>
+<link>https://example.com/rss2/{i}</link>
+<guid>https://example.com/rss2/{i}</guid>
+<description>{SUMMARY}</description>
+<content:encoded><![CDATA[{CONTENT}]]></content:encoded>
+<pubDate>{date}</pubDate>
+</item>""")
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">
+<channel><title>RSS2</title><link>https://example.com/</link>
+<description>bench</description>
+{''.join(items)}
+</channel></rss>""".encode("utf-8")
+
+
+def build_atom(n):
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    entries = []
+    for i in range(n):
+        date = (base - timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        entries.append(f"""<entry>
+<title>記事タイトル{i}</title>
+<link rel="alternate" href="https://example.com/atom/{i}"/>
+<id>tag:example.com,2025:{i}</id>
+<published>{date}</published>
+<updated>{date}</updated>
+<summary>{SUMMARY}</summary>
+<content type="html">{CONTENT.replace('<', '&lt;').replace('>', '&gt;')}</content>
+</entry>""")
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+<title>Atom</title><id>tag:example.com,2025:feed</id>
+<updated>2025-01-01T00:00:00Z</updated>
+{''.join(entries)}
+</feed>""".encode("utf-8")
+
+
+def _best_of(func, data, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(data)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def check_parity(fast_entries, feed):
+    """高速パーサーと feedparser で link とUTC日付が一致することを確認する"""
+    mismatches = 0
+    for fast, slow in zip(fast_entries, feed.entries):
+        slow_dt = parse_date_utc(slow.get("published") or slow.get("updated"))
+        if fast["link"] != slow.get("link") or fast["published_dt"] != slow_dt:
+            mismatches += 1
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="フィードパーサーのベンチマーク")
+    parser.add_argument("--entries", type=int, default=5000, help="1フィードあたりのエントリー数")
+    parser.add_argument("--repeat", type=int, default=3, help="計測回数（最速値を採用）")
+    args = parser.parse_args()
+
+    print(f"{'format':<8}{'size(KB)':>10}{'feedparser(s)':>16}{'fast(s)':>10}{'speedup':>10}{'mismatch':>10}")
+    for name, builder in (("rdf", build_rdf), ("rss2", build_rss2), ("atom", build_atom)):
+        data = builder(args.entries)
+        slow_time, feed = _best_of(feedparser.parse, data, args.repeat)
+        fast_time, entries = _best_of(parse_feed_fast, data, args.repeat)
+        assert len(entries) == len(feed.entries) == args.entries
+        mismatches = check_parity(entries, feed)
+        print(f"{name:<8}{len(data) / 1024:>10.0f}{slow_time:>16.3f}{fast_time:>10.3f}"
+              f"{slow_time / fast_time:>9.1f}x{mismatches:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,37 @@
 import json
 import os
-import time
 import logging
-import datetime  # datetimeをインポート
+import datetime
 from src.fetch_rss import fetch_rss
 from src.process_article import process_article
-from src.s3_uploader import upload_to_s3
+from src.backfill import MODE_RERENDER, run_backfill
+from src.programs import default_program, load_programs
+from src.program_runner import run_programs, select_run_articles
+from src.utils.cost import estimate_run_cost, start_cost_tracking, stop_cost_tracking
+from src.utils.deadline import Deadline
+from src.utils.memory_profile import (
+    save_memory_report,
+    start_memory_profile,
+    stop_memory_profile
+)
+from src.utils.trace import save_trace, start_trace, stop_trace
+from src.sharding import (
+    feeds_shard_id,
+    finalize_shards,
+    index_shard_id,
+    run_shard,
+    shard_programs
+)
 # 統合音声生成関連をインポート
 from src.unified import (
     generate_unified_content,
     synthesize_unified_speech
 )
 from src.config import (
-    MAX_ARTICLES_PER_FEED,
     AUDIO_DIR,
-    IS_LAMBDA,
+    MEMORY_PROFILE,
     RSS_FEEDS,
-    S3_BUCKET_NAME,
-    S3_PREFIX
+    TRACE
 )
 
 # ロギング設定
@@ -27,334 +41,139 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-PROCESSED_IDS_FILENAME = "processed_article_ids.json"
-PROCESSED_IDS_S3_KEY = f"data/{PROCESSED_IDS_FILENAME}"
-PROCESSED_IDS_LOCAL_PATH = f"data/{PROCESSED_IDS_FILENAME}"
-MAX_PROCESSED_IDS = 1000  # 保存するIDの最大件数
-
 
-def load_processed_ids():
-    """処理済み記事IDをロードする"""
-    processed_ids = set()
-    if IS_LAMBDA:
-        import boto3
-        from botocore.exceptions import ClientError
-        s3_client = boto3.client('s3')
-        try:
-            response = s3_client.get_object(
-                Bucket=S3_BUCKET_NAME,
-                Key=PROCESSED_IDS_S3_KEY
-            )
-            ids_list = json.loads(response['Body'].read().decode('utf-8'))
-            processed_ids = set(ids_list)
-            logger.info(f"S3から{len(processed_ids)}件の処理済みIDを読み込みました")
-        except ClientError as e:
-            if e.response['Error']['Code'] == 'NoSuchKey':
-                logger.info("S3に処理済みIDファイルが存在しませんでした。新規作成します。")
-            else:
-                logger.error(f"S3からの処理済みID読み込み中にエラー: {e}")
-        except Exception as e:
-            logger.error(f"処理済みIDファイルの解析中にエラー: {e}")
-    else:
-        if os.path.exists(PROCESSED_IDS_LOCAL_PATH):
-            try:
-                with open(PROCESSED_IDS_LOCAL_PATH, "r", encoding="utf-8") as f:
-                    ids_list = json.load(f)
-                    processed_ids = set(ids_list)
-                # logger メッセージを f-string 以外で結合
-                log_msg = "ローカルから" + str(len(processed_ids)) + "件のIDをロード"
-                logger.info(log_msg)
-            except Exception as e:
-                logger.error(f"ローカルの処理済みIDファイル読み込み中にエラー: {e}")
-        else:
-            logger.info("ローカルに処理済みIDファイルが存在しません。新規作成します。")
-    return processed_ids
-
-
-def save_processed_ids(processed_ids):
-    """処理済み記事IDを保存する"""
-    # set を list に変換してソート (任意だがデバッグしやすい)
-    ids_list = sorted(list(processed_ids), reverse=True)
-
-    # 最新 MAX_PROCESSED_IDS 件のみ保持
-    if len(ids_list) > MAX_PROCESSED_IDS:
-        ids_list = ids_list[:MAX_PROCESSED_IDS]
-        logger.info(f"処理済みIDを最新{MAX_PROCESSED_IDS}件に制限しました。")
-
-    if IS_LAMBDA:
-        import boto3
-        s3_client = boto3.client('s3')
-        try:
-            # Lambda環境では一時ファイルを/tmpに作成
-            tmp_path = f"/tmp/{PROCESSED_IDS_FILENAME}"
-            with open(tmp_path, "w", encoding="utf-8") as f:
-                json.dump(ids_list, f)
-            # S3 にアップロード
-            s3_client.upload_file(
-                tmp_path, S3_BUCKET_NAME, PROCESSED_IDS_S3_KEY)
-            logger.info(f"処理済みID {len(ids_list)}件をS3に保存しました")
-        except Exception as e:
-            logger.error(f"S3への処理済みID保存中にエラー: {e}")
-    else:
-        try:
-            os.makedirs("data", exist_ok=True)
-            with open(PROCESSED_IDS_LOCAL_PATH, "w", encoding="utf-8") as f:
-                json.dump(ids_list, f, indent=2)  # ローカルは見やすいようにインデント
-            logger.info(f"処理済みID {len(ids_list)}件をローカルに保存しました")
-        except Exception as e:
-            logger.error(f"ローカルへの処理済みID保存中にエラー: {e}")
-
-
-def update_episodes_list(episode_data):
-    """
-    エピソードリストを更新する
+def lambda_handler(event, context):
     """
-    logger.info("エピソードリスト更新開始")
-
-    episodes_list = []
-    episodes_list_path = "data/episodes_list.json"
-
-    # 既存のエピソードリストを読み込み
-    try:
-        if IS_LAMBDA:
-            import boto3
-            from src.config import S3_BUCKET_NAME
-
-            s3_client = boto3.client('s3')
-            try:
-                response = s3_client.get_object(
-                    Bucket=S3_BUCKET_NAME,
-                    Key=episodes_list_path
-                )
-                episodes_list = json.loads(
-                    response['Body'].read().decode('utf-8'))
-                logger.info(f"S3から{len(episodes_list)}件のエピソードを読み込みました")
-            except Exception as e:
-                logger.info(f"エピソードリストが存在しないため、新規作成します: {str(e)}")
-        else:
-            if os.path.exists(episodes_list_path):
-                with open(episodes_list_path, "r", encoding="utf-8") as f:
-                    episodes_list = json.load(f)
-                logger.info(f"ローカルから{len(episodes_list)}件のエピソードを読み込みました")
-    except Exception as e:
-        logger.error(f"エピソードリスト読み込み中にエラー: {str(e)}")
-
-    # エピソードの要約情報
-    episode_summary = {
-        "episode_id": episode_data["episode_id"],
-        "title": episode_data["title"],
-        "created_at": episode_data["created_at"],
-        "article_count": len(episode_data["articles"]),
-        "source": "Tech News"
-    }
+    複数の日本語RSSフィードから記事を取得、要約して日本語音声を生成するLambda関数
 
-    # 重複チェック
-    existing_ids = [ep["episode_id"] for ep in episodes_list]
-    if episode_summary["episode_id"] not in existing_ids:
-        episodes_list.append(episode_summary)
+    event に "programs": true を指定すると、番組定義ファイル（PROGRAMS_FILE）の
+    全番組を1回の実行で生成する。"program_ids" で対象番組を絞り込める
 
-    # 日付順に並べ替え（新しい順）
-    episodes_list.sort(key=lambda x: x["episode_id"], reverse=True)
+    フィードを複数の実行に分ける場合は "shard_index" と "shard_count"
+    （または "feeds" でフィードを明示）を指定し、全シャードの完了後に
+    "finalize": true と "shard_count"（または "shard_ids"）でエピソードをまとめる。
+    日付をまたぐ場合に備えて "episode_date"（YYYY-MM-DD）を揃えて渡せる
 
-    # エピソードリストを保存
-    try:
-        if IS_LAMBDA:
-            # S3に保存
-            tmp_file = f"/tmp/episodes_list.json"
-            with open(tmp_file, "w", encoding="utf-8") as f:
-                json.dump(episodes_list, f, ensure_ascii=False, indent=2)
-
-            upload_to_s3(tmp_file, episodes_list_path)
-            logger.info("エピソードリストをS3に保存しました")
-        else:
-            # ローカルに保存
-            os.makedirs("data", exist_ok=True)
-            with open(episodes_list_path, "w", encoding="utf-8") as f:
-                json.dump(episodes_list, f, ensure_ascii=False, indent=2)
-            logger.info("エピソードリストをローカルに保存しました")
-    except Exception as e:
-        logger.error(f"エピソードリスト保存中にエラー: {str(e)}")
+    "rerender": {"from": "YYYY-MM-DD", "to": "YYYY-MM-DD", "force": false} を指定すると、
+    保存済みの要約から音声だけを作り直し、エピソードとカタログの audio_url を更新する
 
-    return episodes_list
+    context の残り時間が音声合成・公開に足りなくなる前に要約を打ち切り、
+    要約できた記事だけで（短い）エピソードを公開する
 
+    "memory_profile": true（または MEMORY_PROFILE=true）の場合は段階ごとの
+    メモリ使用量を計測し、data/profiles/ にレポートを保存する。
+    "trace": true（または TRACE=true）の場合は実行のタイムラインを
+    Chromeトレース形式で data/traces/ に保存する（Perfettoで開ける）
 
-def lambda_handler(event, context):
+    LLM・Pollyの料金は常に記録し、data/costs/ の1日の合計に加算する。
+    RUN_BUDGET_USD・DAILY_BUDGET_USD を超えそうな場合は要約する記事を減らす。
+    "dry_run": true の場合は要約・音声合成をせず、料金の見積もりだけを返す
     """
-    複数の日本語RSSフィードから記事を取得、要約して日本語音声を生成するLambda関数
-    """
-    logger.info("日本のITニュース記事処理を開始します...")
-
-    all_articles = []
-    processed_articles = []
-    newly_processed_ids = set()
-
-    os.makedirs(AUDIO_DIR, exist_ok=True)
-    processed_ids = load_processed_ids()
-
-    # ★ エピソードID（今日の日付）を先に決定
-    today = time.strftime("%Y-%m-%d")
+    memory_profile = MEMORY_PROFILE or (event or {}).get("memory_profile")
+    trace = TRACE or (event or {}).get("trace")
 
+    if memory_profile:
+        start_memory_profile()
+    if trace:
+        start_trace()
     try:
-        # 複数のRSSフィードから記事を取得
-        for source_id, feed_url in RSS_FEEDS.items():
-            logger.info(f"{source_id}からフィードを取得します...")
+        try:
+            start_cost_tracking()
+        except Exception as e:
+            # 1日の合計を読めない場合は、予算を確認せずに実行する
+            logger.error(f"料金の記録を開始できないため、予算を確認せずに実行します: {e}", exc_info=True)
+        return _handle_event(event, context)
+    finally:
+        try:
+            stop_cost_tracking()
+        except Exception as e:
+            logger.error(f"料金の記録中にエラー: {e}", exc_info=True)
+        if trace:
             try:
-                fetched_articles = fetch_rss(feed_url)
-
-                # 処理済み記事を除外し、ソース情報を追加
-                added_count = 0
-                for article in fetched_articles:
-                    if article['link'].startswith('https://github.com/'):
-                        logger.info(f"GitHub URLをスキップしました: {article['title']} - {article['link']}")
-                        continue
-                        
-                    if article['id'] not in processed_ids:
-                        article["source_id"] = source_id
-                        all_articles.append(article)
-                        added_count += 1
-                    # else:
-                        # logger.debug(f"処理済み記事スキップ: {article['id']}")
-
-                # ログメッセージを修正
-                logger.info(f"{source_id}: {added_count}件の未処理記事を追加")
+                save_trace(stop_trace())
             except Exception as e:
-                # logger エラーメッセージを短縮
-                logger.error(
-                    f"{source_id} 取得/フィルタエラー: {str(e)}", exc_info=True)
-
-        # 最新の記事を優先（公開日でソート）
-        all_articles.sort(key=lambda x: x.get("published", ""), reverse=True)
-
-        # 各サイトから最大記事数を制限 & 処理済みIDを記録
-        articles_per_source = {}
-        selected_articles = []
-        sources_at_limit = set()
-        num_target_sources = len(RSS_FEEDS)
-
-        for article in all_articles:
-            if len(sources_at_limit) == num_target_sources:
-                logger.info("すべてのソースが記事数上限に達したため、記事選択を終了します。")
-                break
-
-            source_id = article.get("source_id", "unknown")
-            if source_id not in articles_per_source:
-                articles_per_source[source_id] = 0
-
-            if source_id not in sources_at_limit:
-                if articles_per_source[source_id] < MAX_ARTICLES_PER_FEED:
-                    selected_articles.append(article)
-                    articles_per_source[source_id] += 1
-                    newly_processed_ids.add(article['id'])
-                    if articles_per_source[source_id] == MAX_ARTICLES_PER_FEED:
-                        sources_at_limit.add(source_id)
-                        log_msg = (f"ソース '{source_id}' が上限 "
-                                   f"({MAX_ARTICLES_PER_FEED}) に達しました。")
-                        logger.info(log_msg)
-
-        logger.info(f"合計{len(selected_articles)}件の記事を処理対象としました")
-
-        # 選択された記事を処理 (enumerate でインデックスを取得)
-        for idx, article in enumerate(selected_articles):
+                logger.error(f"トレースの保存中にエラー: {e}", exc_info=True)
+        if memory_profile:
             try:
-                # 記事処理（要約など）のみ実行
-                processed = process_article(article)
-
-                processed_articles.append(processed)
-                logger.info(
-                    f"記事 {idx+1}/{len(selected_articles)} を処理: {processed['title']}")  # 進捗ログ改善
-
+                report = stop_memory_profile(getattr(context, "memory_limit_in_mb", None))
+                save_memory_report(report)
             except Exception as e:
-                logger.error(
-                    f"記事「{article['title']}」の処理中にエラー: {str(e)}", exc_info=True)
-
-    except Exception as e:
-        logger.error(f"記事取得・処理中にエラー: {str(e)}", exc_info=True)
-    finally:
-        # 実行中にエラーが発生しても、処理できたIDは保存する
-        if newly_processed_ids:
-            logger.info(f"今回処理した記事ID数: {len(newly_processed_ids)}")
-            updated_processed_ids = processed_ids.union(newly_processed_ids)
-            save_processed_ids(updated_processed_ids)
-        else:
-            logger.info("今回新しく処理した記事はありませんでした。")
-
-    # この時点では episode_data をまだ保存しない（audio_url 確定後に保存）
-    episode_data = None
+                logger.error(f"メモリプロファイルの保存中にエラー: {e}", exc_info=True)
 
-    # --- 統合音声生成処理 ---
-    if processed_articles:  # 処理された記事がある場合のみ統合音声生成
-        try:
-            logger.info("統合音声生成処理を開始します...")
-            # 日付を取得 (Lambda実行時の日付)
-            episode_date = datetime.date.today()
 
-            # 統合コンテンツ（全ての記事と繋ぎナレーション）の生成
-            unified_content = generate_unified_content(
-                processed_articles, episode_date)
-
-            # 音声ファイル名の決定
-            date_str = unified_content["date"]
-            audio_filename = f"{date_str}.mp3"
-
-            # 音声ファイルのパス/URL設定
-            if IS_LAMBDA:
-                audio_s3_key = f"{S3_PREFIX}{audio_filename}"
-                audio_local_path = None
-            else:
-                audio_s3_key = None
-                audio_local_path = os.path.join(AUDIO_DIR, audio_filename)
-
-            # 統合音声の合成と保存
-            audio_url = synthesize_unified_speech(
-                unified_content["full_text"],
-                audio_s3_key,
-                audio_local_path
-            )
+def _handle_event(event, context):
+    """lambda_handler() の本体"""
+    logger.info("日本のITニュース記事処理を開始します...")
+    deadline = Deadline.from_context(context)
 
-            # 統合音声生成が成功した場合、audio_url を episode_data に統合
-            if processed_articles:
-                episode_data = {
-                    "episode_id": today,
-                    "title": f"Tech News ({today})",
-                    "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "audio_url": audio_url,  # 追加
-                    "articles": processed_articles,
-                    "source": "Tech News"
-                }
-
-                # ディレクトリ作成
-                if not IS_LAMBDA:
-                    os.makedirs("data/episodes", exist_ok=True)
-
-                try:
-                    if IS_LAMBDA:
-                        # S3にアップロード
-                        tmp_episode_file = f"/tmp/episode_{today}.json"
-                        with open(tmp_episode_file, "w", encoding="utf-8") as f:
-                            json.dump(episode_data, f,
-                                      ensure_ascii=False, indent=2)
-                        episode_s3_path = f"data/episodes/episode_{today}.json"
-                        upload_to_s3(tmp_episode_file, episode_s3_path)
-                    else:
-                        episode_filename = f"data/episodes/episode_{today}.json"
-                        with open(episode_filename, "w", encoding="utf-8") as f:
-                            json.dump(episode_data, f,
-                                      ensure_ascii=False, indent=2)
-                    # エピソードリストを更新
-                    update_episodes_list(episode_data)
-                    logger.info(f"エピソード（統合音声付き）を保存しました: {today}")
-                except Exception as e:
-                    logger.error(f"エピソード保存中にエラー: {e}", exc_info=True)
-            else:
-                logger.error("audio_url が取得できなかったため episode_data への統合をスキップします")
+    os.makedirs(AUDIO_DIR, exist_ok=True)
 
-        except Exception as e:
-            logger.error(f"統合音声生成処理中にエラーが発生しました: {e}", exc_info=True)
-            # 統合音声生成エラーは致命的ではないため、処理を続行
+    event = event or {}
+    if event.get("programs"):
+        programs = load_programs(event.get("programs_file"))
+        if event.get("program_ids"):
+            programs = [p for p in programs if p["id"] in event["program_ids"]]
     else:
-        logger.info("処理対象の記事がなかったため、統合音声生成をスキップします。")
-    # --- 統合音声生成処理 ここまで ---
-
+        programs = [default_program()]
+
+    if event.get("dry_run"):
+        estimate = estimate_run_cost(select_run_articles(programs))
+        logger.info(f"料金の見積もり: ${estimate['total_usd']:.4f}")
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "message": f"料金の見積もり: ${estimate['total_usd']:.4f}",
+                **estimate
+            }, ensure_ascii=False)
+        }
+
+    episode_date = None
+    if event.get("episode_date"):
+        episode_date = datetime.datetime.strptime(event["episode_date"], "%Y-%m-%d").date()
+
+    if event.get("rerender"):
+        rerender = event["rerender"]
+        start = datetime.datetime.strptime(rerender["from"], "%Y-%m-%d").date()
+        end = datetime.datetime.strptime(rerender.get("to") or rerender["from"], "%Y-%m-%d").date()
+        counts = {
+            program["id"]: run_backfill(
+                start, end, program, MODE_RERENDER, force=rerender.get("force", False))
+            for program in programs
+        }
+        logger.info("Lambda処理完了")
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "message": "音声の再レンダリングが完了しました",
+                "programs": counts
+            }, ensure_ascii=False)
+        }
+
+    if event.get("finalize"):
+        shard_ids = event.get("shard_ids") or [
+            index_shard_id(i, event["shard_count"]) for i in range(event["shard_count"])]
+        results = finalize_shards(programs, shard_ids, episode_date)
+    elif event.get("feeds") or event.get("shard_count"):
+        if event.get("feeds"):
+            shard_id = event.get("shard_id") or feeds_shard_id(event["feeds"])
+            programs = shard_programs(programs, feeds=event["feeds"])
+        else:
+            shard_id = index_shard_id(event["shard_index"], event["shard_count"])
+            programs = shard_programs(
+                programs, event["shard_index"], event["shard_count"])
+        counts = run_shard(programs, shard_id, episode_date, deadline)
+        logger.info("Lambda処理完了")
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "message": f"シャード {shard_id} で{sum(counts.values())}件の記事を処理しました",
+                "shard_id": shard_id,
+                "programs": counts
+            }, ensure_ascii=False)
+        }
+    else:
+        results = run_programs(programs, episode_date, deadline)
+    processed_articles = [a for r in results for a in r["articles"]]
 
     logger.info("Lambda処理完了")
 
@@ -362,7 +181,8 @@ def lambda_handler(event, context):
         "statusCode": 200,
         "body": json.dumps({
             "message": f"{len(processed_articles)}件の記事を処理しました",
-            "articles": [a["title"] for a in processed_articles]
+            "articles": [a["title"] for a in processed_articles],
+            "programs": {r["program_id"]: len(r["articles"]) for r in results}
         }, ensure_ascii=False)
     }
 
@@ -0,0 +1,254 @@
+"""
+LLM呼び出し前の記事の事前フィルター
+
+フィルタールール（JSON）で、要約・音声合成の対象から外す記事を宣言的に指定する。
+
+    {
+      "rules": [
+        {"name": "github", "url_prefixes": ["https://github.com/"]},
+        {"name": "paywall", "domains": ["example-paywall.com"]},
+        {"name": "job_ads", "title_patterns": ["求人", "エンジニア募集"]},
+        {"name": "pr", "title_patterns": ["^[【\\[]PR[】\\]]"], "summary_patterns": ["提供[:：]"]},
+        {"name": "too_short", "min_content_length": 80}
+      ]
+    }
+
+1つのルールに複数の条件を書いた場合は、いずれかに当てはまれば除外する。
+ルールは読み込み時に1つの照合器にまとめる（ドメインは集合、URLプレフィックスは
+トライ木、正規表現はタイトル・要約ごとに全ルールを1つの選択パターン）ため、
+記事1件の判定でルールを1つずつ試すことはない。正規表現は大文字・小文字を区別しない。
+まとめるとグループ番号がずれるため、番号での後方参照（\\1）は使えない（名前で参照する）
+"""
+import json
+import logging
+import os
+import re
+from collections import Counter
+from urllib.parse import urlsplit
+
+from src.config import FILTER_RULES_FILE
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# ルールファイルが無い場合の既定のルール（従来のGitHubのURLの除外）
+DEFAULT_RULES = [
+    {"name": "github", "url_prefixes": ["https://github.com/"]}
+]
+
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# グループ番号を参照する構文（\1, (?(1)...)）。パターンは名前付きグループで囲んで
+# 1つにまとめるため、番号がずれて正しく照合できない（名前での参照は使える）
+_NUMBERED_REFERENCE_PATTERN = re.compile(r'(?<!\\)(?:\\\\)*\\[1-9]|\(\?\(\d')
+
+
+def _compile_patterns(entries, field):
+    """(ルール名, パターン) のリストを名前付きグループの選択パターン1つにまとめる"""
+    if not entries:
+        return None, {}
+    alternatives = []
+    group_rules = {}
+    for index, (rule_name, pattern) in enumerate(entries):
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"ルール '{rule_name}' の {field} が不正です: {pattern} ({e})")
+        if _NUMBERED_REFERENCE_PATTERN.search(pattern):
+            raise ValueError(
+                f"ルール '{rule_name}' の {field} に番号での後方参照は使えません"
+                f"（(?P<name>...) と (?P=name) を使ってください）: {pattern}")
+        group = f"r{index}"
+        alternatives.append(f"(?P<{group}>{pattern})")
+        group_rules[group] = rule_name
+    try:
+        combined = re.compile("|".join(alternatives), re.IGNORECASE)
+    except re.error as e:
+        # 別々のパターンで同じグループ名を使った場合など
+        raise ValueError(f"{field} をまとめられません（グループ名の重複など）: {e}")
+    return combined, group_rules
+
+
+class ArticleFilter:
+    """
+    フィルタールールをまとめた照合器
+
+    判定は安い条件から順に行う（ドメイン → URLプレフィックス → 本文の長さ → タイトル → 要約）
+    """
+
+    def __init__(self, rules):
+        """
+        Args:
+            rules (list): ルールのリスト（name と条件を持つ辞書）
+
+        Raises:
+            ValueError: ルールが不正な場合
+        """
+        self.rule_names = []
+        self._domains = {}
+        self._prefix_trie = {}
+        self._min_length = None
+        title_patterns = []
+        summary_patterns = []
+
+        for rule in rules:
+            name = rule.get("name")
+            if not name or name in self.rule_names:
+                raise ValueError(f"ルール名が未指定または重複しています: {name}")
+            self.rule_names.append(name)
+
+            for domain in rule.get("domains", []):
+                self._domains.setdefault(domain.lower().lstrip("."), name)
+            for prefix in rule.get("url_prefixes", []):
+                self._add_prefix(prefix, name)
+            min_length = int(rule.get("min_content_length") or 0)
+            # 複数のルールで指定した場合は最も厳しい（長い）下限を使う
+            if min_length and (self._min_length is None or min_length > self._min_length[0]):
+                self._min_length = (min_length, name)
+            title_patterns += [(name, p) for p in rule.get("title_patterns", [])]
+            summary_patterns += [(name, p) for p in rule.get("summary_patterns", [])]
+
+        self._title_pattern, self._title_groups = _compile_patterns(title_patterns, "title_patterns")
+        self._summary_pattern, self._summary_groups = _compile_patterns(
+            summary_patterns, "summary_patterns")
+
+    def _add_prefix(self, prefix, name):
+        node = self._prefix_trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+        # 同じプレフィックスは先に書いたルールを優先する
+        node.setdefault("", name)
+
+    def _match_prefix(self, url):
+        """URLが登録済みのプレフィックスで始まれば、最も短いプレフィックスのルール名を返す"""
+        node = self._prefix_trie
+        for char in url:
+            node = node.get(char)
+            if node is None:
+                return None
+            if "" in node:
+                return node[""]
+        return None
+
+    def _match_domain(self, url):
+        """URLのホスト名か、その親ドメインが登録されていればルール名を返す"""
+        if not self._domains:
+            return None
+        host = (urlsplit(url).hostname or "").lower()
+        while host:
+            name = self._domains.get(host)
+            if name:
+                return name
+            _, _, host = host.partition(".")
+        return None
+
+    def match(self, article):
+        """
+        記事が当てはまったルールの名前を返す
+
+        Parameters:
+        article (dict): link, title, summary（または content）を持つ記事
+
+        Returns:
+        str or None: 当てはまったルールの名前。どれにも当てはまらなければNone
+        """
+        url = article.get("link") or ""
+        name = self._match_domain(url) or (self._match_prefix(url) if self._prefix_trie else None)
+        if name:
+            return name
+
+        summary = article.get("summary") or ""
+        if self._min_length:
+            content = article.get("content") or summary
+            min_length, rule_name = self._min_length
+            if len(_TAG_PATTERN.sub("", content).strip()) < min_length:
+                return rule_name
+
+        if self._title_pattern:
+            matched = self._title_pattern.search(article.get("title") or "")
+            if matched:
+                return self._title_groups[matched.lastgroup]
+        if self._summary_pattern:
+            matched = self._summary_pattern.search(summary)
+            if matched:
+                return self._summary_groups[matched.lastgroup]
+        return None
+
+
+def load_filter_rules(path=None):
+    """
+    フィルタールールファイルを読み込んで照合器を作る
+
+    Parameters:
+    path (str, optional): ルールファイルのパス（省略時は FILTER_RULES_FILE）。
+        ファイルが無い場合は DEFAULT_RULES を使う
+
+    Returns:
+    ArticleFilter: 照合器
+
+    Raises:
+    ValueError: ルールが不正な場合
+    """
+    path = path or FILTER_RULES_FILE
+    if not os.path.exists(path):
+        logger.info("フィルタールールファイルが無いため、既定のルールを使います")
+        return ArticleFilter(DEFAULT_RULES)
+    with open(path, "r", encoding="utf-8") as f:
+        rules = json.load(f).get("rules", [])
+    logger.info(f"{os.path.basename(path)}から{len(rules)}件のフィルタールールを読み込みました")
+    return ArticleFilter(rules)
+
+
+_article_filter = None
+
+
+def get_article_filter():
+    """設定（FILTER_RULES_FILE）から作成した照合器を返す（初回のみ読み込む）"""
+    global _article_filter
+    if _article_filter is None:
+        _article_filter = load_filter_rules()
+    return _article_filter
+
+
+def filter_articles(articles, article_filter=None):
+    """
+    ルールに当てはまる記事を除外する
+
+    Parameters:
+    articles (list): 記事のリスト
+    article_filter (ArticleFilter, optional): 照合器（省略時は get_article_filter()）
+
+    Returns:
+    tuple: (残した記事のリスト, ルールごとの除外件数の Counter)
+    """
+    article_filter = article_filter or get_article_filter()
+    kept = []
+    hits = Counter()
+    for article in articles:
+        rule_name = article_filter.match(article)
+        if rule_name:
+            hits[rule_name] += 1
+            logger.debug(f"フィルター '{rule_name}' で除外: {article.get('title')} - {article.get('link')}")
+            continue
+        kept.append(article)
+    return kept, hits
+
+
+# テスト実行用
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    sample_articles = [
+        {"title": "新しいライブラリを公開しました", "link": "https://github.com/example/repo",
+         "summary": "リポジトリの紹介です。" * 10},
+        {"title": "【PR】クラウド移行セミナーのご案内", "link": "https://example.com/seminar",
+         "summary": "提供：Example株式会社" * 10},
+        {"title": "生成AIの最新動向", "link": "https://example.com/ai",
+         "summary": "生成AIの最新動向を解説します。" * 10},
+    ]
+    kept, hits = filter_articles(sample_articles)
+    print(f"残した記事: {[a['title'] for a in kept]}")
+    print(f"ルールごとの除外件数: {dict(hits)}")
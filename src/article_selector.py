@@ -0,0 +1,68 @@
+import datetime
+import logging
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+
+def article_priority(article, feed_order):
+    """
+    近似重複記事のうちどれを残すかの優先度（小さいほど優先）
+
+    フィードの登録順が早いフィードを優先し、同じフィード内では
+    公開日が新しい記事を優先する
+
+    Parameters:
+    article (dict): source_id と published を持つ記事
+    feed_order (list): フィードの source_id（優先順）
+    """
+    source_id = article.get("source_id")
+    rank = feed_order.index(source_id) if source_id in feed_order else len(feed_order)
+    try:
+        published_ts = datetime.datetime.fromisoformat(
+            article.get("published", "")).timestamp()
+    except ValueError:
+        published_ts = 0
+    return (rank, -published_ts)
+
+
+def select_articles(articles, num_target_sources, max_articles_per_feed):
+    """
+    公開日の新しい順に、各ソースから最大記事数まで記事を選択する
+
+    Parameters:
+    articles (list): source_id を持つ候補記事のリスト
+    num_target_sources (int): 対象ソース数（全ソースが上限に達したら打ち切る）
+    max_articles_per_feed (int): 1ソースあたりの最大記事数
+
+    Returns:
+    list: 選択された記事のリスト
+    """
+    # 最新の記事を優先（公開日でソート）
+    articles = sorted(articles, key=lambda x: x.get("published", ""), reverse=True)
+
+    # 各サイトから最大記事数を制限
+    articles_per_source = {}
+    selected_articles = []
+    sources_at_limit = set()
+
+    for article in articles:
+        if len(sources_at_limit) == num_target_sources:
+            logger.info("すべてのソースが記事数上限に達したため、記事選択を終了します。")
+            break
+
+        source_id = article.get("source_id", "unknown")
+        if source_id not in articles_per_source:
+            articles_per_source[source_id] = 0
+
+        if source_id not in sources_at_limit:
+            if articles_per_source[source_id] < max_articles_per_feed:
+                selected_articles.append(article)
+                articles_per_source[source_id] += 1
+                if articles_per_source[source_id] == max_articles_per_feed:
+                    sources_at_limit.add(source_id)
+                    log_msg = (f"ソース '{source_id}' が上限 "
+                               f"({max_articles_per_feed}) に達しました。")
+                    logger.info(log_msg)
+
+    return selected_articles
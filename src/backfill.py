@@ -0,0 +1,274 @@
+"""
+過去エピソードのバックフィル・再レンダリング
+
+使い方:
+    # 保存済みの要約から音声だけを作り直す（LLMは呼び出さない）
+    python -m src.backfill --from 2025-01-01 --to 2025-01-31
+
+    # 声・イントロを変えた当日分だけを作り直す
+    python -m src.backfill --from 2025-01-01 --force
+
+    # 保存済みの記事を要約し直してから音声を作り直す
+    python -m src.backfill --from 2025-01-01 --to 2025-01-31 --mode reprocess
+
+    # 番組定義ファイルの番組を対象にする
+    python -m src.backfill --from 2025-01-01 --to 2025-01-07 --program cloud
+"""
+import argparse
+import datetime
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.dead_letter import is_failed_summary
+from src.episode_store import load_episode, save_episode, update_episodes_list
+from src.fingerprint import render_fingerprint, summary_fingerprint
+from src.process_article import process_article
+from src.podcast_feed import update_podcast_feed
+from src.search_index import index_episode
+from src.programs import default_program, load_programs
+from src.episode_publisher import (
+    delete_replaced_hls,
+    episode_audio_fields,
+    episode_segment,
+    rebuilt_segments,
+    synthesize_episode_audio
+)
+from src.unified import generate_segment_content, generate_unified_content
+from src.unified.speech_synthesizer import set_polly_rate_limiter
+from src.utils.cost import start_cost_tracking, stop_cost_tracking
+from src.utils.rate_limiter import RateLimiter
+from src.config import (
+    BACKFILL_LLM_RATE_PER_SECOND,
+    BACKFILL_POLLY_RATE_PER_SECOND,
+    BACKFILL_WORKERS,
+    PODCAST_FEED,
+    SEARCH_INDEX
+)
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+MODE_RERENDER = "rerender"
+MODE_REPROCESS = "reprocess"
+
+# 全スレッドで共有するレートリミッター
+llm_limiter = RateLimiter(BACKFILL_LLM_RATE_PER_SECOND, name="llm")
+polly_limiter = RateLimiter(BACKFILL_POLLY_RATE_PER_SECOND, name="polly")
+
+
+def date_range(start, end):
+    """start から end までの日付（両端を含む）を返す"""
+    day = start
+    while day <= end:
+        yield day
+        day += datetime.timedelta(days=1)
+
+
+def resummarize_articles(articles):
+    """
+    保存済みの記事を現在のプロンプト・モデルで要約し直す
+
+    元のRSS概要は保存されていないため、本文（content）があればそれを、
+    なければ保存済みの要約を入力として使う。
+    要約に失敗した記事は保存済みの記事のまま残す（エラー文で要約を上書きしない）
+
+    Returns:
+    tuple: (記事のリスト, 要約に失敗した記事数)
+    """
+    resummarized = []
+    failed = 0
+    for article in articles:
+        source = dict(article)
+        source["link"] = article.get("url") or article.get("link", "")
+        source["summary"] = article.get("content") or article.get("summary", "")
+        with llm_limiter:
+            processed = process_article(source)
+        if is_failed_summary(processed):
+            logger.warning(f"要約し直せなかったため、保存済みの要約を使います: {article['title'][:30]}...")
+            resummarized.append(article)
+            failed += 1
+        else:
+            resummarized.append(processed)
+    return resummarized, failed
+
+
+def is_current(episode, program, mode):
+    """
+    エピソードの出力が現在の設定で生成済みかを判定する
+
+    Parameters:
+    episode (dict): 保存済みのエピソード
+    program (dict): 番組定義
+    mode (str): MODE_RERENDER または MODE_REPROCESS
+
+    Returns:
+    bool: 再生成が不要な場合True
+    """
+    if not episode.get("audio_url") or not episode.get("render_fingerprint"):
+        return False
+    if mode == MODE_REPROCESS and episode.get("summary_fingerprint") != summary_fingerprint():
+        return False
+
+    episode_date = datetime.datetime.strptime(episode["episode_id"], "%Y-%m-%d").date()
+    segments = episode.get("segments") or [
+        {"article_ids": [article.get("id") for article in episode["articles"]]}]
+    articles_by_id = {article.get("id"): article for article in episode["articles"]}
+
+    # 先頭の rendered_segments 個のセグメントは1つの音声として合成されている。
+    # その後に追加したセグメントは、追加先のフィンガープリントにつないで順に計算する
+    rendered = episode.get("rendered_segments", 1)
+    articles = [
+        articles_by_id[i] for segment in segments[:rendered]
+        for i in segment["article_ids"] if i in articles_by_id]
+    content = generate_unified_content(
+        articles, episode_date, program_description=program["description"])
+    expected = render_fingerprint(content["full_text"], program["voice_id"])
+    for segment in segments[rendered:]:
+        articles = [articles_by_id[i] for i in segment["article_ids"] if i in articles_by_id]
+        content = generate_segment_content(articles, episode_date)
+        expected = render_fingerprint(content["full_text"], program["voice_id"], previous=expected)
+    return episode["render_fingerprint"] == expected
+
+
+def backfill_day(day, program, mode, force=False):
+    """
+    1日分のエピソードを再生成する
+
+    Parameters:
+    day (datetime.date): 対象日
+    program (dict): 番組定義
+    mode (str): MODE_RERENDER または MODE_REPROCESS
+    force (bool): 最新でも再生成する場合True
+
+    Returns:
+    str: "missing" / "skipped" / "updated" / "failed"
+    """
+    episode_id = day.strftime("%Y-%m-%d")
+    prefix = program["output_prefix"]
+
+    episode = load_episode(episode_id, prefix)
+    if episode is None:
+        logger.info(f"[{episode_id}] エピソードが存在しないためスキップします")
+        return "missing"
+
+    if not force and is_current(episode, program, mode):
+        logger.info(f"[{episode_id}] 出力は最新のためスキップします")
+        return "skipped"
+
+    try:
+        articles = episode["articles"]
+        if mode == MODE_REPROCESS:
+            articles, failed = resummarize_articles(articles)
+            if failed:
+                # 一部だけ要約し直したエピソードは保存せず、次回のバックフィルでやり直す
+                logger.error(f"[{episode_id}] {failed}件の記事を要約し直せませんでした")
+                return "failed"
+
+        audio_url, unified_content, renditions = synthesize_episode_audio(
+            program, articles, day)
+        if not audio_url:
+            logger.error(f"[{episode_id}] 音声合成に失敗しました")
+            return "failed"
+
+        previous = dict(episode)
+        episode["articles"] = articles
+        episode.update(episode_audio_fields(audio_url, renditions))
+        # 追加したセグメントも1つの音声として作り直される（実行ごとの記録は残す）
+        segments = episode.get("segments") or [
+            episode_segment(articles, episode["created_at"], 0)]
+        episode["segments"] = rebuilt_segments(segments, episode.get("chapters"))
+        episode["rendered_segments"] = len(segments)
+        episode["summary_fingerprint"] = (
+            summary_fingerprint() if mode == MODE_REPROCESS
+            else episode.get("summary_fingerprint"))
+        episode["render_fingerprint"] = render_fingerprint(
+            unified_content["full_text"], program["voice_id"])
+        save_episode(episode, prefix)
+        # カタログの audio_url もその場で置き換える
+        update_episodes_list(episode, prefix)
+        delete_replaced_hls(previous, episode)
+        if PODCAST_FEED:
+            update_podcast_feed(program, episode)
+        if SEARCH_INDEX and mode == MODE_REPROCESS:
+            # 要約が変わった場合のみ（再レンダリングでは記事は変わらない）
+            index_episode(episode, prefix)
+        logger.info(f"[{episode_id}] エピソードを再生成しました")
+        return "updated"
+    except Exception as e:
+        logger.error(f"[{episode_id}] 再生成中にエラー: {e}", exc_info=True)
+        return "failed"
+
+
+def run_backfill(start, end, program, mode=MODE_RERENDER, workers=BACKFILL_WORKERS, force=False):
+    """
+    日付範囲のエピソードを並列に再生成する
+
+    外部API呼び出しは共有レートリミッターで全体の呼び出し頻度を制限する
+
+    Returns:
+    dict: {結果: 件数}
+    """
+    days = list(date_range(start, end))
+    logger.info(f"{len(days)}日分のバックフィルを開始します（モード: {mode}, 並列数: {workers}）")
+
+    counts = {}
+    lock = threading.Lock()
+
+    def _run(day):
+        status = backfill_day(day, program, mode, force)
+        with lock:
+            counts[status] = counts.get(status, 0) + 1
+
+    # 1日分の合成でもPollyを複数回（レンディション・スピーチマーク）呼び出すため、
+    # 呼び出しごとに共有リミッターで制限する
+    set_polly_rate_limiter(polly_limiter)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_run, days))
+    finally:
+        set_polly_rate_limiter(None)
+
+    logger.info(f"バックフィル完了: {counts}")
+    return counts
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="過去エピソードを再生成する")
+    parser.add_argument("--from", dest="start", required=True, help="開始日 (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", help="終了日 (YYYY-MM-DD、省略時は開始日)")
+    parser.add_argument("--mode", choices=[MODE_RERENDER, MODE_REPROCESS], default=MODE_RERENDER,
+                        help="rerender: 音声のみ再生成 / reprocess: 要約からやり直す")
+    parser.add_argument("--program", help="番組定義ファイルの番組ID（省略時は既定の番組）")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS, help="並列に処理する日数")
+    parser.add_argument("--force", action="store_true", help="最新の出力も再生成する")
+    args = parser.parse_args()
+
+    start_date = datetime.datetime.strptime(args.start, "%Y-%m-%d").date()
+    end_date = datetime.datetime.strptime(args.end or args.start, "%Y-%m-%d").date()
+
+    if args.program:
+        matched = [p for p in load_programs() if p["id"] == args.program]
+        if not matched:
+            parser.error(f"番組 '{args.program}' が見つかりません")
+        target_program = matched[0]
+    else:
+        target_program = default_program()
+
+    # LLM・Pollyの料金は通常の実行と同じく予算で制限し、1日の合計に加算する
+    try:
+        start_cost_tracking()
+    except Exception as e:
+        logger.error(f"料金の記録を開始できないため、予算を確認せずに実行します: {e}", exc_info=True)
+    try:
+        run_backfill(start_date, end_date, target_program, args.mode, args.workers, args.force)
+    finally:
+        try:
+            stop_cost_tracking()
+        except Exception as e:
+            logger.error(f"料金の記録中にエラー: {e}", exc_info=True)
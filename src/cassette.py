@@ -0,0 +1,170 @@
+"""
+外部呼び出し（フィード取得・LLM・Polly）の記録と再生（カセット）
+
+CASSETTE_MODE=record で実行すると、フィードの生データ・LLMの応答テキスト・
+Pollyの出力とそれぞれの所要時間を CASSETTE_DIR に保存する。
+CASSETTE_MODE=replay では同じ要求に対して記録した結果を返すため、
+ネットワークやAPIキーなしで同一のワークロードを何度でも再現できる
+（CASSETTE_LATENCY=original で記録時の所要時間も再現する）
+
+    CASSETTE_MODE=record STORAGE_BACKEND=memory python -m src.program_runner
+    CASSETTE_MODE=replay STORAGE_BACKEND=memory python -m src.program_runner
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from src.config import CASSETTE_DIR, CASSETTE_LATENCY, CASSETTE_MODE
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+LATENCY_ORIGINAL = "original"
+LATENCY_ZERO = "zero"
+
+INDEX_FILENAME = "cassette.json"
+
+
+class CassetteMissError(Exception):
+    """再生モードで記録の無い要求が来た場合の例外"""
+
+
+def request_key(kind, request):
+    """要求の種類と内容から記録のキーを作る"""
+    payload = json.dumps([kind, request], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    1つのカセット（ディレクトリ）への記録と再生
+
+    同じ要求が複数回あった場合は記録した順に返す（記録より多い場合は最後の結果を返す）。
+    バイト列の結果は別ファイル、テキストの結果はインデックスに保存する
+    """
+
+    def __init__(self, path, mode, latency=LATENCY_ZERO):
+        """
+        Parameters:
+        path (str): カセットのディレクトリ
+        mode (str): "record" または "replay"
+        latency (str): 再生時の待ち時間（"original": 記録時の所要時間、"zero": 待たない）
+        """
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"不明なカセットのモード: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._replayed = {}
+        self._interactions = {}
+        index_path = os.path.join(path, INDEX_FILENAME)
+        if mode == MODE_REPLAY:
+            with open(index_path, encoding="utf-8") as f:
+                self._interactions = json.load(f)["interactions"]
+            logger.info(f"カセットを再生します: {path}（{len(self._interactions)}件の要求）")
+        else:
+            os.makedirs(path, exist_ok=True)
+            logger.info(f"カセットに記録します: {path}")
+
+    def call(self, kind, request, func):
+        """
+        外部呼び出しを記録または再生する
+
+        Parameters:
+        kind (str): 呼び出しの種類（"feed", "llm", "polly"）
+        request: 要求の内容（JSONにできる値。同じ要求は同じ結果になる前提）
+        func (callable): 実際に呼び出す関数（bytes または str を返す）
+
+        Returns:
+        bytes or str: 呼び出しの結果
+
+        Raises:
+        CassetteMissError: 再生モードで記録が無い場合
+        """
+        key = request_key(kind, request)
+        if self.mode == MODE_REPLAY:
+            return self._replay(kind, key)
+
+        started = time.monotonic()
+        result = func()
+        self._record(kind, key, result, time.monotonic() - started)
+        return result
+
+    def _replay(self, kind, key):
+        with self._lock:
+            entries = self._interactions.get(key)
+            if not entries:
+                raise CassetteMissError(f"カセットに記録の無い{kind}の要求です: {key[:12]}")
+            index = self._replayed.get(key, 0)
+            self._replayed[key] = index + 1
+        entry = entries[min(index, len(entries) - 1)]
+
+        if self.latency == LATENCY_ORIGINAL:
+            time.sleep(entry["duration"])
+        if "file" in entry:
+            with open(os.path.join(self.path, entry["file"]), "rb") as f:
+                return f.read()
+        return entry["text"]
+
+    def _record(self, kind, key, result, duration):
+        with self._lock:
+            entries = self._interactions.setdefault(key, [])
+            entry = {"kind": kind, "duration": round(duration, 4)}
+            if isinstance(result, bytes):
+                entry["file"] = f"{kind}_{key[:16]}_{len(entries)}.bin"
+                with open(os.path.join(self.path, entry["file"]), "wb") as f:
+                    f.write(result)
+            else:
+                entry["text"] = result
+            entries.append(entry)
+
+            # 途中で終了しても記録が残るよう、呼び出しごとにインデックスを書き直す
+            index_path = os.path.join(self.path, INDEX_FILENAME)
+            tmp_path = f"{index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"interactions": self._interactions}, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, index_path)
+
+
+_cassette = None
+_cassette_loaded = False
+_cassette_lock = threading.Lock()
+
+
+def get_cassette():
+    """設定（CASSETTE_MODE）から作成したカセットを返す。無効な場合はNone"""
+    global _cassette, _cassette_loaded
+    with _cassette_lock:
+        if not _cassette_loaded:
+            if CASSETTE_MODE:
+                _cassette = Cassette(CASSETTE_DIR, CASSETTE_MODE, CASSETTE_LATENCY)
+            _cassette_loaded = True
+        return _cassette
+
+
+def set_cassette(cassette):
+    """カセットを差し替える（None で無効にする）"""
+    global _cassette, _cassette_loaded
+    with _cassette_lock:
+        _cassette = cassette
+        _cassette_loaded = True
+
+
+def is_replaying():
+    """再生モードかどうか（APIキーの無い環境でもLLMの呼び出しを進めるために使う）"""
+    cassette = get_cassette()
+    return cassette is not None and cassette.mode == MODE_REPLAY
+
+
+def cassette_call(kind, request, func):
+    """カセットが有効なら記録・再生し、無効なら func をそのまま呼び出す"""
+    cassette = get_cassette()
+    if cassette is None:
+        return func()
+    return cassette.call(kind, request, func)
@@ -0,0 +1,152 @@
+"""
+記事ごとのチャプター
+
+統合音声の記事ごとの開始時刻を求め、MP3にID3v2のCHAP/CTOCフレームを
+埋め込む。あわせて記事ごとのバイト範囲を返すため、プレイヤーは
+1回のRange付きGETで目的の記事から再生を始められる
+"""
+import json
+import logging
+
+import boto3
+
+from src.config import AWS_REGION
+from src.unified.speech_synthesizer import polly_synthesize
+from src.utils.audio_format import iter_mp3_frames, skip_id3v2
+from src.utils.id3 import build_tag, chap_frame, ctoc_frame, text_frame
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+TOC_ELEMENT_ID = "toc"
+
+
+def clip_sections(sections, text):
+    """Pollyに渡すテキスト（切り詰め後）に含まれるセクションだけを残す"""
+    return [
+        dict(section, end=min(section["end"], len(text)))
+        for section in sections
+        if section["start"] < len(text)
+    ]
+
+
+def fetch_section_times(text, sections, voice_id):
+    """
+    Pollyのスピーチマーク（sentence）から各セクションの開始時刻を求める
+
+    Parameters:
+    text (str): 音声合成するテキスト（synthesize_renditions() に渡すものと同じ）
+    sections (list): generate_unified_content() の sections
+    voice_id (str): Pollyの音声ID
+
+    Returns:
+    list: セクションごとの開始時刻（ミリ秒）。対応する文が無いものはNone
+    """
+    polly_client = boto3.client('polly', region_name=AWS_REGION)
+    speech_marks = polly_synthesize(
+        polly_client,
+        Text=text,
+        OutputFormat='json',
+        SpeechMarkTypes=['sentence'],
+        VoiceId=voice_id,
+        Engine='neural'
+    )
+    marks = [
+        json.loads(line)
+        for line in speech_marks.decode('utf-8').splitlines()
+        if line.strip()
+    ]
+
+    times = []
+    for section in sections:
+        # スピーチマークの start は入力テキストのUTF-8のバイト位置
+        byte_start = len(text[:section["start"]].encode("utf-8"))
+        mark = next((m for m in marks if m["start"] >= byte_start), None)
+        times.append(mark["time"] if mark else None)
+    return times
+
+
+def estimate_section_times(text, sections, duration_ms):
+    """文字数の比率から各セクションの開始時刻（ミリ秒）を概算する"""
+    if not text:
+        return [0 for _ in sections]
+    return [int(duration_ms * section["start"] / len(text)) for section in sections]
+
+
+def build_chapters(sections, start_times, duration_ms):
+    """
+    セクションと開始時刻からチャプターを作る
+
+    Parameters:
+    sections (list): generate_unified_content() の sections
+    start_times (list): セクションごとの開始時刻（ミリ秒）
+    duration_ms (int): 音声全体の長さ（ミリ秒）
+
+    Returns:
+    list: {"article_id", "title", "start_ms", "end_ms"} のリスト
+    """
+    chapters = []
+    for index, section in enumerate(sections):
+        end_ms = start_times[index + 1] if index + 1 < len(sections) else duration_ms
+        chapters.append({
+            "article_id": section["article_id"],
+            "title": section["title"],
+            "start_ms": int(start_times[index]),
+            "end_ms": int(end_ms)
+        })
+    return chapters
+
+
+def _frame_offsets(audio, start_times_ms):
+    """各時刻以降で最初に始まるフレームのバイト位置（audio 先頭から）を返す"""
+    offsets = [len(audio)] * len(start_times_ms)
+    elapsed_ms = 0.0
+    pending = 0
+    for offset, _, duration in iter_mp3_frames(audio):
+        while pending < len(start_times_ms) and elapsed_ms >= start_times_ms[pending]:
+            offsets[pending] = offset
+            pending += 1
+        if pending == len(start_times_ms):
+            break
+        elapsed_ms += duration * 1000
+    return offsets
+
+
+def embed_chapters(data, chapters, title=None):
+    """
+    MP3の先頭にチャプター（CHAP/CTOC）付きのID3v2タグを書き込む
+
+    既存のID3v2タグは置き換える
+
+    Parameters:
+    data (bytes): MP3データ
+    chapters (list): build_chapters() の結果
+    title (str, optional): エピソードのタイトル（TIT2）
+
+    Returns:
+    tuple: (タグ付きのMP3データ, チャプターごとの [開始バイト, 終了バイト] のリスト)。
+        バイト範囲はファイル先頭からの位置で、終了バイトを含む（Rangeヘッダーにそのまま使える）
+    """
+    audio = data[skip_id3v2(data):]
+    audio_offsets = _frame_offsets(audio, [c["start_ms"] for c in chapters])
+    audio_offsets.append(len(audio))
+
+    def _tag(tag_length):
+        frames = [text_frame("TIT2", title)] if title else []
+        child_ids = [f"chp{index}" for index in range(len(chapters))]
+        frames.append(ctoc_frame(TOC_ELEMENT_ID, child_ids))
+        for index, chapter in enumerate(chapters):
+            frames.append(chap_frame(
+                child_ids[index], chapter["start_ms"], chapter["end_ms"], chapter["title"],
+                tag_length + audio_offsets[index], tag_length + audio_offsets[index + 1]))
+        return build_tag(frames)
+
+    # オフセットは固定長のフィールドのため、タグの長さはオフセットの値によらない
+    tag_length = len(_tag(0))
+    tag = _tag(tag_length)
+
+    byte_ranges = [
+        [tag_length + audio_offsets[index], tag_length + audio_offsets[index + 1] - 1]
+        for index in range(len(chapters))
+    ]
+    return tag + audio, byte_ranges
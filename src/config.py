@@ -55,6 +55,18 @@ AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
 S3_BUCKET_NAME = os.environ.get('S3_BUCKET_NAME')
 S3_PREFIX = os.environ.get('S3_PREFIX', 'audio/')
 
+# 永続化ストレージ設定（s3 / local / memory。未設定ならLambdaでs3、それ以外でlocal）
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', '')
+STORAGE_MAX_WORKERS = int(os.environ.get('STORAGE_MAX_WORKERS', '8'))  # 一括書き込みの並列数
+# 状態ファイル（処理済みID・エピソードリストなど）の条件付き書き込みが競合した場合の再試行回数
+STATE_WRITE_MAX_RETRIES = int(os.environ.get('STATE_WRITE_MAX_RETRIES', '5'))
+# JSONオブジェクトの Content-Encoding（gzip / br / 空文字で非圧縮。既定は非圧縮）
+# 圧縮したオブジェクトをダウンロードするクライアントは Content-Encoding を解釈する必要がある
+JSON_CONTENT_ENCODING = os.environ.get('JSON_CONTENT_ENCODING', '')
+# 一覧表示用の軽量エピソード（episodes/lite/）も書き出すかどうか
+EPISODE_LITE_VARIANT = os.environ.get(
+    'EPISODE_LITE_VARIANT', 'true').lower() == 'true'
+
 # OpenAI API 設定（レガシーサポート用）
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo')
@@ -72,11 +84,33 @@ AI_PROVIDER = os.environ.get('AI_PROVIDER', 'gemini')  # 'openai' または 'gem
 POLLY_VOICE_ID_EN = os.environ.get('POLLY_VOICE_ID_EN', 'Matthew')  # 英語男性音声
 POLLY_VOICE_ID = os.environ.get('POLLY_VOICE_ID', 'Takumi')   # 日本語男性音声
 POLLY_ENGINE = os.environ.get('POLLY_ENGINE', 'neural')  # standard または neural
+# 音声のレンディション（名前:出力形式:サンプリング周波数 をカンマ区切り。先頭がメインの音声）
+# 出力形式は mp3 / ogg_vorbis / pcm。レンディションごとにPollyで合成し直すため、
+# 低帯域向けの音声（例: standard:mp3:24000,low:mp3:16000）は必要な場合のみ追加する
+AUDIO_RENDITIONS = os.environ.get('AUDIO_RENDITIONS', 'standard:mp3:24000')
+# メインの音声をHLSセグメント（m3u8プレイリスト付き）にも分割して出力するかどうか
+HLS_OUTPUT = os.environ.get('HLS_OUTPUT', 'false').lower() == 'true'
+# MP3に記事ごとのチャプター（ID3v2 CHAP/CTOC）を埋め込むかどうか
+CHAPTER_MARKERS = os.environ.get('CHAPTER_MARKERS', 'true').lower() == 'true'
+# チャプターの開始時刻の求め方（estimate: 文字数から概算 / speech_marks: Pollyのスピーチマーク。
+# speech_marks はエピソードごとにPollyの呼び出しが1回増える）
+CHAPTER_TIMING = os.environ.get('CHAPTER_TIMING', 'estimate')
+HLS_SEGMENT_DURATION = float(os.environ.get('HLS_SEGMENT_DURATION', '6'))  # セグメントの長さ（秒）
 
 # 番組設定
 PROGRAM_NAME = os.environ.get('PROGRAM_NAME', 'Tech News Radio')
 PROGRAM_DESCRIPTION = '本日もはてなブックマーク［テクノロジー］カテゴリの人気記事を紹介していきます。'
 
+# 複数番組の定義ファイル（lambda の event に "programs": true を渡すと使用）
+PROGRAMS_FILE = os.environ.get(
+    'PROGRAMS_FILE',
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'programs.json')))
+
+# 要約前に記事を除外するフィルタールール（ファイルが無い場合はGitHubのURLだけを除外）
+FILTER_RULES_FILE = os.environ.get(
+    'FILTER_RULES_FILE',
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'filter_rules.json')))
+
 # フィード設定
 # 複数のフィードを登録
 RSS_FEEDS = {
@@ -95,12 +129,89 @@ API_BASE_URL = os.environ.get(
     'ap-northeast-1.amazonaws.com/dev')
 LOCAL_API_URL = os.environ.get('LOCAL_API_URL', 'http://localhost:5001')
 
+# ポッドキャストRSSフィード（data/{出力プレフィックス}podcast.xml）
+PODCAST_FEED = os.environ.get('PODCAST_FEED', 'true').lower() == 'true'
+PODCAST_SITE_URL = os.environ.get('PODCAST_SITE_URL', API_BASE_URL)
+PODCAST_IMAGE_URL = os.environ.get('PODCAST_IMAGE_URL', '')
+PODCAST_AUTHOR = os.environ.get('PODCAST_AUTHOR', PROGRAM_NAME)
+PODCAST_MAX_ITEMS = int(os.environ.get('PODCAST_MAX_ITEMS', '100'))  # フィードに残すエピソード数
+
+# 記事の全文検索インデックス（data/{出力プレフィックス}search/）
+SEARCH_INDEX = os.environ.get('SEARCH_INDEX', 'true').lower() == 'true'
+SEARCH_INDEX_SHARDS = int(os.environ.get('SEARCH_INDEX_SHARDS', '16'))  # 変更時は --rebuild が必要
+
+# 同じ日の2回目以降の実行では、新しい記事をセグメントとして既存のエピソードの音声に追加する
+# （無効な場合は従来どおり、その回の記事だけでエピソードを置き換える）
+INTRADAY_SEGMENTS = os.environ.get('INTRADAY_SEGMENTS', 'false').lower() == 'true'
+
+# 英語版エピソード（選んだ記事の要約をまとめて翻訳し、英語音声を日本語音声と並列に合成する）
+ENGLISH_EDITION = os.environ.get('ENGLISH_EDITION', 'false').lower() == 'true'
+TRANSLATION_BATCH_CHARS = int(os.environ.get('TRANSLATION_BATCH_CHARS', '3000'))  # 1回の翻訳に含める最大文字数（応答の最大トークン数に収まる量）
+
 # アプリケーション設定
 MAX_ARTICLES_PER_FEED = int(os.environ.get('MAX_ARTICLES_PER_FEED', '5'))
 SUMMARY_MAX_LENGTH = int(os.environ.get(
     'SUMMARY_MAX_LENGTH', '400'))  # Pollyの制限に合わせて要約長を調整
 API_DELAY_SECONDS = float(os.environ.get('API_DELAY_SECONDS', '1.0'))
 
+# フィード取得設定
+FAST_FEED_PARSER = os.environ.get(
+    'FAST_FEED_PARSER', 'true').lower() == 'true'  # falseでfeedparserのみを使用
+FEED_FETCH_TIMEOUT = float(os.environ.get('FEED_FETCH_TIMEOUT', '30'))
+# 新しい順のフィード（programs.json の date_ordered）では、カーソル通過後、
+# 1フィードあたり MAX_ARTICLES_PER_FEED × この倍率の候補を集めたら解析を打ち切る
+FEED_CANDIDATE_MULTIPLIER = int(os.environ.get('FEED_CANDIDATE_MULTIPLIER', '2'))
+
+# 要約に失敗した記事の再試行（待ち時間は DEAD_LETTER_BACKOFF_MINUTES から失敗ごとに倍にする）
+DEAD_LETTER_MAX_ATTEMPTS = int(os.environ.get('DEAD_LETTER_MAX_ATTEMPTS', '5'))
+DEAD_LETTER_BACKOFF_MINUTES = float(os.environ.get('DEAD_LETTER_BACKOFF_MINUTES', '30'))
+
+# バックフィル設定（全スレッド共通のレート制限）
+BACKFILL_WORKERS = int(os.environ.get('BACKFILL_WORKERS', '4'))
+BACKFILL_LLM_RATE_PER_SECOND = float(os.environ.get(
+    'BACKFILL_LLM_RATE_PER_SECOND', '1.0'))
+BACKFILL_POLLY_RATE_PER_SECOND = float(os.environ.get(
+    'BACKFILL_POLLY_RATE_PER_SECOND', '2.0'))
+
+# Lambdaの残り時間に応じた実行制御（実測値が無い段階の所要時間の見積もり、秒）
+DEADLINE_SUMMARY_SECONDS = float(os.environ.get('DEADLINE_SUMMARY_SECONDS', '20'))
+DEADLINE_SYNTHESIS_SECONDS = float(os.environ.get('DEADLINE_SYNTHESIS_SECONDS', '90'))
+# 公開の実測値はこれより短くしない（書き込みは実行の最後にまとめて行うため）
+DEADLINE_PUBLISH_SECONDS = float(os.environ.get('DEADLINE_PUBLISH_SECONDS', '20'))
+DEADLINE_SAFETY_MARGIN_SECONDS = float(os.environ.get('DEADLINE_SAFETY_MARGIN_SECONDS', '15'))
+
+# LLM・Pollyの料金の見積もりと予算（0 は無制限。1日の合計は data/costs/ に保存する）
+RUN_BUDGET_USD = float(os.environ.get('RUN_BUDGET_USD', '0'))
+DAILY_BUDGET_USD = float(os.environ.get('DAILY_BUDGET_USD', '0'))
+BUDGET_REDUCED_INPUT_CHARS = int(os.environ.get('BUDGET_REDUCED_INPUT_CHARS', '1500'))  # 予算が少ないときに要約に渡す本文の最大文字数
+POLLY_PRICE_PER_1M_CHARS = float(os.environ.get('POLLY_PRICE_PER_1M_CHARS', '16.0'))  # ニューラル音声
+# 未指定ならモデルごとの料金表（src/utils/cost.py）を使う
+LLM_INPUT_PRICE_PER_1M_TOKENS = (
+    float(os.environ['LLM_INPUT_PRICE_PER_1M_TOKENS'])
+    if os.environ.get('LLM_INPUT_PRICE_PER_1M_TOKENS') else None)
+LLM_OUTPUT_PRICE_PER_1M_TOKENS = (
+    float(os.environ['LLM_OUTPUT_PRICE_PER_1M_TOKENS'])
+    if os.environ.get('LLM_OUTPUT_PRICE_PER_1M_TOKENS') else None)
+
+# 段階ごとのメモリプロファイル（tracemalloc、有効時は data/profiles/ にレポートを保存）
+MEMORY_PROFILE = os.environ.get('MEMORY_PROFILE', 'false').lower() == 'true'
+MEMORY_PROFILE_TOP = int(os.environ.get('MEMORY_PROFILE_TOP', '10'))  # 段階ごとに記録する確保箇所の数
+MEMORY_PROFILE_FRAMES = int(os.environ.get('MEMORY_PROFILE_FRAMES', '1'))  # 確保箇所のスタックの深さ
+
+# 実行のタイムライン（Chromeトレース形式、有効時は data/traces/ に保存）
+TRACE = os.environ.get('TRACE', 'false').lower() == 'true'
+
+# 外部呼び出し（フィード・LLM・Polly）の記録と再生（src/cassette.py）
+CASSETTE_MODE = os.environ.get('CASSETTE_MODE', '')  # "record" / "replay"（空なら無効）
+CASSETTE_DIR = os.environ.get('CASSETTE_DIR', 'cassettes/default')
+CASSETTE_LATENCY = os.environ.get('CASSETTE_LATENCY', 'zero')  # "original" で記録時の所要時間を再現
+
+# 近似重複記事の検出設定
+NEAR_DUPLICATE_DETECTION = os.environ.get(
+    'NEAR_DUPLICATE_DETECTION', 'true').lower() == 'true'
+NEAR_DUPLICATE_MAX_DISTANCE = int(os.environ.get(
+    'NEAR_DUPLICATE_MAX_DISTANCE', '3'))  # SimHashのハミング距離（最大3）
+
 # 環境に応じたパス設定
 if IS_LAMBDA:
     AUDIO_DIR = '/tmp'
@@ -0,0 +1,141 @@
+import logging
+from datetime import datetime, timedelta
+
+from src.episode_store import data_key
+from src.serialization import CACHE_CONTROL_STATE
+from src.storage import get_storage
+from src.config import DEAD_LETTER_BACKOFF_MINUTES, DEAD_LETTER_MAX_ATTEMPTS
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+DEAD_LETTERS_FILENAME = "dead_letters.json"
+
+# process_article() が要約に失敗したときに summary に入れる文字列の先頭
+FAILED_SUMMARY_PREFIXES = ("要約エラー:", "記事処理エラー:")
+
+
+def is_failed_summary(article):
+    """記事の要約が失敗していればTrue（エピソードに含めない）"""
+    return (article.get("summary") or "").startswith(FAILED_SUMMARY_PREFIXES)
+
+
+def load_dead_letters(prefix="", storage=None):
+    """
+    要約に失敗して再試行を待っている記事をロードする
+
+    Args:
+        prefix (str): 番組の出力プレフィックス
+        storage (Storage, optional): 保存先（省略時は既定のストレージ）
+
+    Returns:
+        dict: {記事ID: {"article": 選択時の記事, "attempts": 失敗回数, "last_error": str,
+            "first_failed_at": ISO8601文字列, "next_retry_at": ISO8601文字列}}
+    """
+    storage = storage or get_storage()
+    dead_letters = {}
+    try:
+        loaded = storage.get_json(data_key(DEAD_LETTERS_FILENAME, prefix))
+        if loaded:
+            dead_letters = loaded
+            logger.info(f"再試行待ちの記事を{len(dead_letters)}件読み込みました")
+    except Exception as e:
+        logger.error(f"再試行待ちの記事の読み込み中にエラー: {e}")
+    return dead_letters
+
+
+def due_dead_letters(dead_letters, now=None):
+    """
+    再試行の時刻になった記事を返す
+
+    Args:
+        dead_letters (dict): load_dead_letters() の結果
+        now (datetime, optional): 現在時刻（省略時は datetime.now()）
+
+    Returns:
+        list: 再試行する記事のリスト（古い失敗から順）
+    """
+    now = now or datetime.now()
+    due = [
+        entry for entry in dead_letters.values()
+        if datetime.fromisoformat(entry["next_retry_at"]) <= now
+    ]
+    due.sort(key=lambda entry: entry["first_failed_at"])
+    return [dict(entry["article"]) for entry in due]
+
+
+def retry_delay(attempts):
+    """失敗回数に応じた次の再試行までの待ち時間（DEAD_LETTER_BACKOFF_MINUTES から倍々に延ばす）"""
+    return timedelta(minutes=DEAD_LETTER_BACKOFF_MINUTES * 2 ** (attempts - 1))
+
+
+def update_dead_letters(dead_letters, failed, recovered_ids, now=None):
+    """
+    今回の要約の結果で再試行待ちの記事を更新する
+
+    Args:
+        dead_letters (dict): load_dead_letters() の結果
+        failed (list): 要約に失敗した (選択時の記事, エラー文字列) のリスト
+        recovered_ids (set): 再試行で要約できた記事のID
+        now (datetime, optional): 現在時刻（省略時は datetime.now()）
+
+    Returns:
+        tuple: (更新した記事ID → エントリーの辞書（削除する記事はNone）,
+            DEAD_LETTER_MAX_ATTEMPTS 回失敗して諦めた記事IDの集合)
+    """
+    now = now or datetime.now()
+    changes = {article_id: None for article_id in recovered_ids if article_id in dead_letters}
+    dropped_ids = set()
+    for article, error in failed:
+        previous = dead_letters.get(article["id"])
+        attempts = (previous["attempts"] if previous else 0) + 1
+        if attempts >= DEAD_LETTER_MAX_ATTEMPTS:
+            logger.warning(f"{attempts}回要約に失敗したため再試行をやめます: {article['title'][:30]}...")
+            changes[article["id"]] = None
+            dropped_ids.add(article["id"])
+            continue
+        next_retry_at = now + retry_delay(attempts)
+        changes[article["id"]] = {
+            "article": article,
+            "attempts": attempts,
+            "last_error": error,
+            "first_failed_at": previous["first_failed_at"] if previous else now.isoformat(),
+            "next_retry_at": next_retry_at.isoformat()
+        }
+        logger.info(f"要約に失敗した記事を{next_retry_at:%m/%d %H:%M}に再試行します"
+                    f"（{attempts}回目の失敗）: {article['title'][:30]}...")
+    return changes, dropped_ids
+
+
+def save_dead_letters(changes, prefix="", storage=None):
+    """
+    再試行待ちの記事の変更を保存する
+
+    同時に実行された他の呼び出しが追加した記事を消さないよう、
+    保存済みの内容に今回の変更だけを反映して条件付きで書き込む
+
+    Args:
+        changes (dict): update_dead_letters() が返した変更
+        prefix (str): 番組の出力プレフィックス
+        storage (Storage, optional): 保存先（省略時は既定のストレージ）
+    """
+    if not changes:
+        return
+    storage = storage or get_storage()
+
+    def _apply(current):
+        dead_letters = dict(current or {})
+        for article_id, entry in changes.items():
+            if entry is None:
+                dead_letters.pop(article_id, None)
+            else:
+                dead_letters[article_id] = entry
+        return dead_letters
+
+    try:
+        dead_letters = storage.update_json(
+            data_key(DEAD_LETTERS_FILENAME, prefix), _apply,
+            cache_control=CACHE_CONTROL_STATE)
+        logger.info(f"再試行待ちの記事 {len(dead_letters)}件を保存しました")
+    except Exception as e:
+        logger.error(f"再試行待ちの記事の保存中にエラー: {e}")
@@ -0,0 +1,611 @@
+"""
+エピソードの音声合成と公開
+
+番組の記事から統合音声（全レンディション・チャプター・HLS・英語版）を合成し、
+エピソード・エピソードリスト・ポッドキャストフィード・検索インデックスを保存する。
+同じ日のエピソードが既にある場合は、新しい記事をセグメントとして追加する
+"""
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.process_article import translate_articles_to_english
+from src.episode_store import load_episode, save_episode, update_episodes_list
+from src.fingerprint import render_fingerprint, summary_fingerprint
+from src.utils.deadline import STAGE_PUBLISH, STAGE_SYNTHESIS, Deadline
+from src.utils.trace import traced
+from src.utils.memory_profile import (
+    STAGE_CONTENT,
+    STAGE_SYNTHESIS as MEMORY_STAGE_SYNTHESIS,
+    STAGE_UPLOAD,
+    profile_stage
+)
+from src.unified import (
+    generate_english_content,
+    generate_segment_content,
+    generate_unified_content,
+    synthesize_renditions
+)
+from src.unified.speech_synthesizer import (
+    append_renditions,
+    parse_rendition_profiles,
+    truncate_for_polly
+)
+from src.chapters import (
+    build_chapters,
+    clip_sections,
+    embed_chapters,
+    estimate_section_times,
+    fetch_section_times
+)
+from src.hls import delete_hls, write_hls
+from src.podcast_feed import update_podcast_feed
+from src.search_index import SUMMARY_ERROR_PREFIX, index_episode
+from src.utils.audio_format import mp3_duration
+from src.config import (
+    AUDIO_DIR,
+    CHAPTER_MARKERS,
+    CHAPTER_TIMING,
+    ENGLISH_EDITION,
+    HLS_OUTPUT,
+    INTRADAY_SEGMENTS,
+    IS_LAMBDA,
+    PODCAST_FEED,
+    S3_PREFIX,
+    SEARCH_INDEX
+)
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+
+def episode_audio_paths(audio_filename):
+    """
+    音声ファイル名から保存先を決める
+
+    Returns:
+    tuple: (S3キー（ローカルではNone）, ローカルのパス（LambdaではNone）)
+    """
+    if IS_LAMBDA:
+        return f"{S3_PREFIX}{audio_filename}", None
+    return None, os.path.join(AUDIO_DIR, audio_filename)
+
+
+def _section_mark_times(text, sections, voice_id):
+    """スピーチマークから記事ごとの開始時刻を求める（使えなければNoneで、時刻は概算する）"""
+    if not (CHAPTER_MARKERS and sections and CHAPTER_TIMING == "speech_marks"):
+        return None
+    try:
+        return fetch_section_times(text, sections, voice_id)
+    except Exception as e:
+        logger.warning(f"スピーチマークを取得できないため、チャプターの時刻を概算します: {e}")
+        return None
+
+
+def episode_audio_hook(program, date_str, text, sections, mark_times,
+                       base_chapters=None, base_durations=None):
+    """
+    チャプターの埋め込みとHLS出力を行う synthesize_renditions() の audio_hook を作る
+
+    Parameters:
+    program (dict): 番組定義
+    date_str (str): エピソード日付（YYYY-MM-DD）
+    text (str): Pollyに渡すテキスト（切り詰め後）
+    sections (list): text 上の記事ごとの位置
+    mark_times (list or None): スピーチマークから求めた記事ごとの開始時刻（ミリ秒）
+    base_chapters (list, optional): 追加先の音声のチャプター（セグメントを追加する場合）
+    base_durations (dict, optional): 追加先のレンディションごとの長さ（秒）
+
+    Returns:
+    callable: audio_hook
+    """
+    def _audio_hook(profile, data, audio_path, primary):
+        extra = {}
+        # MP3にはチャプターを埋め込み、記事ごとのバイト範囲を記録する
+        if CHAPTER_MARKERS and sections and profile["format"] == "mp3":
+            try:
+                duration_ms = int(mp3_duration(data) * 1000)
+                # 追加したセグメントの記事は、既存の音声の長さだけ後ろにずらす
+                offset_ms = int(((base_durations or {}).get(profile["name"]) or 0) * 1000)
+                estimates = estimate_section_times(text, sections, duration_ms - offset_ms)
+                start_times = [
+                    offset_ms + (mark if mark is not None else estimate)
+                    for mark, estimate in zip(mark_times or estimates, estimates)
+                ]
+                chapters = list(base_chapters or []) + build_chapters(
+                    sections, start_times, duration_ms)
+                data, byte_ranges = embed_chapters(
+                    data, chapters, title=f"{program['name']} ({date_str})")
+                extra["chapter_ranges"] = byte_ranges
+                if primary:
+                    extra["chapters"] = chapters
+            except Exception as e:
+                logger.error(f"チャプター埋め込み中にエラー: {e}", exc_info=True)
+        # メインのMP3はHLSセグメントにも分割する
+        if HLS_OUTPUT and primary and profile["format"] == "mp3":
+            try:
+                hls = write_hls(data, audio_path)
+                if hls:
+                    extra["hls"] = hls
+            except Exception as e:
+                logger.error(f"HLS出力中にエラー: {e}", exc_info=True)
+        return data, extra
+
+    return _audio_hook
+
+
+@traced("synthesize_episode_audio", "synthesis")
+def synthesize_episode_audio(program, processed_articles, episode_date, unified_content=None):
+    """
+    番組の統合コンテンツを生成し、全てのレンディションの音声を合成する
+
+    Parameters:
+    program (dict): 番組定義
+    processed_articles (list): 処理済み記事のリスト
+    episode_date (datetime.date): エピソード日付
+    unified_content (dict, optional): 生成済みの統合コンテンツ（省略時はここで生成する）
+
+    Returns:
+    tuple: (メインの音声URL（失敗時はNone）, generate_unified_content() の結果,
+        合成できたレンディションのリスト)
+    """
+    prefix = program["output_prefix"]
+
+    # 統合コンテンツ（全ての記事と繋ぎナレーション）の生成
+    if unified_content is None:
+        with profile_stage(STAGE_CONTENT):
+            unified_content = generate_unified_content(
+                processed_articles, episode_date,
+                program_description=program["description"])
+
+    # 音声ファイルのパス/URL設定
+    date_str = unified_content["date"]
+    audio_s3_key, audio_local_path = episode_audio_paths(f"{prefix}{date_str}.mp3")
+
+    # 記事ごとのチャプターの開始時刻（スピーチマークが使えなければ音声の長さから概算する）
+    text = truncate_for_polly(unified_content["full_text"])
+    sections = clip_sections(unified_content.get("sections", []), text)
+    mark_times = _section_mark_times(text, sections, program["voice_id"])
+
+    # 統合音声の合成と保存（レンディションは並列に合成する）
+    profiles = parse_rendition_profiles()
+    with profile_stage(MEMORY_STAGE_SYNTHESIS):
+        renditions = synthesize_renditions(
+            unified_content["full_text"],
+            audio_s3_key,
+            audio_local_path,
+            voice_id=program["voice_id"],
+            profiles=profiles,
+            audio_hook=episode_audio_hook(program, date_str, text, sections, mark_times)
+        )
+
+    # 先頭のプロファイルがメインの音声（失敗した場合は audio_url なし）
+    audio_url = None
+    if renditions and renditions[0]["name"] == profiles[0]["name"]:
+        audio_url = renditions[0]["url"]
+    return audio_url, unified_content, renditions
+
+
+@traced("append_episode_audio", "synthesis")
+def append_episode_audio(program, episode, new_articles, episode_date):
+    """
+    同じ日の既存のエピソードに、新しい記事のセグメントを追加する
+
+    新しい記事のテキストだけを合成して各レンディションの後ろに連結し、
+    チャプターは既存のものの後ろに追加する（既存の音声は再合成しない）。
+    セグメントの記事数・文字数の上限を超える記事は読み上げない
+
+    Parameters:
+    program (dict): 番組定義
+    episode (dict): 保存済みのエピソード
+    new_articles (list): 追加する処理済み記事のリスト
+    episode_date (datetime.date): エピソード日付
+
+    Returns:
+    tuple: (メインの音声URL（失敗時はNone）, generate_segment_content() の結果,
+        追加できたレンディションのリスト)
+    """
+    prefix = program["output_prefix"]
+
+    with profile_stage(STAGE_CONTENT):
+        segment_content = generate_segment_content(new_articles, episode_date)
+        # 記事数・文字数の上限で読み上げない記事がある場合は、読み上げる記事だけで作り直す
+        # （エピソードに追加する記事から同じテキストを再現できるようにする）
+        while len(segment_content["sections"]) < len(new_articles):
+            logger.warning(f"[{program['id']}] セグメントの上限のため"
+                           f"{len(new_articles) - len(segment_content['sections'])}件の記事を読み上げません")
+            narrated_ids = {section["article_id"] for section in segment_content["sections"]}
+            new_articles = [a for a in new_articles if a.get("id") in narrated_ids]
+            segment_content = generate_segment_content(new_articles, episode_date)
+
+    date_str = segment_content["date"]
+    audio_s3_key, audio_local_path = episode_audio_paths(f"{prefix}{date_str}.mp3")
+
+    text = truncate_for_polly(segment_content["full_text"])
+    sections = clip_sections(segment_content.get("sections", []), text)
+    mark_times = _section_mark_times(text, sections, program["voice_id"])
+    base_durations = {r["name"]: r.get("duration") for r in episode.get("renditions") or []}
+
+    profiles = parse_rendition_profiles()
+    with profile_stage(MEMORY_STAGE_SYNTHESIS):
+        renditions = append_renditions(
+            segment_content["full_text"],
+            audio_s3_key,
+            audio_local_path,
+            voice_id=program["voice_id"],
+            profiles=profiles,
+            audio_hook=episode_audio_hook(
+                program, date_str, text, sections, mark_times,
+                base_chapters=episode.get("chapters"), base_durations=base_durations)
+        )
+
+    audio_url = None
+    if renditions and renditions[0]["name"] == profiles[0]["name"]:
+        audio_url = renditions[0]["url"]
+    return audio_url, segment_content, renditions
+
+
+@traced("synthesize_english_audio", "synthesis")
+def synthesize_english_audio(program, processed_articles, unified_content, episode_date):
+    """
+    日本語版で選ばれた記事をまとめて英訳し、英語版の音声を合成する
+
+    english_title / english_summary を持つ記事（前回の実行で英訳済みのもの）は英訳し直さない
+
+    Parameters:
+    program (dict): 番組定義
+    processed_articles (list): 処理済み記事のリスト
+    unified_content (dict): 日本語版の generate_unified_content() の結果
+        （sections の article_id の順に英語版に入れる）
+    episode_date (datetime.date): エピソード日付
+
+    Returns:
+    tuple: (英語版の音声URL（失敗時はNone）, generate_english_content() の結果
+        （英訳できた記事が無ければNone）, 合成できたレンディションのリスト,
+        {記事ID: {"title", "summary"}} の英訳)
+    """
+    prefix = program["output_prefix"]
+
+    # 日本語版に入った記事だけを、日本語版と同じ順に英訳する
+    by_id = {article.get("id"): article for article in processed_articles}
+    selected = []
+    for section in unified_content.get("sections", []):
+        article = by_id.get(section["article_id"])
+        if article and not article["summary"].startswith(SUMMARY_ERROR_PREFIX):
+            selected.append(article)
+    translated = {
+        article["id"]: {"title": article["english_title"], "summary": article["english_summary"]}
+        for article in selected
+        if article.get("english_title") and article.get("english_summary")
+    }
+    untranslated = [article for article in selected if article["id"] not in translated]
+    if untranslated:
+        translations = translate_articles_to_english(untranslated)
+        translated.update({
+            article["id"]: translation
+            for article, translation in zip(untranslated, translations) if translation
+        })
+    if not translated:
+        logger.warning(f"[{program['id']}] 英訳できた記事が無いため英語版を作成しません")
+        return None, None, [], {}
+
+    english_content = generate_english_content(
+        [{"id": article["id"], **translated[article["id"]]}
+         for article in selected if article["id"] in translated],
+        episode_date, program_name=program["name"])
+
+    audio_s3_key, audio_local_path = episode_audio_paths(
+        f"{prefix}{english_content['date']}.en.mp3")
+
+    # 英語版はメインのレンディションだけを合成する
+    renditions = synthesize_renditions(
+        english_content["full_text"],
+        audio_s3_key,
+        audio_local_path,
+        voice_id=program["english_voice_id"],
+        profiles=parse_rendition_profiles()[:1]
+    )
+    audio_url = renditions[0]["url"] if renditions else None
+    return audio_url, english_content, renditions, translated
+
+
+def episode_audio_fields(audio_url, renditions):
+    """
+    synthesize_episode_audio() の結果からエピソードJSONの音声関連フィールドを作る
+
+    Returns:
+    dict: audio_url, renditions, hls_url, chapters
+    """
+    renditions = [dict(r) for r in renditions]
+    primary = renditions[0] if audio_url and renditions else {}
+    chapters = primary.pop("chapters", None)
+    return {
+        "audio_url": audio_url,
+        # クライアントが受け取れる最小のファイルを選べるよう、全レンディションを記録する
+        # （MP3の chapter_ranges は chapters と同じ順の記事ごとのバイト範囲）
+        "renditions": renditions,
+        # HLSプレイリスト（HLS_OUTPUT が有効な場合のみ）
+        "hls_url": primary["hls"]["url"] if "hls" in primary else None,
+        "chapters": chapters
+    }
+
+
+def episode_segment(articles, created_at, start_ms):
+    """エピソードのセグメント（1回の実行で追加した記事と音声上の開始位置）"""
+    return {
+        "created_at": created_at,
+        "article_ids": [article.get("id") for article in articles],
+        "start_ms": start_ms
+    }
+
+
+def rebuilt_segments(segments, chapters):
+    """
+    エピソード全体を1つの音声として作り直した後のセグメント
+
+    実行ごとの記事IDと作成時刻は残し、開始位置は作り直した音声のチャプターから求める。
+    エピソードJSONの rendered_segments にはセグメント数（全てを一度に合成した）を記録する
+
+    Parameters:
+    segments (list): 作り直す前のセグメント
+    chapters (list or None): 作り直した音声のチャプター
+
+    Returns:
+    list: 開始位置を更新したセグメント
+    """
+    starts = {chapter["article_id"]: chapter["start_ms"] for chapter in chapters or []}
+    rebuilt = []
+    for index, segment in enumerate(segments):
+        start_ms = 0 if index == 0 else next(
+            (starts[i] for i in segment["article_ids"] if i in starts), None)
+        rebuilt.append(dict(segment, start_ms=start_ms))
+    return rebuilt
+
+
+def apply_english_edition(episode_data, program, english_result):
+    """
+    synthesize_english_audio() の結果をエピソードに記録する
+
+    英訳は記事ごとの english_title / english_summary にも記録する
+
+    Returns:
+    bool: 英語版の音声を記録した場合True
+    """
+    english_url, english_content, english_renditions, translations = (
+        english_result or (None, None, [], {}))
+    if translations:
+        episode_data["articles"] = [
+            {**article, "english_title": translations[article["id"]]["title"],
+             "english_summary": translations[article["id"]]["summary"]}
+            if article.get("id") in translations else article
+            for article in episode_data["articles"]
+        ]
+    if not english_url:
+        return False
+    episode_data["english"] = {
+        "title": f"{program['name']} English Edition ({episode_data['episode_id']})",
+        **episode_audio_fields(english_url, english_renditions),
+        "article_ids": [section["article_id"] for section in english_content["sections"]]
+    }
+    return True
+
+
+def _synthesize_appended_english(program, existing, new_articles, episode_date):
+    """
+    セグメントを追加したエピソードの英語版を、追加した記事を含めて作り直す
+
+    既存の英語版の記事の後ろに追加した記事を並べ、英訳済みの記事は英訳し直さない
+
+    Returns:
+    tuple or None: synthesize_english_audio() の結果（失敗した場合はNone）
+    """
+    previous = existing.get("english")
+    article_ids = list(previous["article_ids"]) if previous else [
+        article.get("id") for article in existing["articles"]]
+    article_ids += [article.get("id") for article in new_articles]
+    try:
+        return synthesize_english_audio(
+            program, existing["articles"] + new_articles,
+            {"sections": [{"article_id": article_id} for article_id in article_ids]},
+            episode_date)
+    except Exception as e:
+        logger.error(f"英語版の作成中にエラー: {e}", exc_info=True)
+        return None
+
+
+def _synthesize_full_episode(program, processed_articles, episode_date):
+    """
+    エピソード全体の音声を合成する（英語版が有効なら翻訳・英語音声の合成を並列に進める）
+
+    Returns:
+    tuple: (音声URL, 統合コンテンツ, レンディションのリスト, synthesize_english_audio() の結果またはNone)
+    """
+    with profile_stage(STAGE_CONTENT):
+        unified_content = generate_unified_content(
+            processed_articles, episode_date,
+            program_description=program["description"])
+
+    # 英語版は翻訳から合成までを日本語版の合成と並列に進める
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        english_future = executor.submit(
+            synthesize_english_audio, program, processed_articles,
+            unified_content, episode_date) if ENGLISH_EDITION else None
+        audio_url, unified_content, renditions = synthesize_episode_audio(
+            program, processed_articles, episode_date, unified_content)
+        english_result = None
+        if english_future:
+            try:
+                english_result = english_future.result()
+            except Exception as e:
+                logger.error(f"英語版の作成中にエラー: {e}", exc_info=True)
+    return audio_url, unified_content, renditions, english_result
+
+
+@traced("publish_episode", "program")
+def publish_episode(program, processed_articles, episode_date, storage=None, deadline=None):
+    """
+    番組の統合音声を合成し、エピソードとエピソードリストを保存する
+
+    同じ日のエピソードが既にある場合（INTRADAY_SEGMENTS が有効なとき）は、新しい記事だけを
+    セグメントとして合成し、既存の音声とチャプターの後ろに追加する。
+    英語版は追加した記事を含めて作り直す。内容ハッシュのパスが変わった古いHLS出力は、
+    新しいエピソードを保存した後に削除する
+
+    Parameters:
+    program (dict): 番組定義
+    processed_articles (list): 処理済み記事のリスト
+    episode_date (datetime.date): エピソード日付
+    storage (Storage, optional): 保存先（実行全体の書き込みバッチなど）
+    deadline (Deadline, optional): 音声合成・公開の所要時間を記録する
+
+    Returns:
+    dict or None: 保存したエピソード。失敗した場合はNone
+    """
+    prefix = program["output_prefix"]
+    today = episode_date.strftime("%Y-%m-%d")
+
+    deadline = deadline or Deadline()
+
+    # この時点では episode_data をまだ保存しない（audio_url 確定後に保存）
+    episode_data = None
+
+    # 同じ日の公開済みエピソード（音声が無い場合は全体を作り直す）
+    existing = None
+    if INTRADAY_SEGMENTS:
+        existing = load_episode(today, prefix, storage)
+        if existing and not existing.get("audio_url"):
+            existing = None
+
+    try:
+        appended = False
+        english_result = None
+        with deadline.stage(STAGE_SYNTHESIS):
+            if existing:
+                known_ids = {article.get("id") for article in existing["articles"]}
+                new_articles = [a for a in processed_articles if a.get("id") not in known_ids]
+                if not new_articles:
+                    logger.info(f"[{program['id']}] {today}のエピソードに追加する記事がありません")
+                    return existing
+
+                logger.info(f"[{program['id']}] {today}のエピソードに"
+                            f"{len(new_articles)}件の記事のセグメントを追加します...")
+                audio_url, unified_content, renditions = append_episode_audio(
+                    program, existing, new_articles, episode_date)
+                appended = audio_url is not None
+                if appended:
+                    # セグメントで読み上げた記事だけをエピソードに追加する
+                    narrated_ids = {section["article_id"] for section in unified_content["sections"]}
+                    new_articles = [a for a in new_articles if a.get("id") in narrated_ids]
+                    if ENGLISH_EDITION:
+                        english_result = _synthesize_appended_english(
+                            program, existing, new_articles, episode_date)
+                else:
+                    logger.error(f"[{program['id']}] セグメントを追加できないため、"
+                                 f"その日の全ての記事でエピソードを作り直します")
+                    processed_articles = existing["articles"] + new_articles
+
+            if not appended:
+                logger.info(f"[{program['id']}] 統合音声生成処理を開始します...")
+                audio_url, unified_content, renditions, english_result = (
+                    _synthesize_full_episode(program, processed_articles, episode_date))
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        if existing:
+            # 既存のエピソードを引き継ぎ、音声・チャプター・記事・セグメントを伸ばす
+            segments = existing.get("segments") or [
+                episode_segment(existing["articles"], existing["created_at"], 0)]
+            episode_data = {
+                **existing,
+                **episode_audio_fields(audio_url, renditions),
+                "articles": existing["articles"] + new_articles,
+                "updated_at": now
+            }
+            if appended:
+                base_duration = (existing.get("renditions") or [{}])[0].get("duration")
+                episode_data["segments"] = segments + [episode_segment(
+                    new_articles, now,
+                    int(base_duration * 1000) if base_duration is not None else None)]
+                # セグメントごとのテキストを順につないだフィンガープリント
+                episode_data["render_fingerprint"] = render_fingerprint(
+                    unified_content["full_text"], program["voice_id"],
+                    previous=existing.get("render_fingerprint"))
+            else:
+                # 全体を作り直した場合も、実行ごとのセグメントの記録は残す
+                episode_data["segments"] = rebuilt_segments(
+                    segments + [episode_segment(new_articles, now, None)],
+                    episode_data.get("chapters"))
+                episode_data["rendered_segments"] = len(episode_data["segments"])
+                episode_data["render_fingerprint"] = render_fingerprint(
+                    unified_content["full_text"], program["voice_id"]) if audio_url else None
+            # 英語版を作り直せない場合（ENGLISH_EDITION が無効・失敗）は、既存の英語版に
+            # 追加した記事が入っていないことを stale で示す
+            episode_data.pop("english", None)
+            if not apply_english_edition(episode_data, program, english_result) \
+                    and existing.get("english"):
+                logger.warning(f"[{program['id']}] 英語版には追加した記事が入っていません")
+                episode_data["english"] = dict(existing["english"], stale=True)
+        else:
+            episode_data = {
+                "episode_id": today,
+                "title": f"{program['name']} ({today})",
+                "created_at": now,
+                **episode_audio_fields(audio_url, renditions),
+                "articles": processed_articles,
+                "segments": [episode_segment(processed_articles, now, 0)],
+                "source": program["name"],
+                # バックフィル時に再生成が必要かを判定するためのフィンガープリント
+                "summary_fingerprint": summary_fingerprint(),
+                "render_fingerprint": render_fingerprint(
+                    unified_content["full_text"], program["voice_id"]) if audio_url else None
+            }
+            apply_english_edition(episode_data, program, english_result)
+        publish_started = time.monotonic()
+
+        # エピソード・カタログ・フィード・インデックスの書き込み
+        with profile_stage(STAGE_UPLOAD):
+            try:
+                save_episode(episode_data, prefix, storage)
+                # エピソードリストを更新
+                update_episodes_list(episode_data, prefix, storage)
+                logger.info(f"[{program['id']}] エピソード（統合音声付き）を保存しました: {today}")
+                if existing:
+                    delete_replaced_hls(existing, episode_data, storage)
+            except Exception as e:
+                logger.error(f"エピソード保存中にエラー: {e}", exc_info=True)
+
+            if PODCAST_FEED:
+                try:
+                    update_podcast_feed(program, episode_data, storage)
+                except Exception as e:
+                    logger.error(f"ポッドキャストフィード更新中にエラー: {e}", exc_info=True)
+
+            if SEARCH_INDEX:
+                try:
+                    index_episode(episode_data, prefix, storage)
+                except Exception as e:
+                    logger.error(f"検索インデックス更新中にエラー: {e}", exc_info=True)
+
+        deadline.record(STAGE_PUBLISH, time.monotonic() - publish_started)
+
+    except Exception as e:
+        logger.error(f"統合音声生成処理中にエラーが発生しました: {e}", exc_info=True)
+        # 統合音声生成エラーは致命的ではないため、処理を続行
+
+    return episode_data
+
+
+def delete_replaced_hls(previous, episode_data, storage=None):
+    """
+    作り直す前のエピソードのHLS出力が置き換えられていれば削除する
+
+    削除は storage（書き込みバッチ）のフラッシュで、新しいエピソードの書き込みの後に行われる
+    """
+    previous_hls = (previous.get("renditions") or [{}])[0].get("hls")
+    if not (episode_data.get("audio_url") and previous_hls):
+        return
+    if previous_hls["url"] != episode_data.get("hls_url"):
+        try:
+            delete_hls(previous_hls, storage)
+        except Exception as e:
+            logger.error(f"古いHLS出力の削除中にエラー: {e}", exc_info=True)
@@ -0,0 +1,168 @@
+import logging
+
+from src.config import EPISODE_LITE_VARIANT
+from src.serialization import (
+    CACHE_CONTROL_CATALOG,
+    CACHE_CONTROL_EPISODE,
+    CACHE_CONTROL_STATE,
+    EPISODE_LIST_FIELDS,
+    project
+)
+from src.storage import get_storage
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+PROCESSED_IDS_FILENAME = "processed_article_ids.json"
+MAX_PROCESSED_IDS = 1000  # 保存するIDの最大件数
+
+
+def data_key(name, prefix=""):
+    """
+    番組の出力プレフィックスを考慮したデータファイルのキー（ローカルでは相対パス）
+
+    Parameters:
+    name (str): data/ 配下のファイル名（例: "episodes_list.json"）
+    prefix (str): 番組の出力プレフィックス（例: "cloud/"）。既定の番組は空文字
+
+    Returns:
+    str: "data/{prefix}{name}"
+    """
+    return f"data/{prefix}{name}"
+
+
+def load_processed_ids(prefix="", storage=None):
+    """処理済み記事IDをロードする"""
+    storage = storage or get_storage()
+    processed_ids = set()
+    try:
+        ids_list = storage.get_json(data_key(PROCESSED_IDS_FILENAME, prefix))
+        if ids_list is None:
+            logger.info("処理済みIDファイルが存在しませんでした。新規作成します。")
+        else:
+            processed_ids = set(ids_list)
+            logger.info(f"{len(processed_ids)}件の処理済みIDを読み込みました")
+    except Exception as e:
+        logger.error(f"処理済みIDの読み込み中にエラー: {e}")
+    return processed_ids
+
+
+def save_processed_ids(processed_ids, prefix="", storage=None):
+    """
+    処理済み記事IDを保存する
+
+    同時に実行された他の呼び出しが保存したIDを上書きしないよう、
+    保存済みのIDと和集合をとって条件付きで書き込む
+    """
+    storage = storage or get_storage()
+
+    def _merge(current):
+        # set を list に変換してソート (任意だがデバッグしやすい)
+        ids_list = sorted(set(current or []) | set(processed_ids), reverse=True)
+
+        # 最新 MAX_PROCESSED_IDS 件のみ保持
+        if len(ids_list) > MAX_PROCESSED_IDS:
+            ids_list = ids_list[:MAX_PROCESSED_IDS]
+            logger.info(f"処理済みIDを最新{MAX_PROCESSED_IDS}件に制限しました。")
+        return ids_list
+
+    try:
+        ids_list = storage.update_json(
+            data_key(PROCESSED_IDS_FILENAME, prefix), _merge,
+            cache_control=CACHE_CONTROL_STATE)
+        logger.info(f"処理済みID {len(ids_list)}件を保存しました")
+    except Exception as e:
+        logger.error(f"処理済みID保存中にエラー: {e}")
+
+
+def load_episode(episode_id, prefix="", storage=None):
+    """
+    保存済みのエピソードJSONを読み込む
+
+    Parameters:
+    episode_id (str): エピソードID（YYYY-MM-DD）
+    prefix (str): 番組の出力プレフィックス
+
+    Returns:
+    dict or None: エピソード。存在しない場合はNone
+    """
+    storage = storage or get_storage()
+    try:
+        return storage.get_json(
+            data_key(f"episodes/episode_{episode_id}.json", prefix))
+    except Exception as e:
+        logger.error(f"エピソード読み込み中にエラー ({episode_id}): {e}")
+        return None
+
+
+def save_episode(episode_data, prefix="", storage=None):
+    """
+    エピソードJSONを保存する
+
+    EPISODE_LITE_VARIANT が有効な場合は、一覧表示用に要約・本文を省いた
+    軽量版を episodes/lite/ にも保存する
+
+    Parameters:
+    episode_data (dict): 保存するエピソード
+    prefix (str): 番組の出力プレフィックス
+    """
+    storage = storage or get_storage()
+    episode_id = episode_data["episode_id"]
+    storage.put_json(
+        data_key(f"episodes/episode_{episode_id}.json", prefix), episode_data,
+        cache_control=CACHE_CONTROL_EPISODE)
+    if EPISODE_LITE_VARIANT:
+        storage.put_json(
+            data_key(f"episodes/lite/episode_{episode_id}.json", prefix),
+            project(episode_data, EPISODE_LIST_FIELDS),
+            cache_control=CACHE_CONTROL_EPISODE)
+
+
+def update_episodes_list(episode_data, prefix="", storage=None):
+    """
+    エピソードリストを更新する（同じエピソードが既にあれば置き換える）
+    """
+    logger.info("エピソードリスト更新開始")
+    storage = storage or get_storage()
+    episodes_list_path = data_key("episodes_list.json", prefix)
+
+    # エピソードの要約情報
+    episode_summary = {
+        "episode_id": episode_data["episode_id"],
+        "title": episode_data["title"],
+        "created_at": episode_data["created_at"],
+        "audio_url": episode_data.get("audio_url"),
+        "article_count": len(episode_data["articles"]),
+        "source": episode_data.get("source", "Tech News")
+    }
+    if episode_data.get("english"):
+        # 英語版がある場合はカタログから音声を直接選べるようにする
+        episode_summary["english_audio_url"] = episode_data["english"]["audio_url"]
+
+    def _merge(current):
+        # 競合時は最新のリストを読み直して再適用される
+        if current is None:
+            logger.info("エピソードリストが存在しないため、新規作成します")
+        episodes_list = list(current or [])
+
+        # 重複チェック（再レンダリングした場合は audio_url などを置き換える）
+        existing_ids = [ep["episode_id"] for ep in episodes_list]
+        if episode_summary["episode_id"] in existing_ids:
+            episodes_list[existing_ids.index(episode_summary["episode_id"])] = episode_summary
+        else:
+            episodes_list.append(episode_summary)
+
+        # 日付順に並べ替え（新しい順）
+        episodes_list.sort(key=lambda x: x["episode_id"], reverse=True)
+        return episodes_list
+
+    # エピソードリストを条件付きで保存
+    episodes_list = []
+    try:
+        episodes_list = storage.update_json(
+            episodes_list_path, _merge, cache_control=CACHE_CONTROL_CATALOG)
+        logger.info(f"エピソードリストを保存しました（{len(episodes_list)}件）")
+    except Exception as e:
+        logger.error(f"エピソードリスト保存中にエラー: {str(e)}")
+
+    return episodes_list
@@ -0,0 +1,210 @@
+import gzip
+import io
+import logging
+import urllib.request
+import zlib
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'news-subscribe-aws/1.0 (+https://github.com/kenchang198/news_subscribe_aws)'
+
+# 名前空間
+RDF_NS = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}'
+RSS1_NS = '{http://purl.org/rss/1.0/}'
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+DC_NS = '{http://purl.org/dc/elements/1.1/}'
+CONTENT_NS = '{http://purl.org/rss/1.0/modules/content/}'
+
+FEED_RDF = 'rdf'
+FEED_RSS2 = 'rss2'
+FEED_ATOM = 'atom'
+
+# フィード形式ごとのエントリー要素名
+ENTRY_TAGS = {
+    FEED_RDF: RSS1_NS + 'item',
+    FEED_RSS2: 'item',
+    FEED_ATOM: ATOM_NS + 'entry',
+}
+
+
+class UnsupportedFeedError(Exception):
+    """高速パーサーが対応していない形式のフィード（feedparserにフォールバックする）"""
+
+
+def fetch_feed_bytes(feed_url, timeout=30):
+    """
+    フィードの生データを取得する（gzip/deflate圧縮に対応）
+
+    Args:
+        feed_url (str): フィードのURL
+        timeout (float): タイムアウト秒数
+
+    Returns:
+        bytes: フィードのXMLデータ
+    """
+    request = urllib.request.Request(feed_url, headers={
+        'User-Agent': USER_AGENT,
+        'Accept-Encoding': 'gzip, deflate',
+    })
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        data = response.read()
+        encoding = response.headers.get('Content-Encoding', '').lower()
+
+    if encoding == 'gzip':
+        data = gzip.decompress(data)
+    elif encoding == 'deflate':
+        data = zlib.decompress(data)
+    return data
+
+
+def parse_date_utc(value):
+    """
+    RFC 822 (RSS 2.0) / W3C-DTF (RSS 1.0, Atom) の日付文字列をUTCのdatetimeに変換する
+
+    タイムゾーン指定のない日付はUTCとみなす
+
+    Args:
+        value (str): 日付文字列
+
+    Returns:
+        datetime or None: UTCのdatetime。解析できない場合はNone
+    """
+    if not value:
+        return None
+    value = value.strip()
+
+    dt = None
+    try:
+        # Python 3.9 の fromisoformat は "Z" を解釈できないため置換する
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            dt = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _text(elem):
+    # Atom の type="xhtml" は子要素（<div> など）に本文が入るため、子孫のテキストもつなげる
+    return ''.join(elem.itertext()).strip() if elem is not None else ''
+
+
+def _parse_entry(elem, feed_type):
+    """エントリー要素から fetch_rss で使うフィールドだけを取り出す"""
+    if feed_type == FEED_ATOM:
+        link = ''
+        for link_elem in elem.iter(ATOM_NS + 'link'):
+            rel = link_elem.get('rel', 'alternate')
+            if rel == 'alternate' or not link:
+                link = link_elem.get('href', '')
+            if rel == 'alternate':
+                break
+        entry_id = _text(elem.find(ATOM_NS + 'id'))
+        title = _text(elem.find(ATOM_NS + 'title'))
+        published = (_text(elem.find(ATOM_NS + 'published'))
+                     or _text(elem.find(ATOM_NS + 'updated')))
+        summary = _text(elem.find(ATOM_NS + 'summary'))
+        content = _text(elem.find(ATOM_NS + 'content'))
+    else:
+        ns = RSS1_NS if feed_type == FEED_RDF else ''
+        link = _text(elem.find(ns + 'link'))
+        if feed_type == FEED_RDF:
+            entry_id = elem.get(RDF_NS + 'about', '')
+        else:
+            entry_id = _text(elem.find('guid'))
+        title = _text(elem.find(ns + 'title'))
+        published = (_text(elem.find('pubDate'))
+                     or _text(elem.find(DC_NS + 'date')))
+        summary = _text(elem.find(ns + 'description'))
+        content = _text(elem.find(CONTENT_NS + 'encoded'))
+
+    return {
+        'id': link or entry_id,
+        'title': title,
+        'link': link,
+        'published_dt': parse_date_utc(published),
+        'summary': summary,
+        'content': content,
+    }
+
+
+def iter_feed_entries(data):
+    """
+    iterparse でフィードを逐次解析し、エントリーを1件ずつ返す
+
+    RSS 1.0 (RDF) / RSS 2.0 / Atom に対応する。処理済みのエントリー要素は
+    すぐに破棄するため、大きなフィードでもメモリ使用量は一定に保たれる。
+    途中でイテレーションを止めれば、残りのXMLは解析されない。
+
+    Args:
+        data (bytes): フィードのXMLデータ
+
+    Yields:
+        dict: id, title, link, published_dt, summary, content を持つ辞書
+
+    Raises:
+        UnsupportedFeedError: 対応していない形式の場合
+        xml.etree.ElementTree.ParseError: XMLとして不正な場合
+    """
+    feed_type = None
+    entry_tag = None
+    stack = []
+
+    for event, elem in ET.iterparse(io.BytesIO(data), events=('start', 'end')):
+        if event == 'start':
+            if not stack:
+                if elem.tag == RDF_NS + 'RDF':
+                    feed_type = FEED_RDF
+                elif elem.tag == 'rss':
+                    feed_type = FEED_RSS2
+                elif elem.tag == ATOM_NS + 'feed':
+                    feed_type = FEED_ATOM
+                else:
+                    raise UnsupportedFeedError(f"未対応のルート要素: {elem.tag}")
+                entry_tag = ENTRY_TAGS[feed_type]
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        if elem.tag == entry_tag:
+            yield _parse_entry(elem, feed_type)
+            # 解析済みの兄弟要素を親から外し、ツリーが伸び続けないようにする
+            if stack:
+                del stack[-1][:]
+
+    if feed_type is None:
+        raise UnsupportedFeedError("空のフィードです")
+
+
+def parse_feed_fast(data):
+    """
+    フィード全体を高速パーサーで解析する
+
+    Args:
+        data (bytes): フィードのXMLデータ
+
+    Returns:
+        list: iter_feed_entries() が返すエントリーのリスト
+    """
+    return list(iter_feed_entries(data))
+
+
+# テスト用
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    feed_data = fetch_feed_bytes("https://b.hatena.ne.jp/hotentry/it.rss")
+    entries = parse_feed_fast(feed_data)
+    print(f"{len(entries)}件のエントリーを解析しました")
+    for entry in entries[:3]:
+        print(f"📌 {entry['title']}")
+        print(f"🔗 {entry['link']}")
+        print(f"🕒 {entry['published_dt']}\n")
@@ -0,0 +1,153 @@
+import logging
+from datetime import datetime
+
+from src.episode_store import data_key
+from src.serialization import CACHE_CONTROL_STATE
+from src.storage import get_storage
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+FEED_CURSORS_FILENAME = "feed_cursors.json"
+
+
+def load_feed_cursors(prefix="", storage=None):
+    """
+    フィードごとのハイウォーターマーク（消費済みの最新公開日時とID）をロードする
+
+    Args:
+        prefix (str): 番組の出力プレフィックス
+        storage (Storage, optional): 保存先（省略時は既定のストレージ）
+
+    Returns:
+        dict: {source_id: {"published": ISO8601文字列, "id": 記事ID}}
+    """
+    storage = storage or get_storage()
+    cursors = {}
+    try:
+        loaded = storage.get_json(data_key(FEED_CURSORS_FILENAME, prefix))
+        if loaded is None:
+            logger.info("フィードカーソルファイルが存在しませんでした。新規作成します。")
+        else:
+            cursors = loaded
+            logger.info(f"{len(cursors)}件のフィードカーソルを読み込みました")
+    except Exception as e:
+        logger.error(f"フィードカーソルの読み込み中にエラー: {e}")
+    return cursors
+
+
+def save_feed_cursors(cursors, prefix="", storage=None):
+    """
+    フィードごとのハイウォーターマークを保存する
+
+    同時に実行された他の呼び出しが進めたカーソルを後退させないよう、
+    保存済みのカーソルとフィードごとに新しい方をとって条件付きで書き込む
+    """
+    storage = storage or get_storage()
+    try:
+        merged = storage.update_json(
+            data_key(FEED_CURSORS_FILENAME, prefix),
+            lambda current: merge_feed_cursors(current or {}, cursors),
+            cache_control=CACHE_CONTROL_STATE)
+        logger.info(f"フィードカーソル {len(merged)}件を保存しました")
+    except Exception as e:
+        logger.error(f"フィードカーソル保存中にエラー: {e}")
+
+
+def _parse_published(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def has_passed_cursor(entry_id, published_dt, cursor):
+    """
+    エントリーがカーソル位置に到達したか（消費済みの範囲に入ったか）を判定する
+
+    Args:
+        entry_id (str): エントリーのID
+        published_dt (datetime or None): エントリーの公開日時（UTC）
+        cursor (dict or None): load_feed_cursors() が返すフィードのカーソル
+
+    Returns:
+        bool: カーソルIDと一致するか、カーソルの公開日時以前であればTrue
+    """
+    if not cursor:
+        return False
+    if entry_id and entry_id == cursor.get("id"):
+        return True
+    cursor_dt = _parse_published(cursor.get("published"))
+    return bool(cursor_dt and published_dt and published_dt <= cursor_dt)
+
+
+def advance_feed_cursors(cursors, consumed_articles):
+    """
+    消費した記事をもとにカーソルを前進させる（後退はしない）
+
+    Args:
+        cursors (dict): 現在のカーソル
+        consumed_articles (list): source_id, id, published を持つ記事のリスト
+
+    Returns:
+        dict: 更新後のカーソル
+    """
+    updated = dict(cursors)
+    for article in consumed_articles:
+        source_id = article.get("source_id")
+        published_dt = _parse_published(article.get("published"))
+        if not source_id or published_dt is None:
+            continue
+
+        current = updated.get(source_id)
+        current_dt = _parse_published(current.get("published")) if current else None
+        if current_dt is None or published_dt > current_dt:
+            updated[source_id] = {
+                "published": article["published"],
+                "id": article["id"]
+            }
+    return updated
+
+
+def merge_feed_cursors(base, other):
+    """
+    2つのカーソルをフィードごとに新しい方をとってマージする
+
+    Args:
+        base (dict): 保存済みのカーソル
+        other (dict): 今回の実行で進めたカーソル
+
+    Returns:
+        dict: マージ後のカーソル
+    """
+    merged = dict(base)
+    for source_id, cursor in other.items():
+        current = merged.get(source_id)
+        current_dt = _parse_published(current.get("published")) if current else None
+        cursor_dt = _parse_published(cursor.get("published"))
+        if current_dt is None or (cursor_dt is not None and cursor_dt > current_dt):
+            merged[source_id] = cursor
+    return merged
+
+
+def oldest_cursor(cursors):
+    """
+    複数番組で共有するフィードのカーソルのうち最も古いものを返す
+
+    どれか1つでもカーソルが無ければ None（フィード全体が対象）を返す
+
+    Args:
+        cursors (list): カーソル（None を含んでもよい）のリスト
+
+    Returns:
+        dict or None: 最も古いカーソル
+    """
+    oldest = None
+    oldest_dt = None
+    for cursor in cursors:
+        cursor_dt = _parse_published(cursor.get("published")) if cursor else None
+        if cursor_dt is None:
+            return None
+        if oldest_dt is None or cursor_dt < oldest_dt:
+            oldest, oldest_dt = cursor, cursor_dt
+    return oldest
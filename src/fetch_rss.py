@@ -1,8 +1,19 @@
+import calendar
 import feedparser
-import time
 import logging
+import xml.etree.ElementTree as ET
 from datetime import datetime, timezone
 
+from src.config import FAST_FEED_PARSER, FEED_FETCH_TIMEOUT
+from src.feed_cursor import has_passed_cursor
+from src.fast_feed_parser import (
+    UnsupportedFeedError,
+    fetch_feed_bytes,
+    iter_feed_entries
+)
+from src.cassette import cassette_call, get_cassette
+from src.utils.memory_profile import STAGE_FETCH, STAGE_PARSE, profile_stage
+
 # ロギング設定
 logger = logging.getLogger(__name__)
 
@@ -10,57 +21,144 @@ logger = logging.getLogger(__name__)
 processed_articles_filepath = 'processed_article_ids.json'
 
 
-def fetch_rss(feed_url):
-    logger.info(f"RSSフィードを取得中: {feed_url}")
+def _struct_time_to_utc(parsed):
+    """feedparser の *_parsed (UTCのstruct_time) をUTCのdatetimeに変換する"""
+    # time.mktime はローカル時刻として解釈してしまうため calendar.timegm を使う
+    return datetime.fromtimestamp(calendar.timegm(parsed), tz=timezone.utc)
+
+
+def _entries_with_feedparser(source):
+    """feedparser でフィードを解析し、高速パーサーと同じ形のエントリーを返す"""
+    feed = feedparser.parse(source)
+    logger.info(f"フィードから{len(feed.entries)}件のエントリーを取得しました。")
+
+    for entry in feed.entries:
+        published_time = None
+        published_parsed = entry.get('published_parsed')
+        updated_parsed = entry.get('updated_parsed')
+
+        if published_parsed:
+            published_time = _struct_time_to_utc(published_parsed)
+        elif updated_parsed:
+            published_time = _struct_time_to_utc(updated_parsed)
+
+        # content の取得を簡略化（デフォルト値を改善）
+        content_list = entry.get('content', [])
+        content_value = content_list[0].get(
+            'value', '') if content_list else ''
+
+        yield {
+            'id': entry.get('link', entry.get('id')),
+            'title': entry.get('title', 'No Title'),
+            'link': entry.get('link', ''),
+            'published_dt': published_time,
+            'summary': entry.get('summary', ''),
+            'content': content_value
+        }
+
+
+def _collect_articles(entries, cursor=None, max_candidates=None, exclude_ids=None):
+    """
+    エントリーを記事データに変換しながら候補を集める
+
+    カーソル位置を通過し、かつ候補が max_candidates 件に達した時点で
+    イテレーションを止める（高速パーサーでは残りのXMLも解析しない）
+    """
     articles = []
+    passed_cursor = cursor is None
+    scanned = 0
 
-    try:
-        feed = feedparser.parse(feed_url)
-        logger.info(f"フィードから{len(feed.entries)}件のエントリーを取得しました。")
-
-        for entry in feed.entries:
-            article_id = entry.get('link', entry.get('id'))
-            if not article_id:
-                title = entry.get('title', 'No Title')
-                logger.warning(f"ID無し記事スキップ: {title[:50]}...")
-                continue
-
-            published_time = None
-            published_parsed = entry.get('published_parsed')
-            updated_parsed = entry.get('updated_parsed')
-
-            if published_parsed:
-                # time.mktime を変数に格納して行長を調整
-                ts = time.mktime(published_parsed)
-                dt_naive = datetime.fromtimestamp(
-                    ts
-                )
-                published_time = dt_naive.replace(tzinfo=timezone.utc)
-            elif updated_parsed:
-                # time.mktime を変数に格納して行長を調整
-                ts = time.mktime(updated_parsed)
-                dt_naive = datetime.fromtimestamp(
-                    ts
-                )
-                published_time = dt_naive.replace(tzinfo=timezone.utc)
+    for entry in entries:
+        scanned += 1
+        article_id = entry['id']
+        if not article_id:
+            title = entry['title'] or 'No Title'
+            logger.warning(f"ID無し記事スキップ: {title[:50]}...")
+            continue
 
-            published_str = published_time.isoformat() if published_time else ""
+        published_time = entry['published_dt']
+        if not passed_cursor:
+            passed_cursor = has_passed_cursor(article_id, published_time, cursor)
 
-            # content の取得を簡略化（デフォルト値を改善）
-            content_list = entry.get('content', [])
-            content_value = content_list[0].get(
-                'value', '') if content_list else ''
+        if exclude_ids is None or article_id not in exclude_ids:
+            published_str = published_time.isoformat() if published_time else ""
 
             article_data = {
                 'id': article_id,
-                'title': entry.get('title', 'No Title'),
-                'link': entry.get('link', ''),
+                'title': entry['title'] or 'No Title',
+                'link': entry['link'],
                 'published': published_str,
-                'summary': entry.get('summary', ''),
-                'content': content_value
+                'summary': entry['summary'],
+                'content': entry['content']
             }
             articles.append(article_data)
 
+        if (passed_cursor and max_candidates is not None
+                and len(articles) >= max_candidates):
+            logger.info(
+                f"カーソルを通過し候補が{max_candidates}件に達したため、"
+                f"{scanned}件目で解析を終了します")
+            break
+
+    return articles
+
+
+def fetch_rss(feed_url, cursor=None, max_candidates=None, exclude_ids=None):
+    """
+    RSSフィードから記事を取得する
+
+    Args:
+        feed_url (str): フィードのURL
+        cursor (dict, optional): フィードのハイウォーターマーク（feed_cursor参照）
+        max_candidates (int, optional): カーソル通過後に集める候補数の上限
+        exclude_ids (set, optional): 候補から除外する記事ID（処理済みIDなど）
+
+    Returns:
+        list: 記事データのリスト
+    """
+    logger.info(f"RSSフィードを取得中: {feed_url}")
+    articles = []
+    options = {
+        'cursor': cursor,
+        'max_candidates': max_candidates,
+        'exclude_ids': exclude_ids
+    }
+
+    try:
+        feed_data = None
+        # カセットの記録・再生時はfeedparserに渡すデータも先に取得する
+        use_cassette = get_cassette() is not None
+        if FAST_FEED_PARSER or use_cassette:
+            try:
+                with profile_stage(STAGE_FETCH):
+                    feed_data = cassette_call(
+                        "feed", feed_url,
+                        lambda: fetch_feed_bytes(feed_url, timeout=FEED_FETCH_TIMEOUT))
+            except Exception as e:
+                if use_cassette:
+                    # feedparserで取得し直すとカセットを通らない（再生中でもネットワークに出る）ため、
+                    # このフィードは取得できなかったものとする
+                    raise
+                logger.warning(f"フィードの直接取得に失敗したためfeedparserで再取得します: {e}")
+
+        # feedparser にURLを渡す場合は取得も解析の段階に含まれる
+        with profile_stage(STAGE_PARSE):
+            if feed_data is not None and not FAST_FEED_PARSER:
+                articles = _collect_articles(
+                    _entries_with_feedparser(feed_data), **options)
+            elif feed_data is not None:
+                try:
+                    articles = _collect_articles(
+                        iter_feed_entries(feed_data), **options)
+                    logger.info("高速パーサーでフィードを解析しました")
+                except (UnsupportedFeedError, ET.ParseError) as e:
+                    logger.info(f"高速パーサー非対応のためfeedparserで解析します: {e}")
+                    articles = _collect_articles(
+                        _entries_with_feedparser(feed_data), **options)
+            else:
+                articles = _collect_articles(
+                    _entries_with_feedparser(feed_url), **options)
+
     except Exception as e:
         logger.error(f"RSSフィードの取得または解析中にエラー: {e}", exc_info=True)
 
@@ -0,0 +1,49 @@
+import hashlib
+import json
+
+from src.config import AI_PROVIDER, AUDIO_RENDITIONS, GEMINI_MODEL, OPENAI_MODEL
+
+
+def _digest(payload):
+    data = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+def summary_fingerprint():
+    """
+    要約の生成条件（プロンプト・プロバイダー・モデル）のフィンガープリント
+
+    Returns:
+    str: 16文字のハッシュ。条件が変わると値が変わる
+    """
+    from src.process_article import SUMMARY_PROMPT_TEMPLATE
+
+    model = GEMINI_MODEL if AI_PROVIDER == "gemini" else OPENAI_MODEL
+    return _digest({
+        "prompt": SUMMARY_PROMPT_TEMPLATE,
+        "provider": AI_PROVIDER,
+        "model": model
+    })
+
+
+def render_fingerprint(full_text, voice_id, renditions=AUDIO_RENDITIONS, previous=None):
+    """
+    音声の生成条件（読み上げテキスト・音声・レンディション）のフィンガープリント
+
+    Parameters:
+    full_text (str): 統合テキスト（イントロ・番組紹介文を含む）
+    voice_id (str): Pollyの音声ID
+    renditions (str): レンディションの設定文字列
+    previous (str, optional): 追加したセグメントの場合、追加先の音声のフィンガープリント
+
+    Returns:
+    str: 16文字のハッシュ
+    """
+    payload = {
+        "text": full_text,
+        "voice_id": voice_id,
+        "renditions": renditions
+    }
+    if previous is not None:
+        payload["previous"] = previous
+    return _digest(payload)
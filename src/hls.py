@@ -0,0 +1,197 @@
+"""
+HLS（HTTP Live Streaming）出力
+
+エピソードのMP3をフレーム境界で一定の長さのセグメントに分割し、
+VOD用のm3u8プレイリストと一緒に保存する。クライアントは最初の
+セグメントを受け取った時点で再生を始められ、CDNはセグメント単位で
+キャッシュできる
+"""
+import hashlib
+import logging
+import math
+import os
+import struct
+
+from src.config import HLS_SEGMENT_DURATION, IS_LAMBDA, S3_BUCKET_NAME
+from src.storage import get_storage
+from src.utils.audio_format import iter_mp3_frames
+from src.utils.id3 import build_tag, private_frame
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+PLAYLIST_FILENAME = "playlist.m3u8"
+PLAYLIST_CONTENT_TYPE = "application/vnd.apple.mpegurl"
+SEGMENT_CONTENT_TYPE = "audio/mpeg"
+
+# セグメントは内容が変わらないため長期間キャッシュさせる（再生成時は内容ハッシュのパスが変わる）
+CACHE_CONTROL_SEGMENT = "public, max-age=31536000, immutable"
+CACHE_CONTROL_PLAYLIST = "public, max-age=3600"
+
+# パックドオーディオのセグメント先頭に必要なタイムスタンプ（90kHzクロック）
+_TIMESTAMP_OWNER = b"com.apple.streaming.transportStreamTimestamp\x00"
+
+
+def timestamp_tag(start_seconds):
+    """
+    セグメントの開始時刻を表すID3 PRIVタグを作る
+
+    HLSのパックドオーディオ（MP3セグメント）は、各セグメントの先頭に
+    33bitのPTSを持つこのタグが必要
+
+    Parameters:
+    start_seconds (float): セグメントの開始時刻（秒）
+
+    Returns:
+    bytes: ID3v2.4タグ
+    """
+    pts = int(round(start_seconds * 90000)) & ((1 << 33) - 1)
+    return build_tag([private_frame(_TIMESTAMP_OWNER, struct.pack(">Q", pts))])
+
+
+def segment_mp3(data, target_duration=HLS_SEGMENT_DURATION):
+    """
+    MP3データをフレーム境界で分割する
+
+    Parameters:
+    data (bytes): MP3データ
+    target_duration (float): セグメントの目標の長さ（秒）
+
+    Returns:
+    list: (セグメントのバイト列, 開始時刻（秒）, 長さ（秒）) のリスト
+    """
+    segments = []
+    start_offset = None
+    segment_start = 0.0
+    segment_duration = 0.0
+    end_offset = 0
+
+    for offset, frame_length, duration in iter_mp3_frames(data):
+        if start_offset is None:
+            start_offset = offset
+        elif segment_duration + duration > target_duration + 1e-6:  # 浮動小数点の誤差を許容
+            segments.append((data[start_offset:offset], segment_start, segment_duration))
+            segment_start += segment_duration
+            start_offset = offset
+            segment_duration = 0.0
+        segment_duration += duration
+        end_offset = offset + frame_length
+
+    if start_offset is not None and end_offset > start_offset:
+        segments.append((data[start_offset:end_offset], segment_start, segment_duration))
+    return segments
+
+
+def build_playlist(segment_names, durations):
+    """
+    VOD用のm3u8プレイリストを作る
+
+    Parameters:
+    segment_names (list): プレイリストからの相対パスで表したセグメント名
+    durations (list): セグメントの長さ（秒）
+
+    Returns:
+    str: プレイリストの内容
+    """
+    target_duration = max(int(math.ceil(d)) for d in durations)
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        f"#EXT-X-TARGETDURATION:{target_duration}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+    ]
+    for name, duration in zip(segment_names, durations):
+        lines.append(f"#EXTINF:{duration:.3f},")
+        lines.append(name)
+    lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+
+def hls_url(key):
+    """保存したキー（ローカルではパス）から配信URLを作る"""
+    if IS_LAMBDA:
+        return f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/{key}"
+    return key
+
+
+def hls_key(url):
+    """hls_url() が返したURLから保存したキー（ローカルではパス）に戻す"""
+    prefix = f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/"
+    if IS_LAMBDA and url.startswith(prefix):
+        return url[len(prefix):]
+    return url
+
+
+def write_hls(data, audio_path, target_duration=HLS_SEGMENT_DURATION, storage=None):
+    """
+    MP3をHLSセグメントとプレイリストに分割して、音声ファイルの隣に保存する
+
+    "audio/2025-01-01.mp3" の場合は "audio/2025-01-01/<内容ハッシュ>/playlist.m3u8" と
+    "audio/2025-01-01/<内容ハッシュ>/segment_00000.mp3" ... に保存する。
+    再レンダリングするとパスが変わるため、CDNに古いセグメントが残っても混ざらない
+
+    Parameters:
+    data (bytes): MP3データ
+    audio_path (str): 音声ファイルのS3キー（ローカルではパス）
+    target_duration (float): セグメントの目標の長さ（秒）
+    storage (Storage, optional): 保存先（省略時は既定のストレージ）
+
+    Returns:
+    dict or None: {"url", "segment_count", "duration"}。分割できなかった場合はNone
+    """
+    storage = storage or get_storage()
+    segments = segment_mp3(data, target_duration)
+    if not segments:
+        logger.warning(f"MP3フレームが見つからないため、HLS出力をスキップします: {audio_path}")
+        return None
+
+    content_hash = hashlib.sha1(data).hexdigest()[:12]
+    hls_dir = f"{os.path.splitext(audio_path)[0]}/{content_hash}"
+    segment_names = []
+    durations = []
+
+    # セグメントはまとめて並列に書き込む
+    batch = storage.batch()
+    for index, (segment, start, duration) in enumerate(segments):
+        name = f"segment_{index:05d}.mp3"
+        batch.put(
+            f"{hls_dir}/{name}", timestamp_tag(start) + segment,
+            content_type=SEGMENT_CONTENT_TYPE, cache_control=CACHE_CONTROL_SEGMENT)
+        segment_names.append(name)
+        durations.append(duration)
+    batch.flush()
+
+    # プレイリストは全セグメントの書き込み後に公開する
+    playlist_key = f"{hls_dir}/{PLAYLIST_FILENAME}"
+    storage.put(
+        playlist_key, build_playlist(segment_names, durations).encode("utf-8"),
+        content_type=PLAYLIST_CONTENT_TYPE, cache_control=CACHE_CONTROL_PLAYLIST)
+
+    total_duration = sum(durations)
+    logger.info(f"HLSを出力しました: {playlist_key}（{len(segments)}セグメント, {total_duration:.1f}秒）")
+    return {
+        "url": hls_url(playlist_key),
+        "segment_count": len(segments),
+        "duration": round(total_duration, 3)
+    }
+
+
+def delete_hls(hls, storage=None):
+    """
+    write_hls() で保存したプレイリストとセグメントを削除する
+
+    セグメントの追加や再レンダリングで内容ハッシュのパスが変わった後に、
+    古い出力を消すために使う
+
+    Parameters:
+    hls (dict): write_hls() の結果
+    storage (Storage, optional): 保存先（省略時は既定のストレージ）
+    """
+    storage = storage or get_storage()
+    playlist_key = hls_key(hls["url"])
+    hls_dir = playlist_key.rsplit("/", 1)[0]
+    for index in range(hls["segment_count"]):
+        storage.delete(f"{hls_dir}/segment_{index:05d}.mp3")
+    storage.delete(playlist_key)
+    logger.info(f"古いHLS出力を削除しました: {hls_dir}（{hls['segment_count']}セグメント）")
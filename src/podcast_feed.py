@@ -0,0 +1,210 @@
+"""
+ポッドキャスト用RSSフィード（RSS 2.0 + iTunes拡張）
+
+エピソードを公開するたびに、既存のフィードXMLへ新しい <item> だけを
+差し込んで保存する（全エピソードからの再生成は初回のみ）。
+ETag付きの条件付き書き込みと Cache-Control により、ポッドキャストアプリは
+S3やCDNから安価にポーリングできる
+"""
+import datetime
+import email.utils
+import logging
+import re
+from xml.sax.saxutils import escape, quoteattr
+
+from src.episode_store import data_key, load_episode
+from src.storage import get_storage
+from src.config import (
+    PODCAST_AUTHOR,
+    PODCAST_IMAGE_URL,
+    PODCAST_MAX_ITEMS,
+    PODCAST_SITE_URL
+)
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+PODCAST_FEED_FILENAME = "podcast.xml"
+PODCAST_CONTENT_TYPE = "application/rss+xml; charset=utf-8"
+CACHE_CONTROL_PODCAST = "public, max-age=300"
+
+_ITEM_START = "<item>"
+_ITEM_END = "</item>"
+_CHANNEL_END = "</channel>"
+_LAST_BUILD_DATE = re.compile(r"<lastBuildDate>[^<]*</lastBuildDate>")
+
+
+def _rfc2822(value):
+    """作成日時（ISO形式またはYYYY-MM-DD HH:MM:SS）をRFC 2822形式にする"""
+    try:
+        dt = datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        dt = datetime.datetime.now()
+    if dt.tzinfo is None:
+        # 作成日時は実行環境のローカル時刻で記録されている
+        dt = dt.astimezone()
+    return email.utils.format_datetime(dt)
+
+
+def _duration(episode):
+    """itunes:duration（HH:MM:SS）を返す。長さが分からなければNone"""
+    renditions = episode.get("renditions") or []
+    seconds = renditions[0].get("duration") if renditions else None
+    if not seconds:
+        return None
+    seconds = int(round(seconds))
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def episode_guid(program, episode):
+    """エピソードのGUID（番組内で一意）"""
+    return f"{program['id']}:{episode['episode_id']}"
+
+
+def build_item(program, episode):
+    """
+    エピソードの <item> 要素を作る
+
+    Parameters:
+    program (dict): 番組定義
+    episode (dict): 保存済みのエピソード
+
+    Returns:
+    str: <item> 要素のXML
+    """
+    renditions = episode.get("renditions") or []
+    primary = renditions[0] if renditions else {}
+    description = "\n".join(f"・{a['title']}" for a in episode.get("articles", []))
+
+    lines = [
+        _ITEM_START,
+        f"<title>{escape(episode['title'])}</title>",
+        f'<guid isPermaLink="false">{escape(episode_guid(program, episode))}</guid>',
+        f"<pubDate>{_rfc2822(episode.get('created_at'))}</pubDate>",
+        f"<description>{escape(description)}</description>",
+        f"<enclosure url={quoteattr(episode['audio_url'])} "
+        f"length=\"{primary.get('size', 0)}\" "
+        f"type={quoteattr(primary.get('content_type', 'audio/mpeg'))}/>",
+    ]
+    duration = _duration(episode)
+    if duration:
+        lines.append(f"<itunes:duration>{duration}</itunes:duration>")
+    lines.append("<itunes:explicit>false</itunes:explicit>")
+    lines.append(_ITEM_END)
+    return "".join(lines)
+
+
+def build_feed(program, items):
+    """
+    チャンネル情報と <item> のリストからフィード全体を作る
+
+    Parameters:
+    program (dict): 番組定義
+    items (list): build_item() の結果（新しい順）
+
+    Returns:
+    str: フィードのXML
+    """
+    now = email.utils.format_datetime(datetime.datetime.now(datetime.timezone.utc))
+    header = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        '<rss version="2.0" xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd">',
+        "<channel>",
+        f"<title>{escape(program['name'])}</title>",
+        f"<link>{escape(PODCAST_SITE_URL)}</link>",
+        f"<description>{escape(program['description'])}</description>",
+        "<language>ja</language>",
+        f"<lastBuildDate>{now}</lastBuildDate>",
+        f"<itunes:author>{escape(PODCAST_AUTHOR)}</itunes:author>",
+        '<itunes:category text="Technology"/>',
+        "<itunes:explicit>false</itunes:explicit>",
+    ]
+    if PODCAST_IMAGE_URL:
+        header.append(f"<itunes:image href={quoteattr(PODCAST_IMAGE_URL)}/>")
+    return "".join(header) + "\n" + "\n".join(items) + "\n</channel></rss>\n"
+
+
+def splice_item(feed_xml, guid, item_xml, max_items=PODCAST_MAX_ITEMS):
+    """
+    既存のフィードに <item> を差し込む（同じGUIDの項目があれば置き換える）
+
+    フィードは build_feed() が作ったもので、<item> は新しい順に並んでいる前提
+
+    Parameters:
+    feed_xml (str): 既存のフィード
+    guid (str): 差し込むエピソードのGUID
+    item_xml (str): build_item() の結果
+    max_items (int): フィードに残す項目数（古いものから削除する）
+
+    Returns:
+    str: 更新後のフィード
+    """
+    guid_pos = feed_xml.find(f'<guid isPermaLink="false">{escape(guid)}</guid>')
+    if guid_pos >= 0:
+        # 再レンダリングなどで既存のエピソードが更新された場合は置き換える
+        start = feed_xml.rfind(_ITEM_START, 0, guid_pos)
+        end = feed_xml.find(_ITEM_END, guid_pos) + len(_ITEM_END)
+        feed_xml = feed_xml[:start] + item_xml + feed_xml[end:]
+    else:
+        first_item = feed_xml.find(_ITEM_START)
+        insert_at = first_item if first_item >= 0 else feed_xml.rfind(_CHANNEL_END)
+        separator = "\n" if first_item >= 0 else ""
+        feed_xml = feed_xml[:insert_at] + item_xml + separator + feed_xml[insert_at:]
+
+    # 上限を超えた古い項目を末尾から削除する
+    while feed_xml.count(_ITEM_START) > max_items:
+        start = feed_xml.rfind(_ITEM_START)
+        end = feed_xml.find(_ITEM_END, start) + len(_ITEM_END)
+        feed_xml = feed_xml[:start].rstrip("\n") + feed_xml[end:]
+
+    now = email.utils.format_datetime(datetime.datetime.now(datetime.timezone.utc))
+    return _LAST_BUILD_DATE.sub(f"<lastBuildDate>{now}</lastBuildDate>", feed_xml, count=1)
+
+
+def _initial_items(program, storage):
+    """フィードが無い場合に、保存済みのエピソードから <item> を作る（初回のみ）"""
+    prefix = program["output_prefix"]
+    episodes_list = storage.get_json(data_key("episodes_list.json", prefix)) or []
+    items = []
+    for summary in episodes_list[:PODCAST_MAX_ITEMS]:
+        episode = load_episode(summary["episode_id"], prefix, storage)
+        if episode and episode.get("audio_url"):
+            items.append(build_item(program, episode))
+    logger.info(f"[{program['id']}] 保存済みの{len(items)}エピソードからフィードを作成します")
+    return items
+
+
+def update_podcast_feed(program, episode, storage=None):
+    """
+    新しく公開したエピソードをポッドキャストフィードに反映する
+
+    Parameters:
+    program (dict): 番組定義
+    episode (dict): 公開したエピソード（audio_url が無い場合は何もしない）
+    storage (Storage, optional): 保存先（省略時は既定のストレージ）
+
+    Returns:
+    str or None: フィードのキー
+    """
+    if not episode.get("audio_url"):
+        return None
+
+    storage = storage or get_storage()
+    key = data_key(PODCAST_FEED_FILENAME, program["output_prefix"])
+    guid = episode_guid(program, episode)
+    item_xml = build_item(program, episode)
+
+    def _update(data):
+        if data is None:
+            items = [item for item in _initial_items(program, storage)
+                     if f">{escape(guid)}</guid>" not in item]
+            feed_xml = build_feed(program, items)
+        else:
+            feed_xml = data.decode("utf-8")
+        feed_xml = splice_item(feed_xml, guid, item_xml)
+        return feed_xml.encode("utf-8"), None, None
+
+    storage.update(key, _update, content_type=PODCAST_CONTENT_TYPE,
+                   cache_control=CACHE_CONTROL_PODCAST)
+    logger.info(f"[{program['id']}] ポッドキャストフィードを更新しました: {key}")
+    return key
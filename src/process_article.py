@@ -2,6 +2,16 @@
 import logging
 import openai
 import google.generativeai as genai
+from src.cassette import cassette_call, is_replaying
+from src.utils.trace import span, traced
+from src.utils.cost import (
+    EXPECTED_OUTPUT_TOKENS,
+    BudgetExceededError,
+    estimate_tokens,
+    llm_cost,
+    record_llm_usage,
+    require_budget
+)
 from src.utils import create_article_id
 from src.config import (
     OPENAI_API_KEY,
@@ -9,8 +19,10 @@ from src.config import (
     GEMINI_MODEL,
     OPENAI_MODEL,  # OpenAIモデル設定をインポート
     AI_PROVIDER,
-    SUMMARY_MAX_LENGTH
+    SUMMARY_MAX_LENGTH,
+    TRANSLATION_BATCH_CHARS
 )
+import json
 import re
 
 # ロギング設定
@@ -46,6 +58,105 @@ URL: {article_url}
 
 MAX_RETRIES = 3
 
+SUMMARY_SYSTEM_PROMPT = (
+    "あなたはITニュースを音声で聞きやすく要約する専門家です。"
+    "技術的な内容を正確に、わかりやすく伝えることを心がけてください。"
+)
+TRANSLATION_SYSTEM_PROMPT = "You are an expert translator specializing in technical content."
+
+# 英語版エピソード用のまとめ翻訳（1回の呼び出しで複数の記事を翻訳する）
+BATCH_TRANSLATION_PROMPT = """
+Translate the title and summary of each Japanese tech news item below into natural English
+that is easy to listen to in a podcast. Keep technical terms and product names accurate.
+Return only a JSON array with one object per item, in the same order, in the form
+{"index": <the item's index>, "title": "<English title>", "summary": "<English summary>"}.
+
+Items:
+"""
+
+
+def _record_llm(model, usage, input_tokens, text):
+    """実際の使用量（応答に無い場合は見積もり）を料金として記録する"""
+    if usage:
+        record_llm_usage(model, usage["input"], usage["output"])
+    else:
+        record_llm_usage(model, input_tokens, estimate_tokens(text), estimated=True)
+
+
+def _openai_complete(system_prompt, prompt):
+    """
+    OpenAIのチャット補完を呼び出し、応答テキストを返す
+
+    カセット（src.cassette）が有効な場合は応答を記録・再生する。
+    呼び出し前に料金を見積もって予算を確認し、呼び出し後に使用量を記録する
+
+    Raises:
+    BudgetExceededError: 見積もりが予算の残りを超える場合
+    """
+    usage = {}
+
+    def _call():
+        response = openai_client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=2000
+        )
+        if response.usage:
+            usage.update(input=response.usage.prompt_tokens,
+                         output=response.usage.completion_tokens)
+        return response.choices[0].message.content
+
+    input_tokens = estimate_tokens(system_prompt) + estimate_tokens(prompt)
+    require_budget(llm_cost(OPENAI_MODEL, input_tokens, EXPECTED_OUTPUT_TOKENS), "llm.openai")
+
+    request = {"provider": "openai", "model": OPENAI_MODEL,
+               "system": system_prompt, "prompt": prompt}
+    with span("llm.openai", "llm", model=OPENAI_MODEL, prompt_chars=len(prompt)):
+        text = cassette_call("llm", request, _call)
+    _record_llm(OPENAI_MODEL, usage, input_tokens, text)
+    return text
+
+
+def _gemini_generate(prompt):
+    """
+    Geminiでテキストを生成し、応答テキストを返す
+
+    カセット（src.cassette）が有効な場合は応答を記録・再生する。
+    呼び出し前に料金を見積もって予算を確認し、呼び出し後に使用量を記録する
+
+    Raises:
+    BudgetExceededError: 見積もりが予算の残りを超える場合
+    """
+    usage = {}
+
+    def _call():
+        model = genai.GenerativeModel(GEMINI_MODEL)
+        response = model.generate_content(prompt)
+        metadata = getattr(response, "usage_metadata", None)
+        if metadata:
+            usage.update(input=metadata.prompt_token_count,
+                         output=metadata.candidates_token_count)
+        return response.text
+
+    input_tokens = estimate_tokens(prompt)
+    require_budget(llm_cost(GEMINI_MODEL, input_tokens, EXPECTED_OUTPUT_TOKENS), "llm.gemini")
+
+    request = {"provider": "gemini", "model": GEMINI_MODEL, "prompt": prompt}
+    with span("llm.gemini", "llm", model=GEMINI_MODEL, prompt_chars=len(prompt)):
+        text = cassette_call("llm", request, _call)
+    _record_llm(GEMINI_MODEL, usage, input_tokens, text)
+    return text
+
+
+def _provider_available(provider):
+    """プロバイダーのAPIキーがあるか（カセットの再生中はAPIキーなしで呼び出せる）"""
+    if is_replaying():
+        return True
+    return bool(GOOGLE_API_KEY if provider == 'gemini' else OPENAI_API_KEY)
+
 
 def summarize_article(article_url, article_title, article_content):
     """
@@ -53,14 +164,14 @@ def summarize_article(article_url, article_title, article_content):
     """
     logger.info(f"要約開始: {article_title[:30]}...")
 
-    if AI_PROVIDER == 'gemini' and GOOGLE_API_KEY:
+    if AI_PROVIDER == 'gemini' and _provider_available('gemini'):
         logger.info("AI Provider: Gemini (Google API Key found)")
         return summarize_with_gemini(
             article_url,
             article_title,
             article_content
         )
-    elif AI_PROVIDER == 'openai' and OPENAI_API_KEY:
+    elif AI_PROVIDER == 'openai' and _provider_available('openai'):
         logger.info("AI Provider: OpenAI (OpenAI API Key found)")
         return summarize_with_openai(
             article_url,
@@ -100,24 +211,12 @@ def summarize_with_openai(article_url, article_title, article_content):
     )
 
     try:
-        response = openai_client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "あなたはITニュースを音声で聞きやすく要約する専門家です。"
-                        "技術的な内容を正確に、わかりやすく伝えることを心がけてください。"
-                    ),
-                },
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=2000
-        )
-
-        summary = response.choices[0].message.content.strip()
+        summary = _openai_complete(SUMMARY_SYSTEM_PROMPT, prompt).strip()
         logger.info(f"OpenAI 要約完了: {len(summary)}文字")
         return summary
+    except BudgetExceededError:
+        # 予算切れは記事の要約の失敗ではないため、呼び出し元で要約を打ち切る
+        raise
     except Exception as e:
         logger.error(f"OpenAI 要約中にエラー: {str(e)}")
         return f"要約エラー: Error code: {type(e).__name__} - {str(e)}"
@@ -137,15 +236,15 @@ def summarize_with_gemini(article_url, article_title, article_content):
     )
 
     try:
-        model = genai.GenerativeModel(GEMINI_MODEL)
-        response = model.generate_content(prompt)
-
-        summary = response.text.strip()
+        summary = _gemini_generate(prompt).strip()
         marker = "この記事は"
         if marker in summary:
             summary = summary[summary.index(marker):].strip()
         logger.info(f"Gemini 要約完了: {len(summary)}文字")
         return summary
+    except BudgetExceededError:
+        # 予算切れは記事の要約の失敗ではないため、呼び出し元で要約を打ち切る
+        raise
     except Exception as e:
         logger.error(f"Gemini 要約中にエラー: {str(e)}")
         return f"要約エラー: Error code: {type(e).__name__} - {str(e)}"
@@ -157,10 +256,10 @@ def translate_text(english_text):
     """
     logger.info("翻訳開始")
 
-    if AI_PROVIDER == 'gemini' and GOOGLE_API_KEY:
+    if AI_PROVIDER == 'gemini' and _provider_available('gemini'):
         logger.info("AI Provider for Translation: Gemini")
         return translate_with_gemini(english_text)
-    elif AI_PROVIDER == 'openai' and OPENAI_API_KEY:
+    elif AI_PROVIDER == 'openai' and _provider_available('openai'):
         logger.info("AI Provider for Translation: OpenAI")
         return translate_with_openai(english_text)
     else:
@@ -197,22 +296,7 @@ def translate_with_openai(english_text):
     """
 
     try:
-        response = openai_client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an expert translator specializing in "
-                        "technical content."
-                    ),
-                },
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=2000
-        )
-
-        translation = response.choices[0].message.content.strip()
+        translation = _openai_complete(TRANSLATION_SYSTEM_PROMPT, prompt).strip()
         logger.info(f"OpenAI 翻訳完了: {len(translation)}文字")
         return translation
     except Exception as e:
@@ -235,10 +319,7 @@ def translate_with_gemini(english_text):
     """
 
     try:
-        model = genai.GenerativeModel(GEMINI_MODEL)
-        response = model.generate_content(prompt)
-
-        translation = response.text.strip()
+        translation = _gemini_generate(prompt).strip()
         logger.info(f"Gemini 翻訳完了: {len(translation)}文字")
         return translation
     except Exception as e:
@@ -246,9 +327,90 @@ def translate_with_gemini(english_text):
         return f"翻訳エラー: Error code: {type(e).__name__} - {str(e)}"
 
 
+def _translation_batches(items, max_chars):
+    """(番号, タイトル, 要約) を1回の翻訳に収まる文字数ごとにまとめる（1件は必ず1回に含める）"""
+    batches = []
+    batch = []
+    batch_chars = 0
+    for item in items:
+        item_chars = len(item[1]) + len(item[2])
+        if batch and batch_chars + item_chars > max_chars:
+            batches.append(batch)
+            batch = []
+            batch_chars = 0
+        batch.append(item)
+        batch_chars += item_chars
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _parse_translations(text):
+    """まとめ翻訳の応答（JSON配列、コードブロックで囲まれていてもよい）を {番号: 翻訳} にする"""
+    start = text.find("[")
+    end = text.rfind("]")
+    if start < 0 or end < start:
+        raise ValueError("応答にJSON配列がありません")
+    translations = {}
+    for entry in json.loads(text[start:end + 1]):
+        title = (entry.get("title") or "").strip()
+        summary = (entry.get("summary") or "").strip()
+        if summary:
+            translations[int(entry["index"])] = {"title": title, "summary": summary}
+    return translations
+
+
+def translate_articles_to_english(articles, max_chars=TRANSLATION_BATCH_CHARS):
+    """
+    記事のタイトルと要約をまとめて英語に翻訳する（英語版エピソード用）
+
+    1件ずつではなく max_chars 文字までの記事を1回のLLM呼び出しで翻訳するため、
+    通常のエピソード（5件程度）は1回の呼び出しで済む
+
+    Parameters:
+    articles (list): title と summary を持つ記事のリスト
+    max_chars (int): 1回の呼び出しに含める最大文字数
+
+    Returns:
+    list: articles と同じ順の {"title", "summary"}（翻訳できなかった記事はNone）
+    """
+    results = [None] * len(articles)
+    if not articles:
+        return results
+    if AI_PROVIDER not in ('gemini', 'openai') or not _provider_available(AI_PROVIDER):
+        logger.error(f"AI_PROVIDER '{AI_PROVIDER}' のAPIキーが無いため英訳できません")
+        return results
+
+    items = [(i, article["title"], article["summary"]) for i, article in enumerate(articles)]
+    batches = _translation_batches(items, max_chars)
+    logger.info(f"{len(articles)}件の記事を{len(batches)}回の呼び出しで英訳します")
+
+    for batch in batches:
+        prompt = BATCH_TRANSLATION_PROMPT + json.dumps(
+            [{"index": i, "title": title, "summary": summary} for i, title, summary in batch],
+            ensure_ascii=False, indent=1)
+        try:
+            if AI_PROVIDER == 'gemini':
+                response = _gemini_generate(prompt)
+            else:
+                response = _openai_complete(TRANSLATION_SYSTEM_PROMPT, prompt)
+            translations = _parse_translations(response)
+        except Exception as e:
+            logger.error(f"まとめ翻訳中にエラー（{len(batch)}件）: {type(e).__name__} - {str(e)}")
+            continue
+        for i, _, _ in batch:
+            results[i] = translations.get(i)
+
+    logger.info(f"英訳完了: {sum(r is not None for r in results)}/{len(articles)}件")
+    return results
+
+
+@traced("process_article", "article")
 def process_article(article):
     """
     記事を要約する
+
+    要約の失敗は summary のエラー文で返し、予算切れ（BudgetExceededError）はそのまま送出する
     """
     logger.info(f"記事処理開始: {article['title'][:30]}...")
 
@@ -293,7 +455,7 @@ def process_article(article):
         # 記事情報を更新
         article["summary"] = summary
 
-        # APIリソース消費を削減するため英語関連の処理を完全に省略
+        # 英語の要約は記事ごとには作らない（英語版は公開時に選ばれた記事だけをまとめて翻訳する）
         article["english_summary"] = "Not generated"
         article["english_audio_url"] = None
 
@@ -302,6 +464,8 @@ def process_article(article):
 
         logger.info(f"記事処理完了: {article['title'][:30]}...（ID: {article_id}）")
         return article
+    except BudgetExceededError:
+        raise
     except Exception as e:
         logger.error(f"記事処理中にエラー: {str(e)}")
         # 基本情報だけでも記事を返す
@@ -312,8 +476,6 @@ def process_article(article):
 
 # テスト実行用
 if __name__ == "__main__":
-    import json
-
     # ロギング設定
     logging.basicConfig(
         level=logging.INFO,
@@ -0,0 +1,555 @@
+import argparse
+import datetime
+import logging
+import os
+from collections import Counter
+
+from src.article_filter import filter_articles
+from src.dead_letter import (
+    due_dead_letters,
+    is_failed_summary,
+    load_dead_letters,
+    save_dead_letters,
+    update_dead_letters
+)
+from src.fetch_rss import fetch_rss
+from src.feed_cursor import (
+    load_feed_cursors,
+    save_feed_cursors,
+    advance_feed_cursors,
+    oldest_cursor
+)
+from src.process_article import process_article
+from src.article_selector import article_priority, select_articles
+from src.episode_publisher import publish_episode
+from src.episode_store import load_processed_ids, save_processed_ids
+from src.programs import default_program, load_programs, matches_program
+from src.storage import get_storage
+from src.utils import collapse_near_duplicates
+from src.utils.deadline import STAGE_PUBLISH, STAGE_SUMMARY, Deadline
+from src.utils.trace import save_trace, span, start_trace, stop_trace, traced
+from src.utils.cost import (
+    BudgetExceededError,
+    estimate_episode_cost,
+    estimate_run_cost,
+    estimate_summary_cost,
+    get_cost_tracker,
+    start_cost_tracking,
+    stop_cost_tracking
+)
+from src.utils.memory_profile import (
+    STAGE_SUMMARIZE,
+    STAGE_UPLOAD,
+    profile_stage,
+    save_memory_report,
+    start_memory_profile,
+    stop_memory_profile
+)
+from src.config import (
+    AUDIO_DIR,
+    BUDGET_REDUCED_INPUT_CHARS,
+    FEED_CANDIDATE_MULTIPLIER,
+    NEAR_DUPLICATE_DETECTION,
+    NEAR_DUPLICATE_MAX_DISTANCE
+)
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+
+def fetch_program_feeds(programs, states):
+    """
+    全番組のフィードをURL単位で1回だけ取得する
+
+    複数番組で共有するフィードは、最も古いカーソル・最大の候補数・
+    全番組で処理済みのIDだけを除外条件として取得する。
+    カーソルでの打ち切りは新しい順のフィード（date_ordered_feeds）だけに使い、
+    キーワードで絞り込む番組が使うフィードは、合致する記事を取りこぼさないよう全体を解析する
+
+    Parameters:
+    programs (list): 番組定義のリスト
+    states (dict): {番組ID: {"processed_ids": set, "cursors": dict}}
+
+    Returns:
+    dict: {フィードURL: 記事のリスト}
+    """
+    feed_users = {}
+    for program in programs:
+        for source_id, feed_url in program["feeds"].items():
+            feed_users.setdefault(feed_url, []).append((program, source_id))
+
+    fetched = {}
+    for feed_url, users in feed_users.items():
+        logger.info(f"{', '.join(sid for _, sid in users)}からフィードを取得します...")
+        try:
+            cursor = None
+            max_candidates = None
+            # 人気順のフィードはカーソル以前の記事も上位に来る。また候補数は番組の
+            # キーワードやフィルターで絞り込む前に数えるため、どちらも打ち切らない
+            date_ordered = all(sid in p.get("date_ordered_feeds", ()) for p, sid in users)
+            if date_ordered and not any(p.get("keywords") for p, _ in users):
+                cursor = oldest_cursor(
+                    [states[p["id"]]["cursors"].get(sid) for p, sid in users])
+                max_candidates = max(
+                    p["max_articles_per_feed"] for p, _ in users) * FEED_CANDIDATE_MULTIPLIER
+            exclude_ids = set.intersection(
+                *[states[p["id"]]["processed_ids"] for p, _ in users])
+
+            # カーソル以降の新着と必要数の候補だけを解析する
+            with span("fetch_rss", "feed", url=feed_url):
+                fetched[feed_url] = fetch_rss(
+                    feed_url,
+                    cursor=cursor,
+                    max_candidates=max_candidates,
+                    exclude_ids=exclude_ids
+                )
+        except Exception as e:
+            logger.error(f"{feed_url} 取得エラー: {str(e)}", exc_info=True)
+            fetched[feed_url] = []
+    return fetched
+
+
+def summarize_with_cache(article, summary_cache):
+    """
+    実行内キャッシュを使って記事を要約する（同じURLの記事は1回だけ要約する）
+
+    要約に失敗した結果はキャッシュしない（他の番組では要約し直す）
+
+    Parameters:
+    article (dict): 選択された記事
+    summary_cache (dict): {記事URL: 処理済み記事}
+
+    Returns:
+    dict: 処理済み記事（キャッシュとは別のコピー）
+    """
+    cache_key = article["link"]
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"要約キャッシュを使用: {article['title'][:30]}...")
+        processed = dict(cached)
+        processed["source_id"] = article.get("source_id")
+        return processed
+
+    with profile_stage(STAGE_SUMMARIZE):
+        processed = process_article(article)
+    if not is_failed_summary(processed):
+        summary_cache[cache_key] = dict(processed)
+    return processed
+
+
+def fit_article_to_budget(program, article, cost_tracker, pending_episodes):
+    """
+    予算の残りに収まるよう記事の要約を調整する
+
+    この後のエピソードの音声合成の料金を残して、全文で要約できなければ
+    本文を BUDGET_REDUCED_INPUT_CHARS 文字に短くして要約する
+
+    Parameters:
+    program (dict): 番組定義
+    article (dict): 選択された記事
+    cost_tracker (CostTracker): 実行中のトラッカー
+    pending_episodes (int): この後に音声合成するエピソード数
+
+    Returns:
+    tuple: (要約する記事, 予算に収まるか)
+    """
+    reserve = estimate_episode_cost() * pending_episodes
+    if cost_tracker.can_afford(estimate_summary_cost(article), reserve):
+        return article, True
+    if not cost_tracker.can_afford(
+            estimate_summary_cost(article, BUDGET_REDUCED_INPUT_CHARS), reserve):
+        return article, False
+    logger.info(f"[{program['id']}] 予算の残りが少ないため、本文を短くして要約します: "
+                f"{article['title'][:30]}...")
+    return dict(article, summary=article["summary"][:BUDGET_REDUCED_INPUT_CHARS]), True
+
+
+def select_program_articles(program, fetched, processed_ids):
+    """
+    取得済みフィードから番組の未処理記事を選択する（要約はしない）
+
+    フィルタールールに当てはまる記事を除き、近似重複をまとめてから
+    フィードごとの最大記事数で選択する
+
+    Parameters:
+    program (dict): 番組定義
+    fetched (dict): fetch_program_feeds() の結果
+    processed_ids (set): 処理済みの記事ID
+
+    Returns:
+    tuple: (選択した記事のリスト, 近似重複としてまとめた (重複記事, 残した記事) のリスト)
+    """
+    all_articles = []
+    filter_hits = Counter()
+
+    for source_id, feed_url in program["feeds"].items():
+        # 処理済み記事とフィルタールールに当てはまる記事を除外し、ソース情報を追加
+        unprocessed = [a for a in fetched.get(feed_url, []) if a['id'] not in processed_ids]
+        kept, hits = filter_articles(unprocessed)
+        filter_hits.update(hits)
+        added_count = 0
+        for fetched_article in kept:
+            if not matches_program(fetched_article, program):
+                continue
+
+            # 取得結果は番組間で共有しているため、コピーして使う
+            article = dict(fetched_article)
+            article["source_id"] = source_id
+            all_articles.append(article)
+            added_count += 1
+
+        logger.info(f"[{program['id']}] {source_id}: {added_count}件の未処理記事を追加")
+
+    if filter_hits:
+        logger.info(f"[{program['id']}] フィルタールールで除外した記事: " + ", ".join(
+            f"{name}={count}" for name, count in filter_hits.most_common()))
+
+    # フィードをまたいだ近似重複記事をLLM呼び出し前にまとめる
+    duplicates = []
+    if NEAR_DUPLICATE_DETECTION and all_articles:
+        feed_order = list(program["feeds"])
+        all_articles, duplicates = collapse_near_duplicates(
+            all_articles,
+            max_distance=NEAR_DUPLICATE_MAX_DISTANCE,
+            priority_key=lambda a: article_priority(a, feed_order)
+        )
+
+    # 各サイトから最大記事数を制限
+    selected_articles = select_articles(
+        all_articles, len(program["feeds"]), program["max_articles_per_feed"])
+    return selected_articles, duplicates
+
+
+@traced("collect_program_articles", "program")
+def collect_program_articles(program, fetched, summary_cache, state, storage=None,
+                             deadline=None, pending_episodes=1):
+    """
+    取得済みフィードから1番組分の記事を選択・要約し、処理済みIDとカーソルを保存する
+
+    残り時間または予算が少なくなったら新しい要約を始めず、要約できた記事だけを返す。
+    要約しなかった記事は処理済みにせず、カーソルも進めない（次回の実行で処理する）
+
+    要約に失敗した記事はエピソードに含めず、再試行待ち（dead_letters.json）に入れる。
+    再試行の時刻になった記事は、フィードから選択した記事より先に要約し直す
+
+    Parameters:
+    program (dict): 番組定義
+    fetched (dict): fetch_program_feeds() の結果
+    summary_cache (dict): 番組間で共有する要約キャッシュ
+    state (dict): 番組の処理済みID・カーソル・再試行待ちの記事
+    storage (Storage, optional): 保存先（実行全体の書き込みバッチなど）
+    deadline (Deadline, optional): 実行の残り時間（省略時は期限なし）
+    pending_episodes (int): この後に音声合成・公開するエピソード数（その時間を残しておく）
+
+    Returns:
+    list: 処理済み記事のリスト
+    """
+    deadline = deadline or Deadline()
+    prefix = program["output_prefix"]
+    processed_ids = state["processed_ids"]
+    feed_cursors = state["cursors"]
+    updated_cursors = feed_cursors
+    dead_letters = state.get("dead_letters", {})
+
+    processed_articles = []
+    newly_processed_ids = set()
+    cost_tracker = get_cost_tracker()
+    failed_articles = []
+    recovered_ids = set()
+
+    try:
+        # 再試行待ちの記事はフィードから選び直さない
+        selected_articles, duplicates = select_program_articles(
+            program, fetched, processed_ids | set(dead_letters))
+        # 処理済みIDを記録
+        newly_processed_ids.update(a['id'] for a in selected_articles)
+
+        # 残した記事が選択された重複記事は、次回以降も処理済みとして扱う
+        for duplicate, kept in duplicates:
+            if kept['id'] in newly_processed_ids:
+                newly_processed_ids.add(duplicate['id'])
+
+        # 選択した記事でフィードごとのカーソルを前進させる
+        # （process_article が記事IDをハッシュに書き換えるため、要約前のIDを残しておく）
+        cursor_entries = [
+            {"source_id": a.get("source_id"), "id": a["id"], "published": a.get("published")}
+            for a in selected_articles
+        ]
+        updated_cursors = advance_feed_cursors(feed_cursors, cursor_entries)
+
+        # 再試行の時刻になった記事を先に要約する
+        retry_articles = due_dead_letters(dead_letters)
+        retry_ids = {a['id'] for a in retry_articles}
+        if retry_articles:
+            logger.info(f"[{program['id']}] 要約に失敗した{len(retry_articles)}件の記事を再試行します")
+        summary_targets = retry_articles + selected_articles
+
+        logger.info(f"[{program['id']}] 合計{len(summary_targets)}件の記事を処理対象としました")
+
+        # 選択された記事を処理 (enumerate でインデックスを取得)
+        skipped_articles = []
+        for idx, article in enumerate(summary_targets):
+            # 音声合成・公開の時間を残せない場合は、残りの記事を次回に回す
+            if not deadline.can_start(STAGE_SUMMARY, deadline.reserve_for(pending_episodes)):
+                skipped_articles = summary_targets[idx:]
+                logger.warning(f"[{program['id']}] 残り時間が少ないため、"
+                               f"{len(skipped_articles)}件の記事の要約を次回に回します")
+                break
+            # 予算の残りで要約できない場合は本文を短くし、それでも足りなければ次回に回す
+            if cost_tracker is not None:
+                article, affordable = fit_article_to_budget(
+                    program, article, cost_tracker, pending_episodes)
+                if not affordable:
+                    skipped_articles = summary_targets[idx:]
+                    logger.warning(f"[{program['id']}] 予算の残りが少ないため、"
+                                   f"{len(skipped_articles)}件の記事の要約を次回に回します")
+                    break
+            # process_article は記事を書き換えるため、再試行用に選択時の記事を残しておく
+            queued = dict(article)
+            try:
+                # 記事処理（要約など）のみ実行
+                with deadline.stage(STAGE_SUMMARY):
+                    processed = summarize_with_cache(article, summary_cache)
+
+                # 要約に失敗した記事はエピソードに含めない（エラー文を読み上げない）
+                if is_failed_summary(processed):
+                    failed_articles.append((queued, processed["summary"]))
+                    logger.warning(f"記事「{queued['title']}」の要約に失敗したため、再試行待ちにします")
+                    continue
+
+                processed_articles.append(processed)
+                if queued['id'] in retry_ids:
+                    recovered_ids.add(queued['id'])
+                logger.info(
+                    f"記事 {idx+1}/{len(summary_targets)} を処理: {processed['title']}")
+
+            except BudgetExceededError as e:
+                # 予算切れは記事の失敗として数えず、残りの記事を次回に回す
+                skipped_articles = summary_targets[idx:]
+                logger.warning(f"[{program['id']}] {e}。{len(skipped_articles)}件の記事の要約を次回に回します")
+                break
+            except Exception as e:
+                logger.error(
+                    f"記事「{article['title']}」の処理中にエラー: {str(e)}", exc_info=True)
+                failed_articles.append((queued, f"記事処理エラー: {str(e)}"))
+
+        # 要約に失敗した記事は処理済みにせず、再試行で要約できた記事は処理済みにする
+        newly_processed_ids -= {article['id'] for article, _ in failed_articles}
+        newly_processed_ids |= recovered_ids
+
+        # 再試行待ちの記事は要約しなくても再試行待ちのまま残る
+        skipped_articles = [a for a in skipped_articles if a['id'] not in retry_ids]
+        if skipped_articles:
+            # 要約しなかった記事（とそれにまとめた重複記事）は処理済みにしない
+            skipped_ids = {a['id'] for a in skipped_articles}
+            newly_processed_ids -= skipped_ids
+            newly_processed_ids -= {
+                duplicate['id'] for duplicate, kept in duplicates if kept['id'] in skipped_ids}
+            # 要約しなかった記事があるフィードのカーソルは進めない
+            skipped_sources = {a.get("source_id") for a in skipped_articles}
+            updated_cursors = advance_feed_cursors(
+                feed_cursors,
+                [c for c in cursor_entries if c["source_id"] not in skipped_sources])
+
+    except Exception as e:
+        logger.error(f"記事取得・処理中にエラー: {str(e)}", exc_info=True)
+    finally:
+        if failed_articles or recovered_ids:
+            changes, dropped_ids = update_dead_letters(dead_letters, failed_articles, recovered_ids)
+            save_dead_letters(changes, prefix, storage)
+            # 再試行をやめた記事は、フィードから選び直さないよう処理済みにする
+            newly_processed_ids |= dropped_ids
+        # 実行中にエラーが発生しても、処理できたIDは保存する
+        if newly_processed_ids:
+            logger.info(f"今回処理した記事ID数: {len(newly_processed_ids)}")
+            updated_processed_ids = processed_ids.union(newly_processed_ids)
+            save_processed_ids(updated_processed_ids, prefix, storage)
+        else:
+            logger.info("今回新しく処理した記事はありませんでした。")
+        if updated_cursors != feed_cursors:
+            save_feed_cursors(updated_cursors, prefix, storage)
+
+    return processed_articles
+
+
+def run_program(program, fetched, summary_cache, state, episode_date, storage=None,
+                deadline=None, pending_episodes=1):
+    """
+    取得済みフィードから1番組分の記事を選択・要約し、エピソードを公開する
+
+    Parameters:
+    program (dict): 番組定義
+    fetched (dict): fetch_program_feeds() の結果
+    summary_cache (dict): 番組間で共有する要約キャッシュ
+    state (dict): 番組の処理済みIDとカーソル
+    episode_date (datetime.date): エピソード日付
+    storage (Storage, optional): 保存先（実行全体の書き込みバッチなど）
+    deadline (Deadline, optional): 実行の残り時間（省略時は期限なし）
+    pending_episodes (int): この番組を含め、この後に公開するエピソード数
+
+    Returns:
+    dict: 番組ID、処理済み記事、エピソードを含む結果
+    """
+    processed_articles = collect_program_articles(
+        program, fetched, summary_cache, state, storage, deadline, pending_episodes)
+
+    episode_data = None
+    if processed_articles:  # 処理された記事がある場合のみ統合音声生成
+        episode_data = publish_episode(
+            program, processed_articles, episode_date, storage, deadline)
+    else:
+        logger.info(f"[{program['id']}] 処理対象の記事がなかったため、統合音声生成をスキップします。")
+
+    return {
+        "program_id": program["id"],
+        "articles": processed_articles,
+        "episode": episode_data
+    }
+
+
+def load_program_states(programs):
+    """
+    番組ごとの処理済みID・フィードカーソル・再試行待ちの記事をロードする
+
+    Returns:
+    dict: {番組ID: {"processed_ids": set, "cursors": dict, "dead_letters": dict}}
+    """
+    return {
+        program["id"]: {
+            "processed_ids": load_processed_ids(program["output_prefix"]),
+            "cursors": load_feed_cursors(program["output_prefix"]),
+            "dead_letters": load_dead_letters(program["output_prefix"])
+        }
+        for program in programs
+    }
+
+
+def run_programs(programs, episode_date=None, deadline=None):
+    """
+    複数番組のエピソードを1回の実行で生成する
+
+    フィードは番組をまたいで1回だけ取得し、記事の要約は実行内キャッシュで
+    共有する。記事の選択・音声・出力先は番組ごとに行う。
+    残り時間が少なくなると、後続の番組の音声合成・公開の時間を残して要約を打ち切る
+
+    Parameters:
+    programs (list): 番組定義のリスト
+    episode_date (datetime.date, optional): エピソード日付（省略時は当日）
+    deadline (Deadline, optional): 実行の残り時間（Lambdaでは Deadline.from_context()）
+
+    Returns:
+    list: 番組ごとの run_program() の結果
+    """
+    if episode_date is None:
+        episode_date = datetime.date.today()
+    deadline = deadline or Deadline()
+
+    states = load_program_states(programs)
+    fetched = fetch_program_feeds(programs, states)
+    summary_cache = {}
+
+    # 実行中の状態ファイル・エピソードの書き込みは最後にまとめて並列に行う
+    batch = get_storage().batch()
+    results = []
+    try:
+        for index, program in enumerate(programs):
+            logger.info(f"番組 '{program['name']}' の処理を開始します...")
+            with span("run_program", "program", program_id=program["id"]):
+                results.append(run_program(
+                    program, fetched, summary_cache, states[program["id"]],
+                    episode_date, batch, deadline, pending_episodes=len(programs) - index))
+    finally:
+        # 途中でエラーが発生しても、処理できた分は保存する
+        # （ネットワークへの書き込みはここで行われるため、公開の所要時間として記録する）
+        with profile_stage(STAGE_UPLOAD), deadline.stage(STAGE_PUBLISH):
+            batch.flush()
+
+    logger.info(f"{len(programs)}番組の処理が完了しました（要約した記事: {len(summary_cache)}件, "
+                f"所要時間: {deadline.report()}）")
+    return results
+
+
+def select_run_articles(programs):
+    """
+    要約・音声合成をせずに、現在の実行で要約する記事を選択する（ドライラン）
+
+    フィードの取得と記事の選択（再試行待ちの記事を含む）は通常の実行と同じに行い、
+    処理済みIDやカーソルは保存しない
+
+    Parameters:
+    programs (list): 番組定義のリスト
+
+    Returns:
+    dict: {番組ID: 要約する記事のリスト（再試行待ちの記事が先）}
+    """
+    states = load_program_states(programs)
+    fetched = fetch_program_feeds(programs, states)
+
+    program_articles = {}
+    for program in programs:
+        state = states[program["id"]]
+        selected_articles, _ = select_program_articles(
+            program, fetched, state["processed_ids"] | set(state["dead_letters"]))
+        program_articles[program["id"]] = due_dead_letters(state["dead_letters"]) + selected_articles
+    return program_articles
+
+
+# ローカル実行用
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="複数番組のエピソードを生成する")
+    parser.add_argument("--programs", help="番組定義ファイル（省略時は PROGRAMS_FILE）")
+    parser.add_argument("--only", help="生成する番組IDをカンマ区切りで指定")
+    parser.add_argument("--default", action="store_true",
+                        help="番組定義ファイルを使わず config.py の既定番組のみを生成")
+    parser.add_argument("--memory-profile", action="store_true",
+                        help="段階ごとのメモリ使用量を計測し、data/profiles/ にレポートを保存する")
+    parser.add_argument("--trace", action="store_true",
+                        help="実行のタイムラインを data/traces/ にChromeトレース形式で保存する")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="要約・音声合成をせず、現在選択される記事での料金の見積もりを表示する")
+    args = parser.parse_args()
+
+    if args.default:
+        target_programs = [default_program()]
+    else:
+        target_programs = load_programs(args.programs)
+        if args.only:
+            only_ids = set(args.only.split(","))
+            target_programs = [p for p in target_programs if p["id"] in only_ids]
+
+    if args.dry_run:
+        estimate = estimate_run_cost(select_run_articles(target_programs))
+        for program_id, program_estimate in estimate["programs"].items():
+            print(f"{program_id}: {len(program_estimate['articles'])}件の記事")
+            for article in program_estimate["articles"]:
+                print(f"  ${article['cost_usd']:.5f}  [{article['source_id']}] {article['title'][:40]}")
+            print(f"  要約 ${program_estimate['summary_usd']:.4f} + "
+                  f"音声合成 ${program_estimate['episode_usd']:.4f}")
+        print(f"合計の見積もり: ${estimate['total_usd']:.4f}")
+    else:
+        os.makedirs(AUDIO_DIR, exist_ok=True)
+        if args.memory_profile:
+            start_memory_profile()
+        if args.trace:
+            start_trace()
+        try:
+            try:
+                start_cost_tracking()
+            except Exception as e:
+                logger.error(f"料金の記録を開始できないため、予算を確認せずに実行します: {e}", exc_info=True)
+            for result in run_programs(target_programs):
+                print(f"{result['program_id']}: {len(result['articles'])}件の記事")
+        finally:
+            try:
+                stop_cost_tracking()
+            except Exception as e:
+                logger.error(f"料金の記録中にエラー: {e}", exc_info=True)
+            if args.trace:
+                save_trace(stop_trace())
+            if args.memory_profile:
+                save_memory_report(stop_memory_profile())
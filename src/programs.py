@@ -0,0 +1,149 @@
+import json
+import os
+import logging
+import re
+from functools import lru_cache
+
+from src.config import (
+    MAX_ARTICLES_PER_FEED,
+    POLLY_VOICE_ID,
+    POLLY_VOICE_ID_EN,
+    PROGRAM_DESCRIPTION,
+    PROGRAMS_FILE,
+    RSS_FEEDS
+)
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+
+def default_program():
+    """
+    config.py の設定から既定の番組（従来の単一番組）を作成する
+
+    Returns:
+    dict: 番組定義
+    """
+    return {
+        "id": "default",
+        "name": "Tech News",
+        "description": PROGRAM_DESCRIPTION,
+        "feeds": dict(RSS_FEEDS),
+        "keywords": [],
+        "voice_id": POLLY_VOICE_ID,
+        "english_voice_id": POLLY_VOICE_ID_EN,
+        "output_prefix": "",
+        "max_articles_per_feed": MAX_ARTICLES_PER_FEED,
+        # はてなブックマークのホットエントリーは人気順のため、日付順のフィードは無い
+        "date_ordered_feeds": []
+    }
+
+
+def _feed_url(feed):
+    """フィード定義（URL文字列または {"url", "date_ordered"}）からURLを取り出す"""
+    return feed["url"] if isinstance(feed, dict) else feed
+
+
+def _is_date_ordered(feed):
+    """フィードが新しい順に並んでいるか（カーソルでの打ち切りを使えるか）"""
+    return isinstance(feed, dict) and bool(feed.get("date_ordered", False))
+
+
+def load_programs(path=None):
+    """
+    番組定義ファイルを読み込む
+
+    Parameters:
+    path (str, optional): 番組定義ファイルのパス（省略時は PROGRAMS_FILE）
+
+    フィードはURL文字列か {"url": URL, "date_ordered": true} で定義する。
+    date_ordered を指定したフィード（新しい順に並ぶもの）だけ、カーソルを
+    通過した時点で解析を打ち切る
+
+    Returns:
+    list: 番組定義のリスト。feeds は {source_id: URL} に解決済みで、
+        date_ordered_feeds に新しい順のフィードの source_id を持つ
+
+    Raises:
+    ValueError: 番組定義が不正な場合
+    """
+    path = path or PROGRAMS_FILE
+    with open(path, "r", encoding="utf-8") as f:
+        definition = json.load(f)
+
+    feeds = definition.get("feeds", {})
+    programs = []
+    seen_ids = set()
+    seen_prefixes = set()
+
+    for entry in definition.get("programs", []):
+        program_id = entry.get("id")
+        if not program_id or program_id in seen_ids:
+            raise ValueError(f"番組IDが未指定または重複しています: {program_id}")
+
+        unknown_feeds = [f for f in entry.get("feeds", []) if f not in feeds]
+        if unknown_feeds:
+            raise ValueError(f"番組 '{program_id}' に未定義のフィードがあります: {unknown_feeds}")
+
+        output_prefix = entry.get("output_prefix", f"{program_id}/")
+        if output_prefix and not output_prefix.endswith("/"):
+            output_prefix += "/"
+        if output_prefix in seen_prefixes:
+            raise ValueError(f"出力プレフィックスが重複しています: '{output_prefix}'")
+
+        programs.append({
+            "id": program_id,
+            "name": entry.get("name", program_id),
+            "description": entry.get("description", PROGRAM_DESCRIPTION),
+            "feeds": {source_id: _feed_url(feeds[source_id]) for source_id in entry.get("feeds", [])},
+            "keywords": entry.get("keywords", []),
+            "voice_id": entry.get("voice_id", POLLY_VOICE_ID),
+            "english_voice_id": entry.get("english_voice_id", POLLY_VOICE_ID_EN),
+            "output_prefix": output_prefix,
+            "max_articles_per_feed": int(
+                entry.get("max_articles_per_feed", MAX_ARTICLES_PER_FEED)),
+            "date_ordered_feeds": [
+                source_id for source_id in entry.get("feeds", [])
+                if _is_date_ordered(feeds[source_id])
+            ]
+        })
+        seen_ids.add(program_id)
+        seen_prefixes.add(output_prefix)
+
+    logger.info(f"{os.path.basename(path)}から{len(programs)}件の番組を読み込みました")
+    return programs
+
+
+@lru_cache(maxsize=None)
+def _keyword_pattern(keywords):
+    """
+    キーワードのいずれかに合致する正規表現（大文字・小文字を区別しない）
+
+    ASCIIのキーワードは前後が英数字でない位置だけに合致させる（"AI" が "email" に合致しない）。
+    日本語の文中（"生成AIの"）でも合致するよう、\b ではなく英数字の有無で判定する
+    """
+    alternatives = []
+    for keyword in keywords:
+        escaped = re.escape(keyword)
+        if keyword.isascii():
+            escaped = f"(?<![A-Za-z0-9]){escaped}(?![A-Za-z0-9])"
+        alternatives.append(escaped)
+    return re.compile("|".join(alternatives), re.IGNORECASE)
+
+
+def matches_program(article, program):
+    """
+    記事が番組のキーワード条件に合致するか判定する（キーワード未指定なら常に合致）
+
+    Parameters:
+    article (dict): title と summary を持つ記事
+    program (dict): 番組定義
+
+    Returns:
+    bool: 合致する場合True
+    """
+    keywords = program.get("keywords")
+    if not keywords:
+        return True
+    text = f"{article.get('title', '')} {article.get('summary', '')}"
+    return _keyword_pattern(tuple(keywords)).search(text) is not None
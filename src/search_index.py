@@ -0,0 +1,314 @@
+"""
+記事の要約・タイトルの全文検索インデックス
+
+外部の形態素解析器を使わず、正規化したテキストの文字バイグラムで
+転置インデックスを作る。インデックスは番組ごとに
+
+    data/{prefix}search/docs.json         文書（エピソードID・記事ID・タイトル）の表
+    data/{prefix}search/shard_XX.json     トークンのハッシュで分割した転置リスト
+
+に gzip 圧縮して保存し、エピソードの保存ごとに差分だけを更新する。
+検索は必要なシャードだけを読むため、エピソードファイルを走査しない
+
+使い方:
+    python -m src.search_index "生成AI"
+    python -m src.search_index --rebuild
+"""
+import argparse
+import hashlib
+import logging
+import re
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+from src.episode_store import data_key, load_episode
+from src.serialization import CACHE_CONTROL_STATE
+from src.storage import get_storage
+from src.utils.title_cleaner import clean_article_title
+from src.config import SEARCH_INDEX_SHARDS, STORAGE_MAX_WORKERS
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+DOCS_FILENAME = "search/docs.json"
+SUMMARY_ERROR_PREFIX = "要約エラー:"
+
+_WORD_PATTERN = re.compile(r"\w+")
+_KANJI_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]")
+
+
+def tokenize(text, query=False):
+    """
+    テキストを文字バイグラムのトークンに分割する
+
+    NFKC正規化・小文字化したうえで、単語文字の連続ごとにバイグラムを作る
+    （1文字だけの連続はその1文字をトークンにする）。
+    インデックス用には漢字1文字のトークンも加え、1文字の漢字で検索できるようにする
+
+    Parameters:
+    text (str): テキスト
+    query (bool): 検索語のトークンにする場合は True（漢字1文字のトークンを加えない）
+
+    Returns:
+    set: トークンの集合
+    """
+    normalized = unicodedata.normalize("NFKC", text or "").lower()
+    tokens = set()
+    for run in _WORD_PATTERN.findall(normalized):
+        if len(run) == 1:
+            tokens.add(run)
+            continue
+        for i in range(len(run) - 1):
+            tokens.add(run[i:i + 2])
+        if not query:
+            tokens.update(_KANJI_PATTERN.findall(run))
+    return tokens
+
+
+def shard_for_token(token, shard_count=SEARCH_INDEX_SHARDS):
+    """トークンのシャード番号（実行環境に依存しない決定的なハッシュ分割）"""
+    digest = hashlib.md5(token.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") % shard_count
+
+
+def shard_key(shard, prefix=""):
+    return data_key(f"search/shard_{shard:02d}.json", prefix)
+
+
+def encode_postings(doc_ids):
+    """ソート済みの文書番号を差分（ギャップ）のリストにする"""
+    gaps = []
+    previous = 0
+    for doc_id in doc_ids:
+        gaps.append(doc_id - previous)
+        previous = doc_id
+    return gaps
+
+
+def decode_postings(gaps):
+    """encode_postings() の逆変換"""
+    doc_ids = []
+    current = 0
+    for gap in gaps:
+        current += gap
+        doc_ids.append(current)
+    return doc_ids
+
+
+def _article_text(article):
+    title = clean_article_title(article.get("title", ""))
+    summary = article.get("summary", "")
+    if summary.startswith(SUMMARY_ERROR_PREFIX):
+        summary = ""
+    return title, f"{title}\n{summary}"
+
+
+def index_episode(episode, prefix="", storage=None):
+    """
+    エピソードの記事をインデックスに追加する
+
+    同じエピソードを再インデックスする場合は、記事IDが同じ文書の番号を使い回し、
+    古い文書番号の転置リストを全シャードから除いてから付け直す
+
+    文書表とシャードはそれぞれ条件付き書き込みで更新するため、
+    複数の実行から同時に呼び出してもよい
+
+    Parameters:
+    episode (dict): 保存したエピソード
+    prefix (str): 番組の出力プレフィックス
+    storage (Storage, optional): 保存先（省略時は既定のストレージ）
+
+    Returns:
+    int: 追加した文書数
+    """
+    storage = storage or get_storage()
+    episode_id = episode["episode_id"]
+    articles = [a for a in episode.get("articles", []) if a.get("id")]
+    texts = [_article_text(a) for a in articles]
+
+    # 文書番号を割り当てる（再インデックスの場合は同じ記事の文書番号を使い回し、
+    # エピソードから消えた記事の文書だけを無効にする）
+    previous = {}
+
+    def _allocate(docs_table):
+        docs_table = docs_table or {"docs": [], "episodes": {}}
+        docs = docs_table["docs"]
+        old_ids = docs_table["episodes"].get(episode_id, [])
+        previous["ids"] = old_ids
+        existing = {docs[i][1]: i for i in old_ids if docs[i] is not None}
+        ids = []
+        for article, (title, _) in zip(articles, texts):
+            doc_id = existing.pop(article["id"], None)
+            if doc_id is None:
+                doc_id = len(docs)
+                docs.append(None)
+            docs[doc_id] = [episode_id, article["id"], title]
+            ids.append(doc_id)
+        for doc_id in existing.values():
+            docs[doc_id] = None
+        docs_table["episodes"][episode_id] = ids
+        return docs_table
+
+    docs_table = storage.update_json(
+        data_key(DOCS_FILENAME, prefix), _allocate,
+        cache_control=CACHE_CONTROL_STATE, content_encoding="gzip")
+    doc_ids = docs_table["episodes"][episode_id]
+    # 再インデックスでは古い文書番号を全シャードから外してから付け直す
+    # （要約が変わった文書の古いトークンや、無効にした文書の転置リストを残さない）
+    stale_ids = set(previous["ids"])
+
+    # 追加するトークンをシャードごとにまとめる
+    additions = {}
+    for doc_id, (_, text) in zip(doc_ids, texts):
+        for token in tokenize(text):
+            additions.setdefault(shard_for_token(token), {}).setdefault(token, []).append(doc_id)
+
+    def _update_shard(shard):
+        def _merge(postings):
+            postings = postings or {}
+            if stale_ids:
+                for token in list(postings):
+                    ids = [i for i in decode_postings(postings[token]) if i not in stale_ids]
+                    if ids:
+                        postings[token] = encode_postings(ids)
+                    else:
+                        del postings[token]
+            for token, new_ids in additions.get(shard, {}).items():
+                ids = decode_postings(postings.get(token, []))
+                postings[token] = encode_postings(sorted(set(ids).union(new_ids)))
+            return postings
+
+        storage.update_json(shard_key(shard, prefix), _merge,
+                            cache_control=CACHE_CONTROL_STATE, content_encoding="gzip")
+
+    shards = range(SEARCH_INDEX_SHARDS) if stale_ids else list(additions)
+    with ThreadPoolExecutor(max_workers=STORAGE_MAX_WORKERS) as executor:
+        list(executor.map(_update_shard, shards))
+
+    logger.info(f"検索インデックスに{episode_id}の{len(doc_ids)}件の記事を追加しました"
+                f"（{len(shards)}シャード）")
+    return len(doc_ids)
+
+
+def search(query, prefix="", storage=None, limit=20):
+    """
+    インデックスから記事を検索する
+
+    クエリの全てのバイグラムを含む記事を返す（AND検索）
+
+    Parameters:
+    query (str): 検索語
+    prefix (str): 番組の出力プレフィックス
+    storage (Storage, optional): 保存先（省略時は既定のストレージ）
+    limit (int): 最大件数
+
+    Returns:
+    list: {"episode_id", "article_id", "title"} のリスト（新しいエピソード順）
+    """
+    storage = storage or get_storage()
+    tokens = tokenize(query, query=True)
+    if not tokens:
+        return []
+
+    by_shard = {}
+    for token in tokens:
+        by_shard.setdefault(shard_for_token(token), []).append(token)
+
+    def _load(shard):
+        return storage.get_json(shard_key(shard, prefix)) or {}
+
+    with ThreadPoolExecutor(max_workers=STORAGE_MAX_WORKERS) as executor:
+        shards = dict(zip(by_shard, executor.map(_load, by_shard)))
+
+    # 転置リストの短い順に積集合をとる
+    postings = []
+    for shard, shard_tokens in by_shard.items():
+        for token in shard_tokens:
+            gaps = shards[shard].get(token)
+            if not gaps:
+                return []
+            postings.append(gaps)
+    postings.sort(key=len)
+    matched = set(decode_postings(postings[0]))
+    for gaps in postings[1:]:
+        matched.intersection_update(decode_postings(gaps))
+        if not matched:
+            return []
+
+    docs = (storage.get_json(data_key(DOCS_FILENAME, prefix)) or {}).get("docs", [])
+    results = []
+    for doc_id in matched:
+        doc = docs[doc_id] if doc_id < len(docs) else None
+        if doc is None:
+            continue  # 再インデックスで無効になった文書
+        results.append({"episode_id": doc[0], "article_id": doc[1], "title": doc[2]})
+
+    results.sort(key=lambda r: r["episode_id"], reverse=True)
+    return results[:limit]
+
+
+def rebuild_index(prefix="", storage=None):
+    """
+    保存済みの全エピソードからインデックスを作り直す
+
+    メモリ上で全体を作ってから文書表と全シャードを上書きするため、
+    無効になった文書やシャード数の変更前の転置リストは残らない
+
+    Returns:
+    int: インデックスしたエピソード数
+    """
+    storage = storage or get_storage()
+    episodes_list = storage.get_json(data_key("episodes_list.json", prefix)) or []
+    docs_table = {"docs": [], "episodes": {}}
+    shards = [{} for _ in range(SEARCH_INDEX_SHARDS)]
+
+    for summary in reversed(episodes_list):
+        episode = load_episode(summary["episode_id"], prefix, storage)
+        if not episode:
+            continue
+        episode_id = episode["episode_id"]
+        first_id = len(docs_table["docs"])
+        for article in episode.get("articles", []):
+            if not article.get("id"):
+                continue
+            title, text = _article_text(article)
+            doc_id = len(docs_table["docs"])
+            docs_table["docs"].append([episode_id, article["id"], title])
+            for token in tokenize(text):
+                shards[shard_for_token(token)].setdefault(token, []).append(doc_id)
+        docs_table["episodes"][episode_id] = list(range(first_id, len(docs_table["docs"])))
+
+    batch = storage.batch()
+    for shard, postings in enumerate(shards):
+        batch.put_json(shard_key(shard, prefix),
+                       {token: encode_postings(ids) for token, ids in postings.items()},
+                       cache_control=CACHE_CONTROL_STATE, content_encoding="gzip")
+    batch.flush()
+    # 文書表は全シャードの書き込み後に置き換える
+    storage.put_json(data_key(DOCS_FILENAME, prefix), docs_table,
+                     cache_control=CACHE_CONTROL_STATE, content_encoding="gzip")
+
+    count = len(docs_table["episodes"])
+    logger.info(f"{count}件のエピソード（{len(docs_table['docs'])}記事）から"
+                f"検索インデックスを作成しました")
+    return count
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="記事の全文検索インデックス")
+    parser.add_argument("query", nargs="?", help="検索語")
+    parser.add_argument("--prefix", default="", help="番組の出力プレフィックス（例: cloud/）")
+    parser.add_argument("--rebuild", action="store_true", help="保存済みの全エピソードから作り直す")
+    parser.add_argument("--limit", type=int, default=20, help="最大件数")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_index(args.prefix)
+    if args.query:
+        for hit in search(args.query, args.prefix, limit=args.limit):
+            print(f"{hit['episode_id']}  {hit['article_id']}  {hit['title']}")
@@ -0,0 +1,140 @@
+import gzip
+import json
+import logging
+
+from src.config import JSON_CONTENT_ENCODING
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# brotli はオプションの依存関係（未インストールなら gzip にフォールバック）
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+
+# オブジェクト種別ごとの Cache-Control
+CACHE_CONTROL_EPISODE = "public, max-age=3600"       # 再生成時のみ変わる
+CACHE_CONTROL_CATALOG = "public, max-age=60"         # 新しいエピソードで更新される
+CACHE_CONTROL_STATE = "no-cache"                     # 実行状態（クライアントには配信しない）
+
+# 一覧表示用の軽量エピソードに残すフィールド
+EPISODE_LIST_FIELDS = {
+    "episode_id": True,
+    "title": True,
+    "created_at": True,
+    "audio_url": True,
+    "renditions": True,
+    "hls_url": True,
+    "chapters": True,
+    "source": True,
+    "articles": {"id": True, "title": True, "url": True, "source_id": True},
+}
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def encode_json(obj, content_encoding=None, compact=True):
+    """
+    オブジェクトをJSONバイト列にエンコードし、必要に応じて圧縮する
+
+    Parameters:
+    obj: シリアライズするオブジェクト
+    content_encoding (str, optional): "gzip" / "br" / ""。省略時は JSON_CONTENT_ENCODING
+    compact (bool): 区切り文字の空白を省いたコンパクトなJSONにする場合True
+
+    Returns:
+    tuple: (バイト列, 実際に使用した Content-Encoding（非圧縮なら None）)
+    """
+    if content_encoding is None:
+        content_encoding = JSON_CONTENT_ENCODING
+
+    if compact:
+        text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(obj, ensure_ascii=False, indent=2)
+    data = text.encode("utf-8")
+
+    if content_encoding == "br":
+        if brotli is not None:
+            return brotli.compress(data, quality=9), "br"
+        logger.warning("brotli がインストールされていないため gzip で圧縮します")
+        content_encoding = "gzip"
+    if content_encoding == "gzip":
+        # mtime=0 で同じ内容からは常に同じバイト列を生成する
+        return gzip.compress(data, compresslevel=9, mtime=0), "gzip"
+    return data, None
+
+
+def decode_json(data):
+    """
+    encode_json() でエンコードしたバイト列（圧縮の有無を問わない）をデコードする
+
+    Parameters:
+    data (bytes): JSONバイト列（gzip / brotli 圧縮も可）
+
+    Returns:
+    デコードしたオブジェクト
+    """
+    if data[:2] == _GZIP_MAGIC:
+        data = gzip.decompress(data)
+    elif data[:1] not in (b"{", b"[", b'"') and brotli is not None:
+        try:
+            data = brotli.decompress(data)
+        except brotli.error:
+            pass
+    return json.loads(data.decode("utf-8"))
+
+
+def project(obj, fields):
+    """
+    フィールド指定に従ってオブジェクトの一部だけを取り出す
+
+    Parameters:
+    obj (dict or list): 元のオブジェクト（リストの場合は各要素に適用）
+    fields (dict): {フィールド名: True または入れ子のフィールド指定}
+
+    Returns:
+    dict or list: 指定したフィールドだけを持つオブジェクト
+    """
+    if isinstance(obj, list):
+        return [project(item, fields) for item in obj]
+
+    projected = {}
+    for name, spec in fields.items():
+        if name not in obj:
+            continue
+        value = obj[name]
+        if isinstance(spec, dict) and isinstance(value, (dict, list)):
+            value = project(value, spec)
+        projected[name] = value
+    return projected
+
+
+# テスト用
+if __name__ == "__main__":
+    sample_episode = {
+        "episode_id": "2025-01-01",
+        "title": "Tech News (2025-01-01)",
+        "created_at": "2025-01-01 07:00:00",
+        "audio_url": "https://example.com/audio/2025-01-01.mp3",
+        "source": "Tech News",
+        "articles": [
+            {"id": f"a{i}", "title": f"記事{i}", "url": f"https://example.com/{i}",
+             "summary": "この記事は要約のサンプルです。" * 20, "content": "本文" * 200}
+            for i in range(5)
+        ]
+    }
+
+    pretty = json.dumps(sample_episode, ensure_ascii=False, indent=2).encode("utf-8")
+    compact, _ = encode_json(sample_episode, content_encoding="")
+    compressed, encoding = encode_json(sample_episode, content_encoding="gzip")
+    lite, _ = encode_json(project(sample_episode, EPISODE_LIST_FIELDS), content_encoding="gzip")
+
+    print(f"indent=2:        {len(pretty):>7} bytes")
+    print(f"compact:         {len(compact):>7} bytes")
+    print(f"compact+{encoding}:    {len(compressed):>7} bytes")
+    print(f"list view+gzip:  {len(lite):>7} bytes")
+    assert decode_json(compressed) == sample_episode
@@ -0,0 +1,296 @@
+"""
+フィードのシャーディング
+
+フィード数が増えて1回の実行（Lambdaの600秒）に収まらなくなった場合に、
+フィードを複数のシャードに分けて並列に取得・要約し、最後に1回の
+ファイナライズでシャードの出力をその日のエピソードにまとめる
+
+    # シャード（shard_index = 0 〜 shard_count - 1 をそれぞれ実行）
+    {"shard_index": 0, "shard_count": 4}
+
+    # 明示的にフィードを指定したシャード（source_id またはフィードURL）
+    {"feeds": ["hatena_it", "publickey"], "shard_id": "manual-1"}
+
+    # ファイナライズ（全シャードの完了後に実行）
+    {"finalize": true, "shard_count": 4}
+"""
+import datetime
+import hashlib
+import logging
+
+from src.article_selector import article_priority, select_articles
+from src.episode_publisher import publish_episode
+from src.episode_store import data_key
+from src.program_runner import (
+    collect_program_articles,
+    fetch_program_feeds,
+    load_program_states
+)
+from src.serialization import CACHE_CONTROL_STATE
+from src.storage import get_storage
+from src.utils import collapse_near_duplicates
+from src.config import (
+    NEAR_DUPLICATE_DETECTION,
+    NEAR_DUPLICATE_MAX_DISTANCE
+)
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+
+def shard_for_feed(feed_url, shard_count):
+    """
+    フィードURLからシャード番号を決める（実行環境に依存しない決定的なハッシュ分割）
+
+    Parameters:
+    feed_url (str): フィードURL
+    shard_count (int): シャード数
+
+    Returns:
+    int: 0 〜 shard_count - 1 のシャード番号
+    """
+    digest = hashlib.sha1(feed_url.encode("utf-8")).hexdigest()
+    return int(digest, 16) % shard_count
+
+
+def index_shard_id(shard_index, shard_count):
+    """シャード番号とシャード数からシャードIDを作る"""
+    return f"{shard_index}-of-{shard_count}"
+
+
+def feeds_shard_id(feeds):
+    """明示的に指定したフィードのリストからシャードIDを作る"""
+    digest = hashlib.sha1("\n".join(sorted(feeds)).encode("utf-8")).hexdigest()
+    return f"feeds-{digest[:12]}"
+
+
+def shard_programs(programs, shard_index=None, shard_count=None, feeds=None):
+    """
+    番組定義をシャードが担当するフィードだけに絞り込む
+
+    Parameters:
+    programs (list): 番組定義のリスト
+    shard_index (int, optional): シャード番号
+    shard_count (int, optional): シャード数
+    feeds (list, optional): 担当するフィード（source_id またはフィードURL）。
+        指定した場合は shard_index / shard_count より優先する
+
+    Returns:
+    list: 担当するフィードを1つ以上持つ番組定義（feeds を絞り込んだコピー）
+    """
+    if feeds is not None:
+        wanted = set(feeds)
+
+        def _in_shard(source_id, feed_url):
+            return source_id in wanted or feed_url in wanted
+    else:
+        if not shard_count or not 0 <= shard_index < shard_count:
+            raise ValueError(
+                f"シャード指定が不正です: shard_index={shard_index}, shard_count={shard_count}")
+
+        def _in_shard(source_id, feed_url):
+            return shard_for_feed(feed_url, shard_count) == shard_index
+
+    sharded = []
+    for program in programs:
+        shard_feeds = {
+            source_id: feed_url
+            for source_id, feed_url in program["feeds"].items()
+            if _in_shard(source_id, feed_url)
+        }
+        if shard_feeds:
+            sharded.append(dict(program, feeds=shard_feeds))
+    return sharded
+
+
+def shard_output_key(program, episode_date, shard_id):
+    """シャードの出力（要約済み記事）を保存するキー"""
+    date_str = episode_date.strftime("%Y-%m-%d")
+    return data_key(f"shards/{date_str}/shard_{shard_id}.json", program["output_prefix"])
+
+
+def run_shard(programs, shard_id, episode_date=None, deadline=None):
+    """
+    シャードが担当するフィードの記事を取得・要約し、番組ごとに出力を保存する
+
+    処理済みIDとカーソルは条件付き書き込みでマージされるため、
+    複数のシャードを同時に実行してもよい。同じシャードをファイナライズ前に
+    再実行した場合（タイムアウト後の再試行など）は、前回の出力に記事を追加する。
+    エピソードはファイナライズで公開する
+
+    Parameters:
+    programs (list): shard_programs() で絞り込んだ番組定義のリスト
+    shard_id (str): シャードID
+    episode_date (datetime.date, optional): エピソード日付（省略時は当日）
+    deadline (Deadline, optional): 実行の残り時間。足りなくなった記事は次回に回す
+
+    Returns:
+    dict: {番組ID: 要約した記事数}
+    """
+    if episode_date is None:
+        episode_date = datetime.date.today()
+
+    storage = get_storage()
+    states = load_program_states(programs)
+    fetched = fetch_program_feeds(programs, states)
+    summary_cache = {}
+
+    batch = storage.batch()
+    counts = {}
+    try:
+        for program in programs:
+            logger.info(f"[{shard_id}] 番組 '{program['name']}' のフィード"
+                        f"{len(program['feeds'])}件を処理します...")
+            # 音声合成はファイナライズで行うため、ここでは時間を残さない
+            articles = collect_program_articles(
+                program, fetched, summary_cache, states[program["id"]], batch,
+                deadline, pending_episodes=0)
+            # 前回の実行の記事は処理済みになっているため、上書きせずに追加する
+            batch.update_json(
+                shard_output_key(program, episode_date, shard_id),
+                lambda current, program=program, articles=articles: merge_shard_output(
+                    current, shard_id, program, articles),
+                cache_control=CACHE_CONTROL_STATE)
+            counts[program["id"]] = len(articles)
+    finally:
+        batch.flush()
+
+    logger.info(f"[{shard_id}] シャードの処理が完了しました: {counts}")
+    return counts
+
+
+def merge_shard_output(current, shard_id, program, articles):
+    """
+    保存済みのシャードの出力に、今回要約した記事を記事IDでマージする
+
+    Parameters:
+    current (dict or None): 保存済みのシャードの出力
+    shard_id (str): シャードID
+    program (dict): shard_programs() で絞り込んだ番組定義
+    articles (list): 今回要約した記事のリスト
+
+    Returns:
+    dict: 保存するシャードの出力
+    """
+    current = current or {}
+    merged = {article["id"]: article for article in current.get("articles", [])}
+    for article in articles:
+        merged[article["id"]] = article
+    feeds = list(current.get("feeds", []))
+    feeds += [feed for feed in program["feeds"] if feed not in feeds]
+    return {
+        "shard_id": shard_id,
+        "program_id": program["id"],
+        "feeds": feeds,
+        "articles": list(merged.values())
+    }
+
+
+def remove_consumed_articles(current, consumed_ids):
+    """ファイナライズで公開した記事をシャードの出力から取り除く（出力が無ければNone）"""
+    if current is None:
+        return None
+    return dict(current, articles=[
+        article for article in current.get("articles", [])
+        if article["id"] not in consumed_ids
+    ])
+
+
+def merge_shard_articles(program, shard_outputs):
+    """
+    シャードの出力を1番組分の記事リストにまとめる
+
+    シャードをまたいだ近似重複記事をまとめたうえで、番組全体の
+    フィード数・1フィードあたりの最大記事数で選択し直す
+
+    Parameters:
+    program (dict): 番組定義（絞り込む前の全フィードを持つもの）
+    shard_outputs (list): run_shard() が保存したシャードの出力
+
+    Returns:
+    list: エピソードに含める記事のリスト
+    """
+    articles = []
+    seen_ids = set()
+    for output in shard_outputs:
+        for article in output["articles"]:
+            # 同じシャードを再実行した場合などの完全な重複を除く
+            if article["id"] in seen_ids:
+                continue
+            seen_ids.add(article["id"])
+            articles.append(article)
+
+    if NEAR_DUPLICATE_DETECTION and articles:
+        feed_order = list(program["feeds"])
+        articles, duplicates = collapse_near_duplicates(
+            articles,
+            max_distance=NEAR_DUPLICATE_MAX_DISTANCE,
+            priority_key=lambda a: article_priority(a, feed_order)
+        )
+        if duplicates:
+            logger.info(f"[{program['id']}] シャード間の重複記事{len(duplicates)}件をまとめました")
+
+    return select_articles(
+        articles, len(program["feeds"]), program["max_articles_per_feed"])
+
+
+def finalize_shards(programs, shard_ids, episode_date=None):
+    """
+    全シャードの出力をまとめて、番組ごとにその日のエピソードを公開する
+
+    公開できた番組では、まとめた記事をシャードの出力から取り除く。
+    ファイナライズを再実行しても同じ記事を再び公開せず、その間に
+    再実行されたシャードが追加した記事だけが次のファイナライズの対象になる
+
+    Parameters:
+    programs (list): 番組定義のリスト（絞り込む前のもの）
+    shard_ids (list): まとめるシャードIDのリスト
+    episode_date (datetime.date, optional): エピソード日付（省略時は当日）
+
+    Returns:
+    list: 番組ごとの結果（run_program() と同じ形式）
+    """
+    if episode_date is None:
+        episode_date = datetime.date.today()
+
+    storage = get_storage()
+    batch = storage.batch()
+    results = []
+    try:
+        for program in programs:
+            shard_outputs = {}
+            for shard_id in shard_ids:
+                output = storage.get_json(shard_output_key(program, episode_date, shard_id))
+                if output is None:
+                    # 番組のフィードを1つも担当しないシャードもある
+                    logger.info(f"[{program['id']}] シャード {shard_id} の出力はありません")
+                    continue
+                shard_outputs[shard_id] = output
+
+            articles = merge_shard_articles(program, list(shard_outputs.values()))
+            episode_data = None
+            if articles:
+                episode_data = publish_episode(program, articles, episode_date, batch)
+            else:
+                logger.info(f"[{program['id']}] 処理対象の記事がなかったため、統合音声生成をスキップします。")
+
+            # 公開できなかった場合は、次のファイナライズでまとめ直せるよう出力を残す
+            if episode_data and episode_data.get("audio_url"):
+                for shard_id, output in shard_outputs.items():
+                    consumed_ids = {article["id"] for article in output["articles"]}
+                    batch.update_json(
+                        shard_output_key(program, episode_date, shard_id),
+                        lambda current, consumed_ids=consumed_ids: remove_consumed_articles(
+                            current, consumed_ids),
+                        cache_control=CACHE_CONTROL_STATE)
+
+            results.append({
+                "program_id": program["id"],
+                "articles": articles,
+                "episode": episode_data
+            })
+    finally:
+        batch.flush()
+
+    logger.info(f"{len(shard_ids)}シャードの出力から{len(programs)}番組のエピソードをまとめました")
+    return results
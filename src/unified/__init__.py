@@ -1,10 +1,17 @@
-from src.unified.content_generator import generate_unified_content
-from src.unified.speech_synthesizer import synthesize_unified_speech, estimate_duration
+from src.unified.content_generator import (
+    generate_english_content,
+    generate_segment_content,
+    generate_unified_content
+)
+from src.unified.speech_synthesizer import synthesize_unified_speech, synthesize_renditions, estimate_duration
 from src.unified.metadata_processor import create_unified_metadata, save_unified_metadata, update_episodes_list
 
 __all__ = [
     'generate_unified_content',
+    'generate_english_content',
+    'generate_segment_content',
     'synthesize_unified_speech',
+    'synthesize_renditions',
     'estimate_duration',
     'create_unified_metadata',
     'save_unified_metadata',
@@ -8,13 +8,17 @@ from src.utils.title_cleaner import clean_article_title
 logger = logging.getLogger(__name__)
 
 
-def generate_unified_content(processed_articles, episode_date=None):
+def generate_unified_content(processed_articles, episode_date=None, program_description=None,
+                             intro_text=None, outro_text=None):
     """
     記事データとナレーションを統合したコンテンツを生成する
 
     Parameters:
     processed_articles (list): 処理済み記事のリスト
     episode_date (datetime.date, optional): エピソード日付（省略時は当日）
+    program_description (str, optional): 番組紹介文（省略時は config.PROGRAM_DESCRIPTION）
+    intro_text (str, optional): 挨拶文の置き換え（追加セグメントの導入など）
+    outro_text (str, optional): エンディングの置き換え
 
     Returns:
     dict: 統合コンテンツ情報
@@ -36,13 +40,18 @@ def generate_unified_content(processed_articles, episode_date=None):
         # 日付をフォーマット
         formatted_date = f"{episode_date.month}月{episode_date.day}日{weekday_jp}曜日"
 
+        if program_description is None:
+            program_description = config.PROGRAM_DESCRIPTION
+
         # 挨拶文
         # 複数行のf-stringはトリプルクオートで囲む
-        intro_text = f"""みなさんこんにちは本日は{formatted_date}です。
-{config.PROGRAM_DESCRIPTION}"""
+        if intro_text is None:
+            intro_text = f"""みなさんこんにちは本日は{formatted_date}です。
+{program_description}"""
 
         # エンディングテキスト
-        outro_text = """本日は以上です。
+        if outro_text is None:
+            outro_text = """本日は以上です。
 明日もお楽しみに。"""
 
         # Amazon Pollyの文字数制限を考慮したテキスト長端点
@@ -96,14 +105,26 @@ def generate_unified_content(processed_articles, episode_date=None):
         # 統合テキストを生成
         full_text = intro_text + "\n\n"
 
+        # 記事ごとの統合テキスト上の位置（チャプター作成用）
+        sections = []
+
         # 選択した記事を統合
         for article_info in articles_to_use:
+            section_start = len(full_text)
+
             # 記事導入ナレーション
             full_text += article_info['narration']
 
             # 記事本文
             full_text += f"{article_info['article']['summary']}\n\n"
 
+            sections.append({
+                "article_id": article_info['article'].get('id'),
+                "title": clean_article_title(article_info['article']['title']),
+                "start": section_start,
+                "end": len(full_text)
+            })
+
         # エンディング
         full_text += outro_text
 
@@ -113,6 +134,7 @@ def generate_unified_content(processed_articles, episode_date=None):
         return {
             "full_text": full_text,
             "article_count": len(articles_to_use),
+            "sections": sections,
             "date": episode_date.strftime("%Y-%m-%d")
         }
 
@@ -121,6 +143,90 @@ def generate_unified_content(processed_articles, episode_date=None):
         raise
 
 
+# 同じ日の2回目以降の実行で既存のエピソードに追加するセグメントのナレーション
+SEGMENT_INTRO_TEXT = "ここからは、追加のニュースをお伝えします。"
+SEGMENT_OUTRO_TEXT = "追加のニュースは以上です。"
+
+
+def generate_segment_content(processed_articles, episode_date=None):
+    """
+    既存のエピソードに追加するセグメントのコンテンツを生成する
+
+    Parameters:
+    processed_articles (list): 新しく追加する処理済み記事のリスト
+    episode_date (datetime.date, optional): エピソード日付（省略時は当日）
+
+    Returns:
+    dict: generate_unified_content() と同じ形式のコンテンツ情報
+    """
+    return generate_unified_content(
+        processed_articles, episode_date,
+        intro_text=SEGMENT_INTRO_TEXT, outro_text=SEGMENT_OUTRO_TEXT)
+
+
+def generate_english_content(translated_articles, episode_date=None, program_name=None):
+    """
+    英訳した記事から英語版エピソードのコンテンツを生成する
+
+    Parameters:
+    translated_articles (list): 英語の title と summary を持つ記事のリスト（日本語版と同じ順）
+    episode_date (datetime.date, optional): エピソード日付（省略時は当日）
+    program_name (str, optional): 番組名（省略時は config.PROGRAM_NAME）
+
+    Returns:
+    dict: generate_unified_content() と同じ形式のコンテンツ情報
+    """
+    if episode_date is None:
+        episode_date = datetime.date.today()
+    if isinstance(episode_date, str):
+        episode_date = datetime.datetime.strptime(episode_date, "%Y-%m-%d").date()
+    program_name = program_name or config.PROGRAM_NAME
+
+    formatted_date = f"{episode_date:%A, %B} {episode_date.day}"
+    intro_text = (f"Hello and welcome to the English edition of {program_name}. "
+                  f"Today is {formatted_date}.")
+    outro_text = "That's all for today. See you tomorrow."
+
+    # 日本語版と同じく、Pollyの制限（3000文字）に余裕を持たせる
+    MAX_TEXT_LENGTH = 2800
+
+    full_text = intro_text + "\n\n"
+    sections = []
+    count = len(translated_articles)
+    for i, article in enumerate(translated_articles):
+        if i == 0:
+            narration = f"First up: {article['title']}.\n\n"
+        elif i == count - 1:
+            narration = f"And finally: {article['title']}.\n\n"
+        else:
+            narration = f"Next: {article['title']}.\n\n"
+        body = f"{article['summary']}\n\n"
+
+        if len(full_text) + len(narration) + len(body) + len(outro_text) > MAX_TEXT_LENGTH:
+            logger.warning(f"文字数制限のため英語版の記事{i+1}以降をスキップします")
+            break
+
+        section_start = len(full_text)
+        full_text += narration + body
+        sections.append({
+            "article_id": article.get('id'),
+            "title": article['title'],
+            "start": section_start,
+            "end": len(full_text)
+        })
+
+    full_text += outro_text
+
+    logger.info(f"英語版コンテンツ生成完了: {len(sections)}件の記事 (総文字数: {len(full_text)}文字)")
+
+    return {
+        "full_text": full_text,
+        "article_count": len(sections),
+        "sections": sections,
+        "date": episode_date.strftime("%Y-%m-%d")
+    }
+
+
 # テスト実行用
 if __name__ == "__main__":
     # ロギング設定
@@ -1,9 +1,10 @@
-import os
 import json
 import logging
 from datetime import datetime
 
-from src.config import IS_LAMBDA, S3_BUCKET_NAME
+from src.config import IS_LAMBDA
+from src.serialization import CACHE_CONTROL_CATALOG, CACHE_CONTROL_EPISODE
+from src.storage import get_storage
 
 # ロギング設定
 logger = logging.getLogger(__name__)
@@ -63,104 +64,49 @@ def create_unified_metadata(processed_articles, episode_id, audio_url, full_text
         logger.error(f"メタデータ作成中にエラー: {str(e)}")
         raise
 
-def save_unified_metadata(metadata, episode_id):
+def save_unified_metadata(metadata, episode_id, storage=None):
     """
     統合メタデータを保存する（S3またはローカル）
     
     Parameters:
     metadata (dict): 保存するメタデータ
     episode_id (str): エピソードID（通常は日付形式 YYYY-MM-DD）
+    storage (Storage, optional): 保存先（省略時は既定のストレージ）
     
     Returns:
-    str: メタデータが保存されたパス/URL
+    str: メタデータが保存されたキー
     """
+    storage = storage or get_storage()
     try:
-        # メタデータのJSON文字列化
-        metadata_json = json.dumps(metadata, ensure_ascii=False, indent=2)
+        metadata_key = f"data/unified/metadata_{episode_id}.json"
+        storage.put_json(metadata_key, metadata, cache_control=CACHE_CONTROL_EPISODE)
         
-        # Lambda環境ではS3に保存、それ以外はローカルに保存
-        if IS_LAMBDA:
-            import boto3
-            from src.s3_uploader import upload_to_s3
-            
-            # 一時ファイルに書き出し
-            tmp_file = f"/tmp/unified_metadata_{episode_id}.json"
-            with open(tmp_file, "w", encoding="utf-8") as f:
-                f.write(metadata_json)
-                
-            # S3にアップロード
-            metadata_s3_key = f"data/unified/metadata_{episode_id}.json"
-            s3_url = upload_to_s3(tmp_file, metadata_s3_key)
-            
-            # 最新のメタデータとしても保存
-            latest_tmp_file = f"/tmp/latest_unified_metadata.json"
-            with open(latest_tmp_file, "w", encoding="utf-8") as f:
-                f.write(metadata_json)
-                
-            latest_s3_key = f"data/unified/latest_metadata.json"
-            upload_to_s3(latest_tmp_file, latest_s3_key)
-            
-            logger.info(f"統合メタデータをS3に保存しました: {metadata_s3_key}")
-            return s3_url
-        else:
-            # ローカルディレクトリを作成
-            os.makedirs("data/unified", exist_ok=True)
-            
-            # 日付別ファイル
-            local_path = f"data/unified/metadata_{episode_id}.json"
-            with open(local_path, "w", encoding="utf-8") as f:
-                f.write(metadata_json)
-                
-            # 最新ファイル
-            latest_path = "data/unified/latest_metadata.json"
-            with open(latest_path, "w", encoding="utf-8") as f:
-                f.write(metadata_json)
-                
-            logger.info(f"統合メタデータをローカルに保存しました: {local_path}")
-            return local_path
+        # 最新のメタデータは同じ内容を再アップロードせずにコピーする
+        storage.copy(metadata_key, "data/unified/latest_metadata.json")
+        
+        logger.info(f"統合メタデータを保存しました: {metadata_key}")
+        return metadata_key
             
     except Exception as e:
         logger.error(f"メタデータ保存中にエラー: {str(e)}")
         raise
 
-def update_episodes_list(metadata):
+def update_episodes_list(metadata, storage=None):
     """
     エピソードリストを更新する
     
     Parameters:
     metadata (dict): 追加するエピソードのメタデータ
+    storage (Storage, optional): 保存先（省略時は既定のストレージ）
     
     Returns:
     list: 更新されたエピソードリスト
     """
     logger.info("エピソードリスト更新開始")
+    storage = storage or get_storage()
     
-    episodes_list = []
     episodes_list_path = "data/episodes_list.json"
     
-    # 既存のエピソードリストを読み込み
-    try:
-        if IS_LAMBDA:
-            import boto3
-            
-            s3_client = boto3.client('s3')
-            try:
-                response = s3_client.get_object(
-                    Bucket=S3_BUCKET_NAME,
-                    Key=episodes_list_path
-                )
-                episodes_list = json.loads(response['Body'].read().decode('utf-8'))
-                logger.info(f"S3から{len(episodes_list)}件のエピソードを読み込みました")
-            except Exception as e:
-                logger.info(f"エピソードリストが存在しないため、新規作成します: {str(e)}")
-        else:
-            if os.path.exists(episodes_list_path):
-                with open(episodes_list_path, "r", encoding="utf-8") as f:
-                    episodes_list = json.load(f)
-                logger.info(f"ローカルから{len(episodes_list)}件のエピソードを読み込みました")
-    except Exception as e:
-        logger.error(f"エピソードリスト読み込み中にエラー: {str(e)}")
-    
     # エピソードの要約情報
     episode_summary = {
         "episode_id": metadata["episode_id"],
@@ -172,40 +118,33 @@ def update_episodes_list(metadata):
         "unified": True  # 統合音声フラグを追加
     }
     
-    # 重複チェック（既存のエピソードを更新）
-    existing_ids = [ep["episode_id"] for ep in episodes_list]
-    if episode_summary["episode_id"] in existing_ids:
-        # 既存エピソードのインデックスを探す
-        idx = existing_ids.index(episode_summary["episode_id"])
-        # 更新
-        episodes_list[idx] = episode_summary
-        logger.info(f"既存のエピソード {episode_summary['episode_id']} を更新しました")
-    else:
-        # 新規追加
-        episodes_list.append(episode_summary)
-        logger.info(f"新しいエピソード {episode_summary['episode_id']} を追加しました")
-    
-    # 日付順に並べ替え（新しい順）
-    episodes_list.sort(key=lambda x: x["episode_id"], reverse=True)
+    def _merge(current):
+        # 競合時は最新のリストを読み直して再適用される
+        episodes_list = list(current or [])
+        
+        # 重複チェック（既存のエピソードを更新）
+        existing_ids = [ep["episode_id"] for ep in episodes_list]
+        if episode_summary["episode_id"] in existing_ids:
+            # 既存エピソードのインデックスを探す
+            idx = existing_ids.index(episode_summary["episode_id"])
+            # 更新
+            episodes_list[idx] = episode_summary
+            logger.info(f"既存のエピソード {episode_summary['episode_id']} を更新しました")
+        else:
+            # 新規追加
+            episodes_list.append(episode_summary)
+            logger.info(f"新しいエピソード {episode_summary['episode_id']} を追加しました")
+        
+        # 日付順に並べ替え（新しい順）
+        episodes_list.sort(key=lambda x: x["episode_id"], reverse=True)
+        return episodes_list
     
-    # エピソードリストを保存
+    # エピソードリストを条件付きで保存
+    episodes_list = []
     try:
-        if IS_LAMBDA:
-            from src.s3_uploader import upload_to_s3
-            
-            # S3に保存
-            tmp_file = f"/tmp/episodes_list.json"
-            with open(tmp_file, "w", encoding="utf-8") as f:
-                json.dump(episodes_list, f, ensure_ascii=False, indent=2)
-            
-            upload_to_s3(tmp_file, episodes_list_path)
-            logger.info("統合エピソードリストをS3に保存しました")
-        else:
-            # ローカルに保存
-            os.makedirs("data", exist_ok=True)
-            with open(episodes_list_path, "w", encoding="utf-8") as f:
-                json.dump(episodes_list, f, ensure_ascii=False, indent=2)
-            logger.info("統合エピソードリストをローカルに保存しました")
+        episodes_list = storage.update_json(
+            episodes_list_path, _merge, cache_control=CACHE_CONTROL_CATALOG)
+        logger.info("統合エピソードリストを保存しました")
     except Exception as e:
         logger.error(f"エピソードリスト保存中にエラー: {str(e)}")
     
@@ -1,25 +1,214 @@
 import os
 import boto3
+import hashlib
+import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from botocore.exceptions import ClientError
 
 from src.config import (
     IS_LAMBDA,
     AWS_REGION,
     AUDIO_DIR,
+    AUDIO_RENDITIONS,
     POLLY_VOICE_ID,
     S3_BUCKET_NAME,
     S3_PREFIX
 )
+from src.cassette import cassette_call
+from src.utils.trace import span
+from src.utils.cost import polly_cost, record_polly_usage, require_budget
+from src.serialization import CACHE_CONTROL_EPISODE
+from src.storage import DIGEST_METADATA_KEY, content_digest
+from src.utils.audio_format import (
+    CONTENT_TYPES,
+    EXTENSIONS,
+    audio_bitrate,
+    mp3_duration,
+    skip_id3v2
+)
 
 # ロギング設定
 logger = logging.getLogger(__name__)
 
+MAX_POLLY_LENGTH = 3000  # Amazon Pollyの制限
+
+# 合成に使った入力（テキスト・音声・出力形式）のダイジェストを入れるメタデータ
+SYNTHESIS_METADATA_KEY = "synthesis-digest"
+
+
+def truncate_for_polly(text):
+    """Pollyの文字数制限を超えるテキストを「。」の位置で切り詰める"""
+    if len(text) <= MAX_POLLY_LENGTH:
+        return text
+    logger.warning(
+        f"テキスト長({len(text)}文字)がPollyの制限を超えています。要約を短くするか記事数を減らしてください。")
+    # もしテキストが長すぎる場合、切り詰める（エラーよりはマシ）
+    logger.warning("テキストを3000文字に切り詰めて処理を続行します。")
+    # 「。」で区切り、最後にエンディングを追加
+    return text[:MAX_POLLY_LENGTH].rsplit(
+        '。', 1)[0] + '。\n本日のニュースは以上です。\n明日もお楽しみに。'
+
+
+# Polly呼び出しごとに使うレートリミッター（バックフィルで全スレッドの呼び出し頻度を制限する）
+_polly_limiter = None
+
+
+def set_polly_rate_limiter(limiter):
+    """Polly呼び出しのレートリミッターを設定する（None で制限しない）"""
+    global _polly_limiter
+    _polly_limiter = limiter
+
+
+def polly_synthesize(polly_client, **params):
+    """
+    Pollyの synthesize_speech を呼び出し、AudioStream のバイト列を返す
+
+    カセット（src.cassette）が有効な場合は出力を記録・再生する。
+    呼び出し前に予算を確認し、呼び出し後に文字数を料金として記録する。
+    レートリミッターが設定されていれば、呼び出しごとにトークンを取得する
+
+    Raises:
+    BudgetExceededError: 料金が予算の残りを超える場合
+    """
+    characters = len(params.get("Text", ""))
+    require_budget(polly_cost(characters), "polly")
+    with _polly_limiter or nullcontext(), span(
+            "polly", "polly", format=params.get("OutputFormat"),
+            sample_rate=params.get("SampleRate"), chars=characters):
+        data = cassette_call(
+            "polly", params,
+            lambda: polly_client.synthesize_speech(**params)['AudioStream'].read())
+    record_polly_usage(characters)
+    return data
+
+
+def synthesis_digest(text, voice_id, output_format="mp3", sample_rate=None):
+    """Pollyへの入力（Pollyに渡すテキスト・音声・出力形式）のダイジェスト"""
+    payload = json.dumps([text, voice_id, output_format, sample_rate], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _digest_path(local_file_path):
+    """ローカル保存時に合成ダイジェストを記録するファイル"""
+    return f"{local_file_path}.digest"
+
+
+def has_synthesized_audio(digest, s3_key=None, local_file_path=None):
+    """
+    同じ入力で合成済みの音声が保存されているかを、本体を読まずに確認する
+
+    S3ではHEADのメタデータ、ローカルではダイジェストファイルで比較する
+
+    Parameters:
+    digest (str): synthesis_digest() の結果
+    s3_key (str, optional): S3のキー（IS_LAMBDA=Trueの場合）
+    local_file_path (str, optional): ローカルのパス（IS_LAMBDA=Falseの場合）
+
+    Returns:
+    bool: 同じ入力で合成済みの音声があればTrue
+    """
+    if IS_LAMBDA:
+        s3_client = boto3.client('s3', region_name=AWS_REGION)
+        try:
+            head = s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return False
+            raise
+        return head.get('Metadata', {}).get(SYNTHESIS_METADATA_KEY) == digest
+
+    digest_path = _digest_path(local_file_path)
+    if not (os.path.exists(local_file_path) and os.path.exists(digest_path)):
+        return False
+    with open(digest_path, encoding="utf-8") as f:
+        return f.read().strip() == digest
+
+
+def load_synthesized_audio(digest, s3_key=None, local_file_path=None):
+    """
+    同じ入力で合成済みの音声が保存されていれば読み込む（ダイジェストが一致する場合のみ本体を読む）
+
+    Parameters:
+    digest (str): synthesis_digest() の結果
+    s3_key (str, optional): S3のキー（IS_LAMBDA=Trueの場合）
+    local_file_path (str, optional): ローカルのパス（IS_LAMBDA=Falseの場合）
+
+    Returns:
+    bytes or None: 保存済みの音声データ。無いか入力が異なる場合はNone
+    """
+    if not has_synthesized_audio(digest, s3_key, local_file_path):
+        return None
+    return load_audio(s3_key, local_file_path)
+
+
+def load_audio(s3_key=None, local_file_path=None):
+    """
+    保存済みの音声を読み込む（合成ダイジェストは確認しない）
+
+    Returns:
+    bytes or None: 音声データ。存在しない場合はNone
+    """
+    if IS_LAMBDA:
+        s3_client = boto3.client('s3', region_name=AWS_REGION)
+        try:
+            return s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=s3_key)['Body'].read()
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return None
+            raise
+
+    if not os.path.exists(local_file_path):
+        return None
+    with open(local_file_path, 'rb') as f:
+        return f.read()
+
+
+def concat_audio(previous, addition, output_format):
+    """
+    保存済みの音声の後ろに新しく合成した音声をつなげる
+
+    MP3はフレームの連結でそのまま再生できる（先頭のID3v2タグは外すので、必要なら付け直す）。
+    Ogg Vorbisは連結したストリーム、PCMはサンプルの連結になる
+    """
+    if output_format == "mp3":
+        previous = previous[skip_id3v2(previous):]
+    return previous + addition
+
+
+def save_audio(data, content_type, digest, s3_key=None, local_file_path=None):
+    """
+    音声データを保存し、URL（ローカルではパス）を返す
+
+    S3には Cache-Control・内容ダイジェスト・合成ダイジェストを付けて書き込む
+    """
+    if IS_LAMBDA:
+        s3_client = boto3.client('s3', region_name=AWS_REGION)
+        with span("s3.put", "storage", key=s3_key, bytes=len(data)):
+            s3_client.put_object(
+                Bucket=S3_BUCKET_NAME, Key=s3_key, Body=data,
+                ContentType=content_type,
+                CacheControl=CACHE_CONTROL_EPISODE,
+                Metadata={DIGEST_METADATA_KEY: content_digest(data),
+                          SYNTHESIS_METADATA_KEY: digest})
+        return f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/{s3_key}"
+
+    # 親ディレクトリが存在しない場合は作成
+    os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
+    with open(local_file_path, 'wb') as file:
+        file.write(data)
+    with open(_digest_path(local_file_path), 'w', encoding="utf-8") as file:
+        file.write(digest)
+    return local_file_path
+
 
 def synthesize_unified_speech(text, s3_key=None, local_file_path=None, voice_id=POLLY_VOICE_ID):
     """
     テキストを一つの音声ファイルに合成し、S3またはローカルに保存する
 
+    同じテキスト・音声で合成済みのファイルがあれば、Pollyを呼ばずにそのURLを返す
+
     Parameters:
     text (str): 音声合成するテキスト
     s3_key (str, optional): S3に保存する際のキー（IS_LAMBDA=Trueの場合必須）
@@ -39,57 +228,32 @@ def synthesize_unified_speech(text, s3_key=None, local_file_path=None, voice_id=
             return None
 
         # テキスト長をチェック
-        MAX_POLLY_LENGTH = 3000  # Amazon Pollyの制限
+        text = truncate_for_polly(text)
 
-        if len(text) > MAX_POLLY_LENGTH:
-            logger.warning(
-                f"テキスト長({len(text)}文字)がPollyの制限を超えています。要約を短くするか記事数を減らしてください。")
-            # もしテキストが長すぎる場合、切り詰める（エラーよりはマシ）
-            logger.warning("テキストを3000文字に切り詰めて処理を続行します。")
-            # 「。」で区切り、最後にエンディングを追加
-            text = text[:MAX_POLLY_LENGTH].rsplit(
-                '。', 1)[0] + '。\n本日のニュースは以上です。\n明日もお楽しみに。'
+        # 同じ入力で合成済みなら再合成しない
+        digest = synthesis_digest(text, voice_id)
+        if has_synthesized_audio(digest, s3_key, local_file_path):
+            logger.info(f"合成済みの音声を再利用します: {s3_key or local_file_path}")
+            return (f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/{s3_key}"
+                    if IS_LAMBDA else local_file_path)
 
         # Pollyクライアントの初期化
         polly_client = boto3.client('polly', region_name=AWS_REGION)
 
         # 音声合成リクエスト
         logger.info(f"Pollyで音声合成開始 (Voice: {voice_id})")
-        response = polly_client.synthesize_speech(
+        audio_stream = polly_synthesize(
+            polly_client,
             Text=text,
             OutputFormat='mp3',
             VoiceId=voice_id,
             Engine='neural'
         )
 
-        # レスポンスから音声データを取得
-        if "AudioStream" in response:
-            audio_stream = response['AudioStream'].read()
-
-            # Lambda環境の場合はS3に保存
-            if IS_LAMBDA:
-                s3 = boto3.resource('s3')
-                s3.Object(S3_BUCKET_NAME, s3_key).put(
-                    Body=audio_stream,
-                    ContentType='audio/mp3'
-                )
-                audio_url = f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/{s3_key}"
-                logger.info(f"音声ファイルをS3に保存: {s3_key}")
-                return audio_url
-
-            # ローカル環境の場合はファイルに保存
-            else:
-                # 親ディレクトリが存在しない場合は作成
-                os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
-
-                with open(local_file_path, 'wb') as file:
-                    file.write(audio_stream)
-
-                logger.info(f"音声ファイルをローカルに保存: {local_file_path}")
-                return local_file_path
-        else:
-            logger.error("AudioStreamがレスポンスに含まれていません")
-            return None
+        # Lambda環境の場合はS3に、ローカル環境の場合はファイルに保存
+        audio_url = save_audio(audio_stream, 'audio/mp3', digest, s3_key, local_file_path)
+        logger.info(f"音声ファイルを保存: {s3_key or local_file_path}")
+        return audio_url
 
     except ClientError as e:
         logger.error(f"Polly API呼び出し中にエラー: {str(e)}")
@@ -99,6 +263,212 @@ def synthesize_unified_speech(text, s3_key=None, local_file_path=None, voice_id=
         return None
 
 
+def parse_rendition_profiles(spec=AUDIO_RENDITIONS):
+    """
+    レンディションの設定文字列を解析する
+
+    Parameters:
+    spec (str): "名前:出力形式:サンプリング周波数" のカンマ区切り（周波数は省略可）
+
+    Returns:
+    list: {"name", "format", "sample_rate"} のリスト（先頭がメインの音声）
+    """
+    profiles = []
+    for item in spec.split(","):
+        parts = [part.strip() for part in item.split(":")]
+        if not parts[0]:
+            continue
+        if len(parts) < 2 or parts[1] not in CONTENT_TYPES:
+            raise ValueError(f"レンディションの指定が不正です: {item}")
+        profiles.append({
+            "name": parts[0],
+            "format": parts[1],
+            "sample_rate": parts[2] if len(parts) > 2 and parts[2] else None
+        })
+    if not profiles:
+        raise ValueError("レンディションが1つも指定されていません")
+    return profiles
+
+
+def rendition_path(path, profile, primary):
+    """
+    メインの音声のパス/キーからレンディションのパス/キーを作る
+
+    メインの音声はそのまま、それ以外は "2025-01-01.low.mp3" のように名前を挟む
+    """
+    base, _ = os.path.splitext(path)
+    extension = EXTENSIONS[profile["format"]]
+    if primary:
+        return f"{base}.{extension}"
+    return f"{base}.{profile['name']}.{extension}"
+
+
+def _synthesize_rendition(polly_client, text, voice_id, profile, s3_key, local_file_path,
+                          audio_hook=None, primary=False):
+    """
+    1つのレンディションを合成して保存し、レンディション情報を返す
+
+    同じ入力で合成済みの音声があれば、Pollyを呼ばずにそれを使う
+    """
+    digest = synthesis_digest(text, voice_id, profile["format"], profile["sample_rate"])
+    stored = load_synthesized_audio(digest, s3_key, local_file_path)
+    if stored is not None:
+        logger.info(f"レンディション {profile['name']} は合成済みの音声を再利用します")
+        return _rendition_info(profile, stored, s3_key, local_file_path, digest,
+                               audio_hook, primary, stored=stored)
+
+    params = {
+        "Text": text,
+        "OutputFormat": profile["format"],
+        "VoiceId": voice_id,
+        "Engine": 'neural'
+    }
+    if profile["sample_rate"]:
+        params["SampleRate"] = profile["sample_rate"]
+
+    return _rendition_info(profile, polly_synthesize(polly_client, **params),
+                           s3_key, local_file_path, digest, audio_hook, primary)
+
+
+def _rendition_info(profile, audio_stream, s3_key, local_file_path, digest,
+                    audio_hook=None, primary=False, stored=None):
+    """追加の出力ステージを通して保存し、レンディション情報を返す（stored と同じ内容なら書き込まない）"""
+    content_type = CONTENT_TYPES[profile["format"]]
+
+    # 保存前の追加の出力ステージ（HLS分割など）。保存済みの音声に埋め込んだタグは置き換えられる
+    extra = {}
+    if audio_hook:
+        audio_stream, extra = audio_hook(
+            profile, audio_stream, s3_key or local_file_path, primary)
+
+    if audio_stream == stored:
+        url = (f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/{s3_key}"
+               if IS_LAMBDA else local_file_path)
+        logger.info(f"レンディション {profile['name']} は変更がないため書き込みません: {url}")
+    else:
+        url = save_audio(audio_stream, content_type, digest, s3_key, local_file_path)
+        logger.info(f"レンディション {profile['name']} を保存: {url}（{len(audio_stream)} bytes）")
+    info = {
+        "name": profile["name"],
+        "format": profile["format"],
+        "content_type": content_type,
+        "sample_rate": int(profile["sample_rate"]) if profile["sample_rate"] else None,
+        "url": url,
+        "size": len(audio_stream),
+        "bitrate": audio_bitrate(audio_stream, profile["format"], profile["sample_rate"]),
+        "duration": round(mp3_duration(audio_stream), 3) if profile["format"] == "mp3" else None
+    }
+    info.update(extra or {})
+    return info
+
+
+def synthesize_renditions(text, s3_key=None, local_file_path=None, voice_id=POLLY_VOICE_ID,
+                          profiles=None, audio_hook=None):
+    """
+    テキストを複数のレンディション（出力形式・サンプリング周波数）で並列に合成する
+
+    Parameters:
+    text (str): 音声合成するテキスト
+    s3_key (str, optional): メインの音声のS3キー（IS_LAMBDA=Trueの場合必須）
+    local_file_path (str, optional): メインの音声のローカルパス（IS_LAMBDA=Falseの場合必須）
+    voice_id (str, optional): Pollyの音声ID
+    profiles (list, optional): parse_rendition_profiles() の結果（省略時は AUDIO_RENDITIONS）
+    audio_hook (callable, optional): 保存前に (プロファイル, 音声データ, 保存先, メインか) を
+        受け取り、(保存する音声データ, レンディション情報に追加する辞書) を返す関数
+
+    Returns:
+    list: 合成できたレンディション（name, format, url, size, bitrate など）のリスト。
+        先頭のプロファイルがメインの音声で、失敗したレンディションは含まない
+    """
+    if IS_LAMBDA and not s3_key:
+        logger.error("Lambda環境ではs3_keyの指定が必須です")
+        return []
+    if not IS_LAMBDA and not local_file_path:
+        logger.error("ローカル環境ではlocal_file_pathの指定が必須です")
+        return []
+
+    profiles = profiles or parse_rendition_profiles()
+    text = truncate_for_polly(text)
+    polly_client = boto3.client('polly', region_name=AWS_REGION)
+
+    def _run(indexed_profile):
+        index, profile = indexed_profile
+        primary = index == 0
+        try:
+            return _synthesize_rendition(
+                polly_client, text, voice_id, profile,
+                rendition_path(s3_key, profile, primary) if s3_key else None,
+                rendition_path(local_file_path, profile, primary) if local_file_path else None,
+                audio_hook, primary)
+        except Exception as e:
+            logger.error(f"レンディション {profile['name']} の音声合成中にエラー: {str(e)}")
+            return None
+
+    logger.info(f"Pollyで{len(profiles)}種類のレンディションを並列に合成開始 (Voice: {voice_id})")
+    with ThreadPoolExecutor(max_workers=len(profiles)) as executor:
+        results = list(executor.map(_run, enumerate(profiles)))
+    return [r for r in results if r is not None]
+
+
+def append_renditions(text, s3_key=None, local_file_path=None, voice_id=POLLY_VOICE_ID,
+                      profiles=None, audio_hook=None):
+    """
+    テキストを合成し、保存済みの各レンディションの後ろに追加する
+
+    合成するのは追加するテキストだけで、既存の音声は再合成しない。
+    引数と戻り値は synthesize_renditions() と同じで、audio_hook には連結後の音声が渡される
+
+    Returns:
+    list: 追加できたレンディションのリスト（保存済みの音声が無いものは含まない）
+    """
+    if IS_LAMBDA and not s3_key:
+        logger.error("Lambda環境ではs3_keyの指定が必須です")
+        return []
+    if not IS_LAMBDA and not local_file_path:
+        logger.error("ローカル環境ではlocal_file_pathの指定が必須です")
+        return []
+
+    profiles = profiles or parse_rendition_profiles()
+    text = truncate_for_polly(text)
+    polly_client = boto3.client('polly', region_name=AWS_REGION)
+
+    def _run(indexed_profile):
+        index, profile = indexed_profile
+        primary = index == 0
+        key = rendition_path(s3_key, profile, primary) if s3_key else None
+        path = rendition_path(local_file_path, profile, primary) if local_file_path else None
+        try:
+            previous = load_audio(key, path)
+            if previous is None:
+                logger.error(f"レンディション {profile['name']} の保存済みの音声が無いため追加できません")
+                return None
+
+            params = {
+                "Text": text,
+                "OutputFormat": profile["format"],
+                "VoiceId": voice_id,
+                "Engine": 'neural'
+            }
+            if profile["sample_rate"]:
+                params["SampleRate"] = profile["sample_rate"]
+            addition = polly_synthesize(polly_client, **params)
+
+            # 連結後の音声の合成ダイジェストは、既存の音声の内容と追加したテキストから作る
+            digest = synthesis_digest(
+                f"{content_digest(previous)}\n{text}", voice_id,
+                profile["format"], profile["sample_rate"])
+            return _rendition_info(profile, concat_audio(previous, addition, profile["format"]),
+                                   key, path, digest, audio_hook, primary)
+        except Exception as e:
+            logger.error(f"レンディション {profile['name']} の追加合成中にエラー: {str(e)}")
+            return None
+
+    logger.info(f"Pollyで{len(profiles)}種類のレンディションに追加する音声を並列に合成開始 (Voice: {voice_id})")
+    with ThreadPoolExecutor(max_workers=len(profiles)) as executor:
+        results = list(executor.map(_run, enumerate(profiles)))
+    return [r for r in results if r is not None]
+
+
 def estimate_duration(text):
     """テキストから概算の音声時間を計算 (秒単位)"""
     # 日本語の場合、1文字あたり約0.2秒として概算
@@ -2,5 +2,10 @@
 
 from .article_id import create_article_id
 from .title_cleaner import clean_article_title
+from .near_duplicate import collapse_near_duplicates
 
-__all__ = ['create_article_id', 'clean_article_title']
\ No newline at end of file
+__all__ = [
+    'create_article_id',
+    'clean_article_title',
+    'collapse_near_duplicates'
+]
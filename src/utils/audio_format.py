@@ -0,0 +1,157 @@
+import struct
+
+# MPEGオーディオのビットレート表（kbps）: (MPEGバージョン1か, レイヤー) -> インデックス順の値
+_BITRATES = {
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+}
+
+# サンプリング周波数（Hz）: MPEGバージョンのビット値 -> インデックス順の値
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],   # MPEG-2.5
+}
+
+# 出力形式ごとの Content-Type と拡張子
+CONTENT_TYPES = {
+    "mp3": "audio/mpeg",
+    "ogg_vorbis": "audio/ogg",
+    "pcm": "audio/L16",
+}
+EXTENSIONS = {
+    "mp3": "mp3",
+    "ogg_vorbis": "ogg",
+    "pcm": "pcm",
+}
+
+
+def parse_mp3_frame_header(header):
+    """
+    MP3フレームヘッダー（4バイト）を解析する
+
+    Args:
+        header (bytes): フレーム先頭の4バイト
+
+    Returns:
+        dict or None: bitrate（bps）, sample_rate, frame_length, samples を持つ辞書。
+            フレームヘッダーでなければNone
+    """
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+
+    version_bits = (header[1] >> 3) & 0x03
+    layer_bits = (header[1] >> 1) & 0x03
+    bitrate_index = (header[2] >> 4) & 0x0F
+    sample_rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    is_mpeg1 = version_bits == 3
+    layer = 4 - layer_bits
+    bitrate = _BITRATES[(is_mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][sample_rate_index]
+
+    if layer == 1:
+        samples = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if (layer == 2 or is_mpeg1) else 576
+        frame_length = samples // 8 * bitrate // sample_rate + padding
+
+    return {
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "frame_length": frame_length,
+        "samples": samples,
+    }
+
+
+def skip_id3v2(data):
+    """先頭のID3v2タグの長さ（タグが無ければ0）を返す"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def iter_mp3_frames(data):
+    """
+    MP3データのフレームを先頭から順に返す（ID3v2タグや壊れたバイトは読み飛ばす）
+
+    Args:
+        data (bytes): MP3データ
+
+    Yields:
+        tuple: (フレームの開始位置, フレーム長, 再生時間（秒）)
+    """
+    offset = skip_id3v2(data)
+    length = len(data)
+    while offset + 4 <= length:
+        frame = parse_mp3_frame_header(data[offset:offset + 4])
+        if frame is None or frame["frame_length"] <= 0 or offset + frame["frame_length"] > length:
+            # 次の同期ワードまで進める
+            offset += 1
+            continue
+        yield offset, frame["frame_length"], frame["samples"] / frame["sample_rate"]
+        offset += frame["frame_length"]
+
+
+def mp3_duration(data):
+    """MP3データの再生時間（秒）をフレームから計算する"""
+    return sum(duration for _, _, duration in iter_mp3_frames(data))
+
+
+def mp3_bitrate(data):
+    """MP3データの最初のフレームのビットレート（bps）を返す。解析できなければNone"""
+    offset = skip_id3v2(data)
+    while offset + 4 <= len(data):
+        frame = parse_mp3_frame_header(data[offset:offset + 4])
+        if frame:
+            return frame["bitrate"]
+        offset += 1
+    return None
+
+
+def vorbis_nominal_bitrate(data):
+    """Ogg Vorbis の識別ヘッダーから公称ビットレート（bps）を返す。解析できなければNone"""
+    # 最初のOggページのセグメントテーブルの後に識別ヘッダーが続く
+    if len(data) < 27 or data[:4] != b"OggS":
+        return None
+    header_start = 27 + data[26]
+    packet = data[header_start:header_start + 30]
+    if len(packet) < 30 or packet[:7] != b"\x01vorbis":
+        return None
+    bitrate_nominal = struct.unpack("<i", packet[20:24])[0]
+    return bitrate_nominal if bitrate_nominal > 0 else None
+
+
+def audio_bitrate(data, output_format, sample_rate=None):
+    """
+    音声データのビットレート（bps）を返す
+
+    Args:
+        data (bytes): 音声データ
+        output_format (str): Pollyの出力形式（"mp3" / "ogg_vorbis" / "pcm"）
+        sample_rate (int, optional): pcm の場合のサンプリング周波数
+
+    Returns:
+        int or None: ビットレート。解析できなければNone
+    """
+    if output_format == "mp3":
+        return mp3_bitrate(data)
+    if output_format == "ogg_vorbis":
+        return vorbis_nominal_bitrate(data)
+    if output_format == "pcm" and sample_rate:
+        # Pollyの pcm は16bitモノラル
+        return int(sample_rate) * 16
+    return None
@@ -0,0 +1,345 @@
+import datetime
+import logging
+import threading
+
+from src.serialization import CACHE_CONTROL_STATE
+from src.storage import get_storage
+from src.config import (
+    AI_PROVIDER,
+    AUDIO_RENDITIONS,
+    CHAPTER_MARKERS,
+    CHAPTER_TIMING,
+    DAILY_BUDGET_USD,
+    ENGLISH_EDITION,
+    GEMINI_MODEL,
+    LLM_INPUT_PRICE_PER_1M_TOKENS,
+    LLM_OUTPUT_PRICE_PER_1M_TOKENS,
+    OPENAI_MODEL,
+    POLLY_PRICE_PER_1M_CHARS,
+    RUN_BUDGET_USD
+)
+
+logger = logging.getLogger(__name__)
+
+# モデルごとの料金（USD / 100万トークン、入力・出力）。LLM_*_PRICE_PER_1M_TOKENS で上書きできる
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "gemini-2.0-flash": (0.10, 0.40),
+}
+# 表に無いモデルの料金（高めに見積もる）
+FALLBACK_MODEL_PRICE = (2.50, 10.00)
+
+# 応答の長さが分からない呼び出しの出力トークン数の見積もり（要約の上限500文字程度）
+EXPECTED_OUTPUT_TOKENS = 600
+
+# 1エピソードで合成する最大文字数（Pollyの1回の上限）
+EPISODE_POLLY_CHARS = 3000
+
+
+class BudgetExceededError(Exception):
+    """呼び出しの見積もりが予算の残りを超える場合の例外"""
+
+
+def estimate_tokens(text):
+    """
+    テキストのトークン数を概算する
+
+    ASCIIは4文字で1トークン、それ以外（日本語など）は1文字1トークンとして数える
+    （実際のトークナイザーより多めになる）
+    """
+    text = text or ""
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def model_price(model):
+    """モデルの料金（USD / 100万トークン）を (入力, 出力) で返す"""
+    if LLM_INPUT_PRICE_PER_1M_TOKENS is not None and LLM_OUTPUT_PRICE_PER_1M_TOKENS is not None:
+        return LLM_INPUT_PRICE_PER_1M_TOKENS, LLM_OUTPUT_PRICE_PER_1M_TOKENS
+    return MODEL_PRICES.get(model, FALLBACK_MODEL_PRICE)
+
+
+def llm_cost(model, input_tokens, output_tokens):
+    """LLM呼び出しの料金（USD）"""
+    input_price, output_price = model_price(model)
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def polly_cost(characters):
+    """Polly（ニューラル音声）の料金（USD）。スピーチマークも文字数で課金される"""
+    return characters * POLLY_PRICE_PER_1M_CHARS / 1_000_000
+
+
+def current_model():
+    """要約・翻訳に使うモデル"""
+    return GEMINI_MODEL if AI_PROVIDER == "gemini" else OPENAI_MODEL
+
+
+class CostTracker:
+    """
+    実行中のLLMのトークン数・Pollyの文字数と料金を記録し、予算の残りを判断する
+
+    予算は実行ごと（run_budget）と1日あたり（daily_budget、過去の実行分は daily_spent）の
+    2つで、0以下は無制限として扱う。実際の使用量が分からない呼び出しは見積もりで記録する
+    """
+
+    def __init__(self, run_budget=RUN_BUDGET_USD, daily_budget=DAILY_BUDGET_USD, daily_spent=0.0):
+        """
+        Args:
+            run_budget (float): 1回の実行の予算（USD）
+            daily_budget (float): 1日の予算（USD）
+            daily_spent (float): 同じ日の過去の実行で使った金額（USD）
+        """
+        self.run_budget = run_budget
+        self.daily_budget = daily_budget
+        self.daily_spent = daily_spent
+        self.started_at = datetime.datetime.now()
+        self._lock = threading.Lock()
+        self._usage = {
+            "llm_calls": 0,
+            "llm_input_tokens": 0,
+            "llm_output_tokens": 0,
+            "llm_estimated_calls": 0,
+            "polly_calls": 0,
+            "polly_characters": 0
+        }
+        self._spent = 0.0
+
+    @property
+    def spent(self):
+        """この実行で使った金額（USD）"""
+        return self._spent
+
+    def remaining(self):
+        """
+        予算の残りを返す
+
+        Returns:
+            float: 実行・1日の予算のうち少ない方の残り（USD）。予算が無ければ無限大
+        """
+        remaining = float("inf")
+        if self.run_budget > 0:
+            remaining = min(remaining, self.run_budget - self._spent)
+        if self.daily_budget > 0:
+            remaining = min(remaining, self.daily_budget - self.daily_spent - self._spent)
+        return remaining
+
+    def can_afford(self, cost, reserve=0.0):
+        """cost（USD）を使っても reserve を残せるかを返す"""
+        return self.remaining() >= cost + reserve
+
+    def require(self, cost, label):
+        """
+        呼び出し前の見積もりが予算の残りに収まることを確認する
+
+        Raises:
+            BudgetExceededError: 収まらない場合
+        """
+        if not self.can_afford(cost):
+            raise BudgetExceededError(
+                f"{label} の見積もり ${cost:.4f} が予算の残り ${self.remaining():.4f} を超えます")
+
+    def record_llm(self, model, input_tokens, output_tokens, estimated=False):
+        """LLM呼び出しの使用量を記録する"""
+        cost = llm_cost(model, input_tokens, output_tokens)
+        with self._lock:
+            self._usage["llm_calls"] += 1
+            self._usage["llm_input_tokens"] += input_tokens
+            self._usage["llm_output_tokens"] += output_tokens
+            if estimated:
+                self._usage["llm_estimated_calls"] += 1
+            self._spent += cost
+        return cost
+
+    def record_polly(self, characters):
+        """Polly呼び出しの文字数を記録する"""
+        cost = polly_cost(characters)
+        with self._lock:
+            self._usage["polly_calls"] += 1
+            self._usage["polly_characters"] += characters
+            self._spent += cost
+        return cost
+
+    def report(self):
+        """
+        使用量と料金をまとめる
+
+        Returns:
+            dict: 使用量・料金（USD）・予算
+        """
+        with self._lock:
+            usage = dict(self._usage)
+            spent = self._spent
+        return {
+            "started_at": self.started_at.isoformat(),
+            **usage,
+            "cost_usd": round(spent, 6),
+            "run_budget_usd": self.run_budget,
+            "daily_budget_usd": self.daily_budget,
+            "daily_spent_usd": round(self.daily_spent + spent, 6)
+        }
+
+
+def estimate_summary_cost(article, max_input_chars=None):
+    """
+    記事1件の要約の料金（USD）を見積もる
+
+    Parameters:
+    article (dict): title, link, summary を持つ記事
+    max_input_chars (int, optional): 要約に渡す本文の最大文字数
+
+    Returns:
+    float: 見積もり（USD）
+    """
+    from src.process_article import SUMMARY_PROMPT_TEMPLATE, SUMMARY_SYSTEM_PROMPT
+
+    content = article.get("summary") or ""
+    if max_input_chars is not None:
+        content = content[:max_input_chars]
+    prompt = SUMMARY_PROMPT_TEMPLATE.format(
+        article_title=article.get("title", ""),
+        article_url=article.get("link", ""),
+        article_content=content)
+    input_tokens = estimate_tokens(SUMMARY_SYSTEM_PROMPT) + estimate_tokens(prompt)
+    return llm_cost(current_model(), input_tokens, EXPECTED_OUTPUT_TOKENS)
+
+
+def estimate_episode_cost():
+    """
+    1エピソードの音声合成（全レンディション・スピーチマーク・英語版）の料金（USD）を見積もる
+    """
+    renditions = len([spec for spec in AUDIO_RENDITIONS.split(",") if spec.strip()])
+    polly_chars = EPISODE_POLLY_CHARS * renditions
+    if CHAPTER_MARKERS and CHAPTER_TIMING == "speech_marks":
+        polly_chars += EPISODE_POLLY_CHARS
+    cost = polly_cost(polly_chars)
+    if ENGLISH_EDITION:
+        # 英語版はメインのレンディションのみ。翻訳は日本語の全文を入力、同程度を出力とみなす
+        tokens = estimate_tokens("あ" * EPISODE_POLLY_CHARS)
+        cost += polly_cost(EPISODE_POLLY_CHARS) + llm_cost(current_model(), tokens, tokens)
+    return cost
+
+
+def estimate_run_cost(program_articles):
+    """
+    選択した記事での実行の料金を見積もる（ドライラン）
+
+    Parameters:
+    program_articles (dict): {番組ID: 要約する記事のリスト}（program_runner.select_run_articles()）
+
+    Returns:
+    dict: {"programs": {番組ID: {"articles": [...], "summary_usd", "episode_usd"}}, "total_usd"}
+    """
+    episode_cost = estimate_episode_cost()
+
+    estimates = {}
+    # 同じURLの記事は実行内キャッシュで1回だけ要約する
+    summarized_links = set()
+    for program_id, selected in program_articles.items():
+        articles = []
+        for article in selected:
+            cached = article["link"] in summarized_links
+            summarized_links.add(article["link"])
+            articles.append({
+                "title": article["title"],
+                "source_id": article.get("source_id"),
+                "cost_usd": 0.0 if cached else estimate_summary_cost(article)
+            })
+        estimates[program_id] = {
+            "articles": articles,
+            "summary_usd": sum(a["cost_usd"] for a in articles),
+            "episode_usd": episode_cost if articles else 0.0
+        }
+
+    total = sum(e["summary_usd"] + e["episode_usd"] for e in estimates.values())
+    return {"programs": estimates, "total_usd": total}
+
+
+def daily_cost_key(day):
+    return f"data/costs/daily_{day:%Y-%m-%d}.json"
+
+
+_tracker = None
+
+
+def start_cost_tracking(storage=None):
+    """
+    料金の記録を開始する（同じ日の過去の実行の金額を読み込み、1日の予算に使う）
+
+    Returns:
+        CostTracker: 開始したトラッカー
+    """
+    global _tracker
+    daily_spent = 0.0
+    if DAILY_BUDGET_USD > 0:
+        storage = storage or get_storage()
+        daily = storage.get_json(daily_cost_key(datetime.date.today())) or {}
+        daily_spent = daily.get("cost_usd", 0.0)
+    _tracker = CostTracker(daily_spent=daily_spent)
+    if RUN_BUDGET_USD > 0 or DAILY_BUDGET_USD > 0:
+        logger.info(f"予算: 実行 ${RUN_BUDGET_USD or '-'}, 1日 ${DAILY_BUDGET_USD or '-'}"
+                    f"（本日の使用済み ${daily_spent:.4f}）")
+    return _tracker
+
+
+def get_cost_tracker():
+    """実行中のトラッカーを返す。開始していなければNone"""
+    return _tracker
+
+
+def stop_cost_tracking(storage=None):
+    """
+    料金の記録を終了し、1日の合計に加算して保存する
+
+    Returns:
+        dict or None: CostTracker.report() の結果。開始していなければNone
+    """
+    global _tracker
+    tracker, _tracker = _tracker, None
+    if tracker is None:
+        return None
+    report = tracker.report()
+    logger.info(
+        f"料金: ${report['cost_usd']:.4f}（LLM {report['llm_calls']}回 "
+        f"入力{report['llm_input_tokens']}/出力{report['llm_output_tokens']}トークン, "
+        f"Polly {report['polly_calls']}回 {report['polly_characters']}文字）")
+    if report["llm_calls"] or report["polly_calls"]:
+        storage = storage or get_storage()
+
+        def _add(daily):
+            daily = daily or {"cost_usd": 0.0, "runs": 0, "llm_input_tokens": 0,
+                              "llm_output_tokens": 0, "polly_characters": 0}
+            daily["cost_usd"] = round(daily["cost_usd"] + report["cost_usd"], 6)
+            daily["runs"] += 1
+            for field in ("llm_input_tokens", "llm_output_tokens", "polly_characters"):
+                daily[field] += report[field]
+            return daily
+
+        storage.update_json(daily_cost_key(tracker.started_at.date()), _add,
+                            cache_control=CACHE_CONTROL_STATE)
+    return report
+
+
+def record_llm_usage(model, input_tokens, output_tokens, estimated=False):
+    """実行中のトラッカーにLLMの使用量を記録する（開始していなければ何もしない）"""
+    tracker = _tracker
+    if tracker is not None:
+        tracker.record_llm(model, input_tokens, output_tokens, estimated)
+
+
+def record_polly_usage(characters):
+    """実行中のトラッカーにPollyの文字数を記録する（開始していなければ何もしない）"""
+    tracker = _tracker
+    if tracker is not None:
+        tracker.record_polly(characters)
+
+
+def require_budget(cost, label):
+    """実行中のトラッカーで予算を確認する（開始していなければ何もしない）"""
+    tracker = _tracker
+    if tracker is not None:
+        tracker.require(cost, label)
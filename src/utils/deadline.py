@@ -0,0 +1,130 @@
+import time
+import logging
+from contextlib import contextmanager
+
+from src.config import (
+    DEADLINE_PUBLISH_SECONDS,
+    DEADLINE_SAFETY_MARGIN_SECONDS,
+    DEADLINE_SUMMARY_SECONDS,
+    DEADLINE_SYNTHESIS_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+STAGE_SUMMARY = "summary"
+STAGE_SYNTHESIS = "synthesis"
+STAGE_PUBLISH = "publish"
+
+# 実測値が無い段階の所要時間の見積もり（秒）
+DEFAULT_STAGE_ESTIMATES = {
+    STAGE_SUMMARY: DEADLINE_SUMMARY_SECONDS,
+    STAGE_SYNTHESIS: DEADLINE_SYNTHESIS_SECONDS,
+    STAGE_PUBLISH: DEADLINE_PUBLISH_SECONDS
+}
+
+# 実測値で既定の見積もりより短くしない段階。公開は書き込みバッチに溜めるだけで、
+# 実際の書き込みは実行の最後の flush() で行うため、番組ごとの実測値は小さく出る
+FLOOR_STAGES = (STAGE_PUBLISH,)
+
+
+class Deadline:
+    """
+    実行の残り時間と段階ごとの所要時間から、次の処理を始めてよいかを判断する
+
+    Lambdaでは context.get_remaining_time_in_millis() を残り時間に使う。
+    段階（要約・音声合成・公開）の所要時間は実行中に計測し、実測値が
+    あれば見積もりをその最大値で置き換える（遅い日ほど慎重になる）
+    """
+
+    def __init__(self, remaining_millis=None, safety_margin=DEADLINE_SAFETY_MARGIN_SECONDS,
+                 estimates=None):
+        """
+        Args:
+            remaining_millis (callable, optional): 残り時間（ミリ秒）を返す関数。
+                省略時は期限なし（ローカル実行など）
+            safety_margin (float): 見積もりに上乗せする余裕（秒）
+            estimates (dict, optional): 段階ごとの既定の見積もり（秒）の上書き
+        """
+        self._remaining_millis = remaining_millis
+        self.safety_margin = safety_margin
+        self._estimates = {**DEFAULT_STAGE_ESTIMATES, **(estimates or {})}
+        self._durations = {}
+
+    @classmethod
+    def from_context(cls, context):
+        """Lambdaのcontextから作成する（context が無い場合は期限なし）"""
+        return cls(getattr(context, "get_remaining_time_in_millis", None))
+
+    def remaining(self):
+        """
+        残り時間を返す
+
+        Returns:
+            float: 残り時間（秒）。期限が無い場合は無限大
+        """
+        if self._remaining_millis is None:
+            return float("inf")
+        return self._remaining_millis() / 1000
+
+    def record(self, stage, seconds):
+        """段階の所要時間を記録する"""
+        self._durations.setdefault(stage, []).append(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        """with ブロックの所要時間を段階 name の実測値として記録する"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, time.monotonic() - started)
+
+    def estimate(self, stage):
+        """段階の所要時間の見積もり（秒）"""
+        default = self._estimates.get(stage, 0.0)
+        durations = self._durations.get(stage)
+        if not durations:
+            return default
+        if stage in FLOOR_STAGES:
+            return max(max(durations), default)
+        return max(durations)
+
+    def reserve_for(self, episodes):
+        """未公開のエピソード数ぶんの音声合成・公開に残しておく時間（秒）"""
+        return episodes * (self.estimate(STAGE_SYNTHESIS) + self.estimate(STAGE_PUBLISH))
+
+    def can_start(self, stage, reserve=0.0):
+        """
+        段階を始めても、reserve 秒を残して期限内に終わる見込みかを返す
+
+        Args:
+            stage (str): これから始める段階
+            reserve (float): 後続の処理のために残しておく時間（秒）
+
+        Returns:
+            bool: 始めてよい場合はTrue
+        """
+        remaining = self.remaining()
+        needed = self.estimate(stage) + reserve + self.safety_margin
+        if remaining >= needed:
+            return True
+        logger.warning(
+            f"残り時間 {remaining:.1f}秒 が必要な時間 {needed:.1f}秒"
+            f"（{stage}: {self.estimate(stage):.1f}秒, 予約: {reserve:.1f}秒）に足りません")
+        return False
+
+    def report(self):
+        """
+        段階ごとの計測結果を返す
+
+        Returns:
+            dict: {段階: {"count", "total", "max"}}（秒）
+        """
+        return {
+            stage: {
+                "count": len(durations),
+                "total": round(sum(durations), 3),
+                "max": round(max(durations), 3)
+            }
+            for stage, durations in self._durations.items()
+        }
@@ -0,0 +1,82 @@
+import struct
+
+# CHAP フレームでバイトオフセットを使わない場合の値
+NO_OFFSET = 0xFFFFFFFF
+
+# CTOC フレームのフラグ（トップレベル・順序あり）
+_CTOC_TOP_LEVEL = 0x02
+_CTOC_ORDERED = 0x01
+
+_ENCODING_UTF8 = b"\x03"
+
+
+def syncsafe(value):
+    """ID3v2の同期安全整数（7bit×4バイト）にエンコードする"""
+    return bytes([(value >> shift) & 0x7F for shift in (21, 14, 7, 0)])
+
+
+def _frame(frame_id, payload):
+    """ID3v2.4のフレームを作る"""
+    return frame_id.encode("ascii") + syncsafe(len(payload)) + b"\x00\x00" + payload
+
+
+def text_frame(frame_id, text):
+    """テキストフレーム（TIT2 など）をUTF-8で作る"""
+    return _frame(frame_id, _ENCODING_UTF8 + text.encode("utf-8") + b"\x00")
+
+
+def private_frame(owner, data):
+    """PRIV フレームを作る（owner は終端のNULを含むバイト列）"""
+    return _frame("PRIV", owner + data)
+
+
+def chap_frame(element_id, start_ms, end_ms, title,
+               start_offset=NO_OFFSET, end_offset=NO_OFFSET):
+    """
+    チャプター（CHAP）フレームを作る
+
+    Args:
+        element_id (str): チャプターのID（CTOC から参照する）
+        start_ms (int): 開始時刻（ミリ秒）
+        end_ms (int): 終了時刻（ミリ秒）
+        title (str): チャプターのタイトル（TIT2 サブフレームに入れる）
+        start_offset (int): ファイル先頭からの開始バイト位置
+        end_offset (int): ファイル先頭からの終了バイト位置
+
+    Returns:
+        bytes: CHAP フレーム
+    """
+    payload = (
+        element_id.encode("ascii") + b"\x00"
+        + struct.pack(">IIII", int(start_ms), int(end_ms), start_offset, end_offset)
+        + text_frame("TIT2", title)
+    )
+    return _frame("CHAP", payload)
+
+
+def ctoc_frame(element_id, child_ids, title=None):
+    """
+    目次（CTOC）フレームを作る
+
+    Args:
+        element_id (str): 目次のID
+        child_ids (list): チャプターのIDのリスト（再生順）
+        title (str, optional): 目次のタイトル
+
+    Returns:
+        bytes: CTOC フレーム
+    """
+    payload = (
+        element_id.encode("ascii") + b"\x00"
+        + bytes([_CTOC_TOP_LEVEL | _CTOC_ORDERED, len(child_ids)])
+        + b"".join(child_id.encode("ascii") + b"\x00" for child_id in child_ids)
+    )
+    if title:
+        payload += text_frame("TIT2", title)
+    return _frame("CTOC", payload)
+
+
+def build_tag(frames):
+    """フレームを連結してID3v2.4タグを作る"""
+    body = b"".join(frames)
+    return b"ID3\x04\x00\x00" + syncsafe(len(body)) + body
@@ -0,0 +1,234 @@
+import datetime
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# resource はPOSIXのみ（Windowsでは最大常駐メモリを記録しない）
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from src.serialization import CACHE_CONTROL_STATE
+from src.storage import get_storage
+from src.config import MEMORY_PROFILE_FRAMES, MEMORY_PROFILE_TOP
+
+logger = logging.getLogger(__name__)
+
+STAGE_FETCH = "fetch"
+STAGE_PARSE = "parse"
+STAGE_SUMMARIZE = "summarize"
+STAGE_CONTENT = "content_generation"
+STAGE_SYNTHESIS = "synthesis"
+STAGE_UPLOAD = "upload"
+
+# スナップショットから除外するフレーム（計測自体とインポート処理）
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def _max_rss_mb():
+    """プロセスの最大常駐メモリ（MB、Linuxの ru_maxrss はKB単位）"""
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+class _OpenStage:
+    """
+    実行中の段階（入れ子になった段階のピークを外側にも反映する）
+
+    スナップショットは重いため、最も外側の段階でだけ取る
+    """
+
+    def __init__(self, name, top_level):
+        self.name = name
+        self.start_current, _ = tracemalloc.get_traced_memory()
+        self.peak = self.start_current
+        self.snapshot = _snapshot() if top_level else None
+
+
+class MemoryProfiler:
+    """
+    tracemalloc で段階ごとのピーク・残存メモリと主な確保箇所を記録する
+
+    計測はプロセス全体（全スレッド）の確保量で行う。段階が入れ子の場合、
+    内側の段階のピークは外側の段階のピークにも含まれる。
+    確保箇所はスナップショットの比較で求めるため、最も外側の段階でだけ記録する
+    （記事・フィードごとの入れ子の段階はピーク・残存メモリだけを記録する）
+    """
+
+    def __init__(self, top=MEMORY_PROFILE_TOP, nframes=MEMORY_PROFILE_FRAMES):
+        """
+        Args:
+            top (int): 段階ごとに記録する確保箇所の数
+            nframes (int): 確保箇所として記録するスタックの深さ
+        """
+        self.top = top
+        self.nframes = nframes
+        self.started_at = None
+        self._stages = {}
+        self._stack = []
+        self._lock = threading.RLock()
+
+    def start(self):
+        """計測を開始する"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframes)
+        self.started_at = datetime.datetime.now()
+        logger.info("メモリプロファイルを開始しました")
+
+    def _fold_peak(self):
+        """現在までのピークを実行中の全段階に反映し、ピークをリセットする"""
+        _, peak = tracemalloc.get_traced_memory()
+        for open_stage in self._stack:
+            open_stage.peak = max(open_stage.peak, peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name):
+        """with ブロックのメモリ使用量を段階 name として記録する"""
+        with self._lock:
+            self._fold_peak()
+            open_stage = _OpenStage(name, top_level=not self._stack)
+            self._stack.append(open_stage)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._fold_peak()
+                self._stack.remove(open_stage)
+                current, _ = tracemalloc.get_traced_memory()
+                sites = []
+                if open_stage.snapshot is not None:
+                    sites = _snapshot().compare_to(open_stage.snapshot, "traceback")
+                self._record(open_stage, current, sites)
+
+    def _record(self, open_stage, current, sites):
+        stats = self._stages.setdefault(open_stage.name, {
+            "count": 0,
+            "peak_bytes": 0,
+            "retained_bytes": 0,
+            "sites": {}
+        })
+        stats["count"] += 1
+        # ピークは段階の開始時点からの増加分の最大値、残存は終了時点での増加分の合計
+        stats["peak_bytes"] = max(stats["peak_bytes"], open_stage.peak - open_stage.start_current)
+        stats["retained_bytes"] += current - open_stage.start_current
+        for site in sites:
+            if site.size_diff <= 0:
+                continue
+            key = " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in site.traceback)
+            entry = stats["sites"].setdefault(key, {"size_bytes": 0, "count": 0})
+            entry["size_bytes"] += site.size_diff
+            entry["count"] += site.count_diff
+
+    def report(self, memory_limit_mb=None):
+        """
+        計測結果をレポートにまとめる
+
+        Args:
+            memory_limit_mb (int, optional): 関数のメモリ上限（Lambdaの memory_limit_in_mb）
+
+        Returns:
+            dict: 段階ごとのピーク・残存メモリと主な確保箇所を含むレポート
+        """
+        with self._lock:
+            current, _ = tracemalloc.get_traced_memory()
+            stages = {}
+            for name, stats in self._stages.items():
+                sites = sorted(stats["sites"].items(),
+                               key=lambda item: item[1]["size_bytes"], reverse=True)
+                stages[name] = {
+                    "count": stats["count"],
+                    "peak_bytes": stats["peak_bytes"],
+                    "retained_bytes": stats["retained_bytes"],
+                    "top_allocations": [
+                        {"site": site, **entry} for site, entry in sites[:self.top]
+                    ]
+                }
+        return {
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": datetime.datetime.now().isoformat(),
+            "memory_limit_mb": memory_limit_mb,
+            "max_rss_mb": _max_rss_mb(),
+            "traced_current_bytes": current,
+            "stages": stages
+        }
+
+    def stop(self):
+        """計測を終了する"""
+        tracemalloc.stop()
+
+
+_active_profiler = None
+
+
+def start_memory_profile(top=MEMORY_PROFILE_TOP, nframes=MEMORY_PROFILE_FRAMES):
+    """
+    プロセス全体のメモリプロファイルを開始する（profile_stage() が計測を始める）
+
+    Returns:
+        MemoryProfiler: 開始したプロファイラー
+    """
+    global _active_profiler
+    _active_profiler = MemoryProfiler(top, nframes)
+    _active_profiler.start()
+    return _active_profiler
+
+
+def stop_memory_profile(memory_limit_mb=None):
+    """
+    メモリプロファイルを終了してレポートを返す
+
+    Returns:
+        dict or None: MemoryProfiler.report() の結果。開始していなければNone
+    """
+    global _active_profiler
+    profiler, _active_profiler = _active_profiler, None
+    if profiler is None:
+        return None
+    report = profiler.report(memory_limit_mb)
+    profiler.stop()
+    for name, stats in report["stages"].items():
+        logger.info(
+            f"メモリ [{name}] {stats['count']}回, ピーク {stats['peak_bytes'] / 2**20:.1f}MB, "
+            f"残存 {stats['retained_bytes'] / 2**20:.1f}MB")
+    logger.info(f"最大常駐メモリ: {report['max_rss_mb']}MB"
+                f"（上限: {memory_limit_mb or '-'}MB）")
+    return report
+
+
+def save_memory_report(report, storage=None):
+    """
+    レポートを実行の出力と同じ data/ 以下に保存する
+
+    Returns:
+        str: 保存したキー（data/profiles/memory_YYYYMMDD-HHMMSS.json）
+    """
+    storage = storage or get_storage()
+    started_at = datetime.datetime.fromisoformat(report["started_at"])
+    key = f"data/profiles/memory_{started_at:%Y%m%d-%H%M%S}.json"
+    storage.put_json(key, report, cache_control=CACHE_CONTROL_STATE)
+    logger.info(f"メモリプロファイルを保存しました: {key}")
+    return key
+
+
+@contextmanager
+def profile_stage(name):
+    """メモリプロファイルの実行中は with ブロックを段階 name として計測する（それ以外は何もしない）"""
+    profiler = _active_profiler
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name):
+        yield
@@ -0,0 +1,203 @@
+import hashlib
+import logging
+import re
+import unicodedata
+
+from .title_cleaner import clean_article_title
+
+logger = logging.getLogger(__name__)
+
+SIMHASH_BITS = 64
+# 64bitを16bitずつ4バンドに分割する
+# ハミング距離がバンド数未満なら、鳩の巣原理で少なくとも1バンドは完全一致する
+SIMHASH_BANDS = 4
+SHINGLE_SIZE = 3
+
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+# 空白・句読点・記号を除去して表記揺れを吸収する
+_NOISE_PATTERN = re.compile(r'[\s\W_]+', re.UNICODE)
+
+
+def normalize_text(text):
+    """
+    シングル生成用にテキストを正規化する
+
+    Args:
+        text (str): 元のテキスト（HTMLを含んでもよい）
+
+    Returns:
+        str: NFKC正規化・小文字化し、タグと記号を除去したテキスト
+    """
+    if not text:
+        return ""
+    text = _TAG_PATTERN.sub(' ', text)
+    text = unicodedata.normalize('NFKC', text).lower()
+    return _NOISE_PATTERN.sub('', text)
+
+
+def _shingles(text, size=SHINGLE_SIZE):
+    """文字n-gramのシングル集合を返す（日本語は単語境界がないため文字単位）"""
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def compute_simhash(text):
+    """
+    正規化済みテキストの文字シングルから64bitのSimHashを計算する
+
+    Args:
+        text (str): normalize_text() 済みのテキスト
+
+    Returns:
+        int: 64bitのSimHash値
+    """
+    weights = [0] * SIMHASH_BITS
+    for shingle in _shingles(text):
+        digest = hashlib.blake2b(
+            shingle.encode('utf-8'), digest_size=8).digest()
+        value = int.from_bytes(digest, 'big')
+        for bit in range(SIMHASH_BITS):
+            if value >> bit & 1:
+                weights[bit] += 1
+            else:
+                weights[bit] -= 1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    """2つのSimHash値のハミング距離"""
+    return bin(a ^ b).count('1')
+
+
+def _band_keys(fingerprint):
+    band_width = SIMHASH_BITS // SIMHASH_BANDS
+    mask = (1 << band_width) - 1
+    return [(band, fingerprint >> (band * band_width) & mask)
+            for band in range(SIMHASH_BANDS)]
+
+
+def article_fingerprint(article):
+    """
+    記事のクリーニング済みタイトルと概要からSimHashを計算する
+
+    Args:
+        article (dict): fetch_rss() が返す記事
+
+    Returns:
+        tuple: (正規化タイトル, SimHash値)
+    """
+    title = normalize_text(clean_article_title(article.get('title', '')))
+    summary = normalize_text(article.get('summary', ''))
+    return title, compute_simhash(title + summary)
+
+
+def _from_other_feed(article, other):
+    """2つの記事が別のフィードのものか（source_id が無い記事は別のフィードとみなす）"""
+    source_id = article.get('source_id')
+    other_source_id = other.get('source_id')
+    return source_id is None or other_source_id is None or source_id != other_source_id
+
+
+def collapse_near_duplicates(articles, max_distance=3, priority_key=None):
+    """
+    フィードをまたいだ近似重複記事をまとめ、優先度の最も高い1件だけを残す
+
+    候補記事をSimHashのバンドごとのバケットに振り分け、同じバケットに入った
+    記事同士だけを比較するため、候補数に対して線形時間で動作する。
+    クリーニング後のタイトルが完全一致する記事も重複とみなす。
+    同じフィード（source_id）の記事同士はまとめない（連載・定期コラムの同じタイトルを残す）。
+
+    Args:
+        articles (list): 記事のリスト
+        max_distance (int): 重複とみなすハミング距離の上限（SIMHASH_BANDS未満）
+        priority_key (callable, optional): 記事の優先度を返す関数（小さいほど優先）。
+            省略時は入力順を優先度とする
+
+    Returns:
+        tuple: (残した記事のリスト（入力順）, [(除外した記事, 残した記事), ...])
+    """
+    if max_distance >= SIMHASH_BANDS:
+        logger.warning(
+            f"max_distance({max_distance})がバンド数以上のため"
+            f"{SIMHASH_BANDS - 1}に制限します")
+        max_distance = SIMHASH_BANDS - 1
+
+    order = list(range(len(articles)))
+    if priority_key is not None:
+        order.sort(key=lambda i: priority_key(articles[i]))
+
+    kept_indexes = set()
+    duplicates = []
+    fingerprints = {}
+    title_index = {}
+    buckets = {}
+
+    for i in order:
+        article = articles[i]
+        title, fingerprint = article_fingerprint(article)
+
+        match = None
+        if title:
+            match = next((j for j in title_index.get(title, ())
+                          if _from_other_feed(article, articles[j])), None)
+        if match is None:
+            for key in _band_keys(fingerprint):
+                for j in buckets.get(key, ()):
+                    if (hamming_distance(fingerprint, fingerprints[j]) <= max_distance
+                            and _from_other_feed(article, articles[j])):
+                        match = j
+                        break
+                if match is not None:
+                    break
+
+        if match is not None:
+            duplicates.append((article, articles[match]))
+            logger.info(
+                f"近似重複記事を除外: {article.get('title', '')[:30]}... "
+                f"(残す記事: {articles[match].get('title', '')[:30]}...)")
+            continue
+
+        kept_indexes.add(i)
+        fingerprints[i] = fingerprint
+        if title:
+            title_index.setdefault(title, []).append(i)
+        for key in _band_keys(fingerprint):
+            buckets.setdefault(key, []).append(i)
+
+    kept = [article for i, article in enumerate(articles) if i in kept_indexes]
+    logger.info(
+        f"近似重複検出完了: {len(articles)}件中{len(duplicates)}件を除外")
+    return kept, duplicates
+
+
+# テスト用
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    sample_articles = [
+        {
+            "id": "a",
+            "title": "NVIDIA時価総額、世界初の4兆ドル突破　AI成長期待で - 日本経済新聞",
+            "summary": "米半導体大手NVIDIAの時価総額が初めて4兆ドルを超えた。"
+        },
+        {
+            "id": "b",
+            "title": "NVIDIA時価総額、世界初の4兆ドル突破 AI成長期待で",
+            "summary": "米半導体大手NVIDIAの時価総額が初めて4兆ドルを超えた"
+        },
+        {
+            "id": "c",
+            "title": "Google、新たなAI技術を発表【ITmedia NEWS】",
+            "summary": "Googleは開発者向けイベントで新しいAIモデルを発表した。"
+        },
+    ]
+
+    kept, dropped = collapse_near_duplicates(sample_articles)
+    print(f"残した記事: {[a['id'] for a in kept]}")
+    print(f"除外した記事: {[(d['id'], k['id']) for d, k in dropped]}")
@@ -0,0 +1,66 @@
+import threading
+import time
+import logging
+
+from src.utils.trace import span
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    スレッドセーフなトークンバケット方式のレートリミッター
+
+    複数スレッドから共有し、外部API（LLM・Polly）の呼び出し回数を
+    プロセス全体で rate_per_second 以下に抑える
+    """
+
+    def __init__(self, rate_per_second, burst=1, name="rate_limiter"):
+        """
+        Args:
+            rate_per_second (float): 1秒あたりの許可数（0以下なら無制限）
+            burst (int): 連続して許可できる最大数
+            name (str): ログ用の名前
+        """
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self.name = name
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        トークンを1つ取得する（取得できるまでブロックする）
+
+        Returns:
+            float: 待機した秒数
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    if waited:
+                        logger.debug(f"{self.name}: {waited:.2f}秒待機しました")
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def __enter__(self):
+        # 待ち時間がタイムライン上で見えるよう、取得までをスパンとして記録する
+        with span(f"{self.name}.wait", "rate_limiter"):
+            self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
@@ -0,0 +1,169 @@
+import datetime
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from src.serialization import CACHE_CONTROL_STATE
+
+logger = logging.getLogger(__name__)
+
+
+class _NullSpan:
+    """トレースが無効な場合に返す何もしないスパン"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    スパンを Chrome trace event 形式（Perfetto / chrome://tracing で開ける）で記録する
+
+    スパンは開始・終了時刻とスレッドを持つ完了イベント（"ph": "X"）として記録するため、
+    スレッドをまたいだ並列処理の重なりや待ち時間がタイムラインで見える
+    """
+
+    def __init__(self):
+        self.started_at = datetime.datetime.now()
+        self._origin_ns = time.perf_counter_ns()
+        self._events = []
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def _thread_id(self):
+        ident = threading.get_ident()
+        tid = self._threads.get(ident)
+        if tid is None:
+            with self._lock:
+                tid = self._threads.setdefault(ident, len(self._threads) + 1)
+                self._events.append({
+                    "ph": "M", "name": "thread_name", "pid": os.getpid(), "tid": tid,
+                    "args": {"name": threading.current_thread().name}
+                })
+        return tid
+
+    def _now_us(self):
+        return (time.perf_counter_ns() - self._origin_ns) / 1000
+
+    @contextmanager
+    def span(self, name, category, args):
+        tid = self._thread_id()
+        start = self._now_us()
+        try:
+            yield
+        finally:
+            event = {
+                "ph": "X", "name": name, "cat": category,
+                "ts": round(start, 1), "dur": round(self._now_us() - start, 1),
+                "pid": os.getpid(), "tid": tid
+            }
+            if args:
+                event["args"] = args
+            # list.append はスレッドセーフ
+            self._events.append(event)
+
+    def export(self):
+        """
+        記録したイベントを Chrome trace event 形式の辞書にする
+
+        Returns:
+            dict: {"traceEvents": [...], "displayTimeUnit": "ms", ...}
+        """
+        return {
+            "traceEvents": list(self._events),
+            "displayTimeUnit": "ms",
+            "otherData": {"started_at": self.started_at.isoformat()}
+        }
+
+
+_tracer = None
+
+
+def span(name, category="pipeline", **args):
+    """
+    処理区間をスパンとして記録するコンテキストマネージャーを返す
+
+    トレースが無効な場合は共有の何もしないオブジェクトを返すため、
+    呼び出し側は常に with span(...) と書いてよい
+
+    Args:
+        name (str): スパン名（例: "process_article"）
+        category (str): 分類（Perfettoでの絞り込みに使う）
+        **args: スパンに付ける情報（JSONにできる値）
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, category, args)
+
+
+def traced(name=None, category="pipeline"):
+    """関数の呼び出しをスパンとして記録するデコレーター"""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.span(span_name, category, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_trace():
+    """
+    トレースを開始する（以降の span() が記録される）
+
+    Returns:
+        Tracer: 開始したトレーサー
+    """
+    global _tracer
+    _tracer = Tracer()
+    logger.info("トレースを開始しました")
+    return _tracer
+
+
+def stop_trace():
+    """
+    トレースを終了して Chrome trace event 形式の辞書を返す
+
+    Returns:
+        dict or None: Tracer.export() の結果。開始していなければNone
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is None:
+        return None
+    return tracer.export()
+
+
+def save_trace(trace, storage=None):
+    """
+    トレースを実行の出力と同じ data/ 以下に保存する
+
+    Perfetto・chrome://tracing でそのまま開けるよう、JSON_CONTENT_ENCODING に
+    関係なく非圧縮で保存する
+
+    Returns:
+        str: 保存したキー（data/traces/trace_YYYYMMDD-HHMMSS.json）
+    """
+    # storage の書き込み自体もスパンで記録するため、ここで遅延インポートする
+    from src.storage import get_storage
+
+    storage = storage or get_storage()
+    started_at = datetime.datetime.fromisoformat(trace["otherData"]["started_at"])
+    key = f"data/traces/trace_{started_at:%Y%m%d-%H%M%S}.json"
+    storage.put_json(key, trace, cache_control=CACHE_CONTROL_STATE, content_encoding="")
+    logger.info(f"トレースを保存しました: {key}（{len(trace['traceEvents'])}イベント）")
+    return key
@@ -0,0 +1,15 @@
+import pytest
+
+# MPEG-1 Layer III, 128kbps, 44.1kHz, パディングなしのフレームヘッダー（417バイト、1152サンプル）
+MP3_FRAME_HEADER = b"\xff\xfb\x90\x00"
+MP3_FRAME_LENGTH = 417
+MP3_FRAME_SECONDS = 1152 / 44100
+
+
+@pytest.fixture
+def make_mp3():
+    """count フレームの無音のMP3データを作る関数"""
+    def _make(count):
+        frame = MP3_FRAME_HEADER + b"\x00" * (MP3_FRAME_LENGTH - len(MP3_FRAME_HEADER))
+        return frame * count
+    return _make
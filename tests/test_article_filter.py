@@ -0,0 +1,85 @@
+"""フィルタールールのコンパイルと照合のテスト"""
+import json
+
+import pytest
+
+from src.article_filter import ArticleFilter, filter_articles, load_filter_rules
+
+RULES = [
+    {"name": "github", "url_prefixes": ["https://github.com/"]},
+    {"name": "gist", "url_prefixes": ["https://github.com/gist"]},
+    {"name": "paywall", "domains": ["paywall.example.com", ".news.example"]},
+    {"name": "pr", "title_patterns": ["^[【\\[]PR[】\\]]"], "summary_patterns": ["提供[:：]"]},
+    {"name": "jobs", "title_patterns": ["(?P<role>エンジニア)募集"]},
+    {"name": "too_short", "min_content_length": 5},
+]
+
+
+def _article(title="記事", link="https://example.com/a", summary="十分な長さの本文です"):
+    return {"title": title, "link": link, "summary": summary}
+
+
+@pytest.fixture
+def article_filter():
+    return ArticleFilter(RULES)
+
+
+@pytest.mark.parametrize("article, rule", [
+    (_article(link="https://github.com/org/repo"), "github"),
+    # 同じ経路のプレフィックスは短い方のルールが先に当たる
+    (_article(link="https://github.com/gist/1"), "github"),
+    (_article(link="https://paywall.example.com/x"), "paywall"),
+    (_article(link="https://www.news.example/x"), "paywall"),
+    (_article(title="【PR】新製品"), "pr"),
+    (_article(title="[pr] 新製品"), "pr"),
+    (_article(summary="この記事は提供：某社です"), "pr"),
+    (_article(title="インフラエンジニア募集"), "jobs"),
+    (_article(summary="短い"), "too_short"),
+    (_article(), None),
+    (_article(link="https://example.com/github.com/"), None),
+])
+def test_match_returns_the_rule_name(article_filter, article, rule):
+    assert article_filter.match(article) == rule
+
+
+def test_min_length_ignores_tags_and_prefers_content(article_filter):
+    assert article_filter.match(_article(summary="<p><b>a</b></p>")) == "too_short"
+    article = dict(_article(summary="短い"), content="本文は十分な長さがある")
+    assert article_filter.match(article) is None
+
+
+@pytest.mark.parametrize("rules, message", [
+    ([{"name": "bad", "title_patterns": ["("]}], "title_patterns が不正"),
+    ([{"name": "ref", "title_patterns": ["(a)\\1"]}], "後方参照"),
+    ([{"name": "a"}, {"name": "a"}], "重複"),
+    ([{"title_patterns": ["x"]}], "未指定"),
+    ([{"name": "a", "title_patterns": ["(?P<g>x)"]},
+      {"name": "b", "title_patterns": ["(?P<g>y)"]}], "まとめられません"),
+])
+def test_invalid_rules_are_rejected(rules, message):
+    with pytest.raises(ValueError, match=message):
+        ArticleFilter(rules)
+
+
+def test_escaped_backslash_before_digit_is_allowed():
+    assert ArticleFilter([{"name": "path", "title_patterns": ["C:\\\\1"]}]).match(
+        _article(title="C:\\1")) == "path"
+
+
+def test_filter_articles_counts_hits_per_rule(article_filter):
+    articles = [_article(link="https://github.com/a"), _article(link="https://github.com/b"),
+                _article(title="【PR】x"), _article()]
+
+    kept, hits = filter_articles(articles, article_filter)
+
+    assert kept == [articles[3]]
+    assert hits == {"github": 2, "pr": 1}
+
+
+def test_load_filter_rules_from_file_and_default(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [{"name": "x", "domains": ["x.example"]}]}),
+                    encoding="utf-8")
+
+    assert load_filter_rules(str(path)).rule_names == ["x"]
+    assert load_filter_rules(str(tmp_path / "missing.json")).rule_names == ["github"]
@@ -0,0 +1,69 @@
+"""LLM・Pollyの予算による要約の打ち切りのテスト"""
+import pytest
+
+from src.config import BUDGET_REDUCED_INPUT_CHARS
+from src.program_runner import fit_article_to_budget
+from src.utils.cost import (
+    BudgetExceededError,
+    CostTracker,
+    estimate_episode_cost,
+    estimate_summary_cost,
+    polly_cost
+)
+
+PROGRAM = {"id": "test"}
+ARTICLE = {
+    "id": "a",
+    "title": "長い記事",
+    "link": "https://example.com/a",
+    "summary": "本文" * BUDGET_REDUCED_INPUT_CHARS
+}
+
+
+def _tracker_with_room(cost):
+    """エピソード1件の音声合成を残して cost だけ使える予算のトラッカー"""
+    return CostTracker(run_budget=estimate_episode_cost() + cost, daily_budget=0)
+
+
+def test_remaining_is_the_smaller_of_run_and_daily_budget():
+    assert CostTracker(run_budget=0, daily_budget=0).remaining() == float("inf")
+    tracker = CostTracker(run_budget=1.0, daily_budget=2.0, daily_spent=1.5)
+    tracker.record_polly(10_000)
+    assert tracker.remaining() == pytest.approx(0.5 - polly_cost(10_000))
+
+
+def test_require_raises_when_the_estimate_exceeds_the_budget():
+    tracker = CostTracker(run_budget=0.01, daily_budget=0)
+    tracker.require(0.01, "llm")
+    with pytest.raises(BudgetExceededError):
+        tracker.require(0.02, "llm")
+
+
+def test_article_is_summarized_in_full_when_affordable():
+    tracker = _tracker_with_room(estimate_summary_cost(ARTICLE))
+
+    article, affordable = fit_article_to_budget(PROGRAM, ARTICLE, tracker, pending_episodes=1)
+
+    assert affordable
+    assert article is ARTICLE
+
+
+def test_article_body_is_shortened_when_only_the_reduced_summary_fits():
+    reduced = estimate_summary_cost(ARTICLE, BUDGET_REDUCED_INPUT_CHARS)
+    assert reduced < estimate_summary_cost(ARTICLE)
+    tracker = _tracker_with_room(reduced)
+
+    article, affordable = fit_article_to_budget(PROGRAM, ARTICLE, tracker, pending_episodes=1)
+
+    assert affordable
+    assert len(article["summary"]) == BUDGET_REDUCED_INPUT_CHARS
+    assert len(ARTICLE["summary"]) > BUDGET_REDUCED_INPUT_CHARS
+
+
+def test_article_is_cut_off_when_the_episode_cost_must_be_kept():
+    tracker = _tracker_with_room(estimate_summary_cost(ARTICLE))
+
+    # 音声合成するエピソードが増えると、その分を残すため要約できない
+    _, affordable = fit_article_to_budget(PROGRAM, ARTICLE, tracker, pending_episodes=2)
+
+    assert not affordable
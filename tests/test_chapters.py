@@ -0,0 +1,85 @@
+"""ID3v2のCHAP/CTOCフレームを書き込むチャプターのテスト"""
+import struct
+
+from src.chapters import build_chapters, embed_chapters, estimate_section_times
+from src.utils.audio_format import skip_id3v2
+from src.utils.id3 import NO_OFFSET, build_tag, chap_frame, syncsafe, text_frame
+
+from tests.conftest import MP3_FRAME_LENGTH
+
+
+def _unsyncsafe(data):
+    value = 0
+    for byte in data:
+        value = (value << 7) | (byte & 0x7F)
+    return value
+
+
+def _frames(tag):
+    """ID3v2.4タグのフレームを (ID, ペイロード) のリストにする"""
+    body = tag[10:10 + _unsyncsafe(tag[6:10])]
+    frames = []
+    offset = 0
+    while offset + 10 <= len(body):
+        frame_id = body[offset:offset + 4].decode("ascii")
+        size = _unsyncsafe(body[offset + 4:offset + 8])
+        frames.append((frame_id, body[offset + 10:offset + 10 + size]))
+        offset += 10 + size
+    return frames
+
+
+def _chap(payload):
+    element_id, _, rest = payload.partition(b"\x00")
+    start_ms, end_ms, start_offset, end_offset = struct.unpack(">IIII", rest[:16])
+    (_, title_payload), = _frames(b"ID3\x04\x00\x00" + syncsafe(len(rest) - 16) + rest[16:])
+    title = title_payload[1:].rstrip(b"\x00").decode("utf-8")
+    return element_id.decode("ascii"), start_ms, end_ms, start_offset, end_offset, title
+
+
+def test_syncsafe_uses_seven_bits_per_byte():
+    assert syncsafe(0x7F) == b"\x00\x00\x00\x7f"
+    assert syncsafe(0x80) == b"\x00\x00\x01\x00"
+    assert _unsyncsafe(syncsafe(123456)) == 123456
+
+
+def test_chap_frame_layout():
+    frame = chap_frame("chp0", 0, 1500, "記事")
+    (frame_id, payload), = _frames(build_tag([frame]))
+
+    assert frame_id == "CHAP"
+    assert _chap(payload) == ("chp0", 0, 1500, NO_OFFSET, NO_OFFSET, "記事")
+
+
+def test_embed_chapters_writes_toc_chapters_and_byte_ranges(make_mp3):
+    audio = make_mp3(100)  # 約2.6秒
+    sections = [{"article_id": "a", "title": "一つ目", "start": 0},
+                {"article_id": "b", "title": "二つ目", "start": 50}]
+    chapters = build_chapters(sections, estimate_section_times("x" * 100, sections, 2600), 2600)
+
+    tagged, byte_ranges = embed_chapters(audio, chapters, title="エピソード")
+
+    tag_length = skip_id3v2(tagged)
+    assert tagged[tag_length:] == audio
+    frames = _frames(tagged[:tag_length])
+    assert [frame_id for frame_id, _ in frames] == ["TIT2", "CTOC", "CHAP", "CHAP"]
+    assert frames[1][1].startswith(b"toc\x00\x03\x02chp0\x00chp1\x00")
+
+    first = _chap(frames[2][1])
+    second = _chap(frames[3][1])
+    assert first[:3] == ("chp0", 0, 1300) and first[5] == "一つ目"
+    assert second[:3] == ("chp1", 1300, 2600)
+    # チャプターの開始バイトはフレーム境界で、バイト範囲と一致する
+    assert (first[3] - tag_length) % MP3_FRAME_LENGTH == 0
+    assert byte_ranges == [[first[3], first[4] - 1], [second[3], second[4] - 1]]
+    assert byte_ranges[-1][1] == len(tagged) - 1
+
+
+def test_embed_chapters_replaces_existing_tag(make_mp3):
+    audio = make_mp3(10)
+    old = build_tag([text_frame("TIT2", "古いタイトル")]) + audio
+    chapters = [{"article_id": "a", "title": "t", "start_ms": 0, "end_ms": 261}]
+
+    tagged, _ = embed_chapters(old, chapters)
+
+    assert tagged[skip_id3v2(tagged):] == audio
+    assert "古いタイトル".encode("utf-8") not in tagged
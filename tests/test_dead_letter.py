@@ -0,0 +1,84 @@
+"""要約に失敗した記事の再試行（指数バックオフ）のテスト"""
+from datetime import datetime, timedelta
+
+from src.config import DEAD_LETTER_BACKOFF_MINUTES, DEAD_LETTER_MAX_ATTEMPTS
+from src.dead_letter import (
+    due_dead_letters,
+    is_failed_summary,
+    load_dead_letters,
+    retry_delay,
+    save_dead_letters,
+    update_dead_letters
+)
+from src.storage import MemoryStorage
+
+NOW = datetime(2024, 1, 1, 7, 0)
+
+
+def _article(article_id):
+    return {"id": article_id, "title": f"記事{article_id}", "link": f"https://example.com/{article_id}"}
+
+
+def test_retry_delay_doubles_per_attempt():
+    base = timedelta(minutes=DEAD_LETTER_BACKOFF_MINUTES)
+    assert [retry_delay(n) for n in (1, 2, 3)] == [base, base * 2, base * 4]
+
+
+def test_is_failed_summary():
+    assert is_failed_summary({"summary": "要約エラー: timeout"})
+    assert is_failed_summary({"summary": "記事処理エラー: 404"})
+    assert not is_failed_summary({"summary": "普通の要約"})
+    assert not is_failed_summary({"summary": None})
+
+
+def test_failures_back_off_and_become_due():
+    changes, dropped = update_dead_letters({}, [(_article("a"), "要約エラー: x")], set(), now=NOW)
+    entry = changes["a"]
+
+    assert not dropped
+    assert entry["attempts"] == 1
+    assert datetime.fromisoformat(entry["next_retry_at"]) == NOW + retry_delay(1)
+    assert due_dead_letters(changes, now=NOW) == []
+    assert due_dead_letters(changes, now=NOW + retry_delay(1)) == [_article("a")]
+
+    later = NOW + retry_delay(1)
+    changes, _ = update_dead_letters(changes, [(_article("a"), "要約エラー: y")], set(), now=later)
+    assert changes["a"]["attempts"] == 2
+    assert changes["a"]["first_failed_at"] == NOW.isoformat()
+    assert datetime.fromisoformat(changes["a"]["next_retry_at"]) == later + retry_delay(2)
+
+
+def test_gives_up_after_max_attempts_and_clears_recovered():
+    dead_letters = {
+        "a": {"article": _article("a"), "attempts": DEAD_LETTER_MAX_ATTEMPTS - 1,
+              "first_failed_at": NOW.isoformat(), "next_retry_at": NOW.isoformat()},
+        "b": {"article": _article("b"), "attempts": 1,
+              "first_failed_at": NOW.isoformat(), "next_retry_at": NOW.isoformat()},
+    }
+
+    changes, dropped = update_dead_letters(
+        dead_letters, [(_article("a"), "要約エラー: x")], {"b"}, now=NOW)
+
+    assert changes == {"a": None, "b": None}
+    assert dropped == {"a"}
+
+
+def test_due_articles_are_ordered_by_first_failure():
+    dead_letters = {
+        "new": {"article": _article("new"), "first_failed_at": "2024-01-01T06:00:00",
+                "next_retry_at": "2024-01-01T06:30:00"},
+        "old": {"article": _article("old"), "first_failed_at": "2023-12-31T06:00:00",
+                "next_retry_at": "2024-01-01T06:30:00"},
+    }
+    assert [a["id"] for a in due_dead_letters(dead_letters, now=NOW)] == ["old", "new"]
+
+
+def test_save_applies_only_the_changes():
+    storage = MemoryStorage()
+    first, _ = update_dead_letters({}, [(_article("a"), "e")], set(), now=NOW)
+    second, _ = update_dead_letters({}, [(_article("b"), "e")], set(), now=NOW)
+    save_dead_letters(first, storage=storage)
+    save_dead_letters(second, storage=storage)
+    save_dead_letters({"a": None}, storage=storage)
+
+    assert set(load_dead_letters(storage=storage)) == {"b"}
@@ -0,0 +1,80 @@
+"""高速フィードパーサー（iterparse）のテスト"""
+from datetime import datetime, timezone
+
+import pytest
+
+from src.fast_feed_parser import (
+    UnsupportedFeedError,
+    iter_feed_entries,
+    parse_date_utc,
+    parse_feed_fast
+)
+
+RSS2 = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">
+<channel><title>テスト</title>
+<item><title>記事1</title><link>https://example.com/1</link><guid>g1</guid>
+<pubDate>Mon, 01 Jan 2024 09:00:00 +0900</pubDate><description>概要1</description>
+<content:encoded><![CDATA[<p>本文1</p>]]></content:encoded></item>
+<item><title>記事2</title><guid>g2</guid><pubDate>不正な日付</pubDate></item>
+</channel></rss>""".encode("utf-8")
+
+RDF = """<?xml version="1.0" encoding="UTF-8"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+  xmlns="http://purl.org/rss/1.0/" xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel rdf:about="https://example.com/"><title>テスト</title></channel>
+<item rdf:about="https://example.com/a"><title>はてな</title><link>https://example.com/a</link>
+<description>説明</description><dc:date>2024-01-01T09:00:00+09:00</dc:date></item>
+</rdf:RDF>""".encode("utf-8")
+
+ATOM = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>t</title>
+<entry><id>tag:1</id><title type="xhtml"><div xmlns="http://www.w3.org/1999/xhtml">A <b>b</b></div></title>
+<link rel="enclosure" href="https://example.com/a.mp3"/>
+<link rel="alternate" href="https://example.com/a"/>
+<updated>2024-01-01T00:00:00Z</updated><summary>s</summary></entry>
+</feed>"""
+
+
+def test_parses_rss2_items():
+    entries = parse_feed_fast(RSS2)
+
+    assert [e["id"] for e in entries] == ["https://example.com/1", "g2"]
+    first = entries[0]
+    assert first["title"] == "記事1"
+    assert first["summary"] == "概要1"
+    assert first["content"] == "<p>本文1</p>"
+    assert first["published_dt"] == datetime(2024, 1, 1, 0, 0, tzinfo=timezone.utc)
+    assert entries[1]["published_dt"] is None
+
+
+def test_parses_rdf_items_with_dc_date():
+    (entry,) = parse_feed_fast(RDF)
+
+    assert entry["id"] == "https://example.com/a"
+    assert entry["title"] == "はてな"
+    assert entry["published_dt"] == datetime(2024, 1, 1, 0, 0, tzinfo=timezone.utc)
+
+
+def test_parses_atom_entries_preferring_alternate_link():
+    (entry,) = parse_feed_fast(ATOM)
+
+    assert entry["link"] == "https://example.com/a"
+    assert entry["title"] == "A b"
+    assert entry["published_dt"] == datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_stops_parsing_when_iteration_stops():
+    broken = RSS2.replace(b"</channel></rss>", b"<item><title>")
+    entries = iter_feed_entries(broken)
+    assert next(entries)["title"] == "記事1"
+
+
+def test_rejects_unknown_root_element():
+    with pytest.raises(UnsupportedFeedError):
+        parse_feed_fast(b"<html><body/></html>")
+
+
+def test_parse_date_utc_assumes_utc_without_timezone():
+    assert parse_date_utc("2024-01-01T09:00:00") == datetime(2024, 1, 1, 9, tzinfo=timezone.utc)
+    assert parse_date_utc("") is None
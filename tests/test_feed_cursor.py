@@ -0,0 +1,68 @@
+"""フィードごとのカーソル（ハイウォーターマーク）のテスト"""
+from datetime import datetime, timezone
+
+from src.feed_cursor import (
+    advance_feed_cursors,
+    has_passed_cursor,
+    load_feed_cursors,
+    merge_feed_cursors,
+    oldest_cursor,
+    save_feed_cursors
+)
+from src.storage import MemoryStorage
+
+
+def _cursor(published, article_id="x"):
+    return {"published": published, "id": article_id}
+
+
+def test_has_passed_cursor_by_id_or_date():
+    cursor = _cursor("2024-01-01T00:00:00+00:00", "last")
+
+    assert has_passed_cursor("last", None, cursor)
+    assert has_passed_cursor("older", datetime(2023, 12, 31, tzinfo=timezone.utc), cursor)
+    assert not has_passed_cursor("newer", datetime(2024, 1, 2, tzinfo=timezone.utc), cursor)
+    assert not has_passed_cursor("newer", None, cursor)
+    assert not has_passed_cursor("any", datetime(2000, 1, 1, tzinfo=timezone.utc), None)
+
+
+def test_advance_only_moves_forward():
+    cursors = {"feed": _cursor("2024-01-02T00:00:00+00:00", "b")}
+    consumed = [
+        {"source_id": "feed", "id": "a", "published": "2024-01-01T00:00:00+00:00"},
+        {"source_id": "feed", "id": "c", "published": "2024-01-03T00:00:00+00:00"},
+        {"source_id": "other", "id": "d", "published": None},
+    ]
+
+    updated = advance_feed_cursors(cursors, consumed)
+
+    assert updated == {"feed": _cursor("2024-01-03T00:00:00+00:00", "c")}
+    assert cursors["feed"]["id"] == "b"
+
+
+def test_merge_takes_the_newer_cursor_per_feed():
+    base = {"a": _cursor("2024-01-02T00:00:00+00:00"), "b": _cursor("2024-01-01T00:00:00+00:00")}
+    other = {"a": _cursor("2024-01-01T00:00:00+00:00"), "b": _cursor("2024-01-03T00:00:00+00:00"),
+             "c": _cursor("2024-01-01T00:00:00+00:00")}
+
+    merged = merge_feed_cursors(base, other)
+
+    assert merged["a"] == base["a"]
+    assert merged["b"] == other["b"]
+    assert merged["c"] == other["c"]
+
+
+def test_oldest_cursor_is_none_when_any_program_has_no_cursor():
+    old = _cursor("2024-01-01T00:00:00+00:00")
+    new = _cursor("2024-01-02T00:00:00+00:00")
+
+    assert oldest_cursor([new, old]) is old
+    assert oldest_cursor([new, None]) is None
+
+
+def test_save_does_not_move_a_stored_cursor_backwards():
+    storage = MemoryStorage()
+    save_feed_cursors({"feed": _cursor("2024-01-02T00:00:00+00:00", "new")}, storage=storage)
+    save_feed_cursors({"feed": _cursor("2024-01-01T00:00:00+00:00", "old")}, storage=storage)
+
+    assert load_feed_cursors(storage=storage)["feed"]["id"] == "new"
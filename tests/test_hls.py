@@ -0,0 +1,87 @@
+"""HLS出力（パックドオーディオのセグメントとプレイリスト）のテスト"""
+import struct
+
+import pytest
+
+from src.hls import (
+    CACHE_CONTROL_SEGMENT,
+    PLAYLIST_CONTENT_TYPE,
+    build_playlist,
+    delete_hls,
+    segment_mp3,
+    timestamp_tag,
+    write_hls
+)
+from src.storage import MemoryStorage
+from src.utils.audio_format import skip_id3v2
+
+from tests.conftest import MP3_FRAME_LENGTH, MP3_FRAME_SECONDS
+
+TIMESTAMP_OWNER = b"com.apple.streaming.transportStreamTimestamp\x00"
+
+
+def _pts(tag):
+    """timestamp_tag() のPRIVフレームから33bitのPTSを取り出す"""
+    assert tag[:5] == b"ID3\x04\x00"
+    frame = tag[10:]
+    assert frame[:4] == b"PRIV"
+    payload = frame[10:]
+    assert payload.startswith(TIMESTAMP_OWNER)
+    (pts,) = struct.unpack(">Q", payload[len(TIMESTAMP_OWNER):])
+    return pts
+
+
+def test_timestamp_tag_uses_90khz_clock():
+    tag = timestamp_tag(6.0)
+    assert skip_id3v2(tag) == len(tag)
+    assert _pts(tag) == 540000
+    assert _pts(timestamp_tag(0)) == 0
+
+
+def test_timestamp_tag_wraps_at_33_bits():
+    wrap_seconds = (1 << 33) / 90000
+    assert _pts(timestamp_tag(wrap_seconds + 1)) == 90000
+
+
+def test_segment_mp3_splits_on_frame_boundaries(make_mp3):
+    audio = make_mp3(500)  # 約13.1秒
+
+    segments = segment_mp3(audio, target_duration=6)
+
+    assert b"".join(segment for segment, _, _ in segments) == audio
+    assert all(len(segment) % MP3_FRAME_LENGTH == 0 for segment, _, _ in segments)
+    assert [len(segment) // MP3_FRAME_LENGTH for segment, _, _ in segments] == [229, 229, 42]
+    starts = [start for _, start, _ in segments]
+    assert starts[1] == pytest.approx(229 * MP3_FRAME_SECONDS)
+    assert sum(duration for _, _, duration in segments) == pytest.approx(500 * MP3_FRAME_SECONDS)
+
+
+def test_build_playlist_rounds_target_duration_up():
+    playlist = build_playlist(["segment_00000.mp3", "segment_00001.mp3"], [5.98, 1.2])
+
+    assert "#EXT-X-TARGETDURATION:6" in playlist
+    assert "#EXTINF:5.980,\nsegment_00000.mp3" in playlist
+    assert playlist.endswith("#EXT-X-ENDLIST\n")
+
+
+def test_write_hls_prefixes_segments_with_timestamps_and_delete_removes_them(make_mp3):
+    storage = MemoryStorage()
+    audio = make_mp3(500)
+
+    hls = write_hls(audio, "audio/2024-01-01.mp3", target_duration=6, storage=storage)
+
+    assert hls["segment_count"] == 3
+    playlist_key = hls["url"]
+    assert playlist_key.startswith("audio/2024-01-01/")
+    assert storage.objects[playlist_key]["content_type"] == PLAYLIST_CONTENT_TYPE
+    hls_dir = playlist_key.rsplit("/", 1)[0]
+    second = storage.objects[f"{hls_dir}/segment_00001.mp3"]
+    assert second["cache_control"] == CACHE_CONTROL_SEGMENT
+    assert _pts(second["data"][:skip_id3v2(second["data"])]) == round(229 * MP3_FRAME_SECONDS * 90000)
+
+    delete_hls(hls, storage=storage)
+    assert storage.objects == {}
+
+
+def test_write_hls_skips_data_without_frames():
+    assert write_hls(b"not mp3", "audio/x.mp3", storage=MemoryStorage()) is None
@@ -0,0 +1,62 @@
+"""SimHashによる近似重複記事の検出のテスト"""
+from src.utils.near_duplicate import (
+    collapse_near_duplicates,
+    compute_simhash,
+    hamming_distance,
+    normalize_text
+)
+
+SUMMARY = "米半導体大手NVIDIAの時価総額が初めて4兆ドルを超えた。AI向け半導体の需要が追い風となった。"
+
+
+def _article(article_id, title, summary=SUMMARY, source_id=None):
+    return {"id": article_id, "title": title, "summary": summary, "source_id": source_id}
+
+
+def test_normalize_text_strips_tags_symbols_and_width():
+    assert normalize_text("<p>ＮＶＩＤＩＡ、 AI！</p>") == "nvidiaai"
+
+
+def test_simhash_is_stable_and_close_for_similar_text():
+    text = normalize_text(SUMMARY)
+    assert compute_simhash(text) == compute_simhash(text)
+    near = compute_simhash(normalize_text(SUMMARY + "。"))
+    far = compute_simhash(normalize_text("Googleは開発者向けイベントで新しいAIモデルを発表した"))
+    assert hamming_distance(compute_simhash(text), near) <= 3
+    assert hamming_distance(compute_simhash(text), far) > 3
+
+
+def test_collapses_duplicates_across_feeds_keeping_priority():
+    articles = [
+        _article("a", "NVIDIA時価総額、4兆ドル突破 - 日本経済新聞", source_id="nikkei"),
+        _article("b", "NVIDIA時価総額、4兆ドル突破", source_id="itmedia"),
+        _article("c", "Google、新たなAI技術を発表", "Googleは新しいAIモデルを発表した。",
+                 source_id="itmedia"),
+    ]
+    priority = {"itmedia": 0, "nikkei": 1}
+
+    kept, duplicates = collapse_near_duplicates(
+        articles, priority_key=lambda a: priority[a["source_id"]])
+
+    assert [a["id"] for a in kept] == ["b", "c"]
+    assert [(d["id"], k["id"]) for d, k in duplicates] == [("a", "b")]
+
+
+def test_keeps_same_title_from_the_same_feed():
+    articles = [
+        _article("a", "週刊セキュリティニュース", "第1回", source_id="feed"),
+        _article("b", "週刊セキュリティニュース", "第2回", source_id="feed"),
+        _article("c", "週刊セキュリティニュース", "第2回", source_id="other"),
+    ]
+
+    kept, duplicates = collapse_near_duplicates(articles)
+
+    assert [a["id"] for a in kept] == ["a", "b"]
+    assert duplicates[0][0]["id"] == "c"
+
+
+def test_max_distance_is_capped_below_band_count():
+    articles = [_article("a", "記事A", "あいうえおかきくけこ"),
+                _article("b", "記事B", "さしすせそたちつてと")]
+    kept, _ = collapse_near_duplicates(articles, max_distance=64)
+    assert len(kept) == 2
@@ -0,0 +1,162 @@
+"""条件付き書き込み（ETag）と状態ファイルの同時更新のテスト"""
+import threading
+
+import pytest
+
+from src.episode_store import (
+    data_key,
+    load_processed_ids,
+    save_processed_ids,
+    update_episodes_list
+)
+from src.storage import (
+    DIGEST_METADATA_KEY,
+    LocalStorage,
+    MemoryStorage,
+    PreconditionFailedError,
+    content_digest
+)
+
+
+@pytest.fixture(params=["memory", "local"])
+def storage(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStorage()
+    return LocalStorage(str(tmp_path))
+
+
+def _episode(episode_id):
+    return {
+        "episode_id": episode_id,
+        "title": f"ニュース {episode_id}",
+        "created_at": f"{episode_id}T07:00:00",
+        "audio_url": f"audio/{episode_id}.mp3",
+        "articles": [{"id": episode_id}]
+    }
+
+
+def _race(workers):
+    """全スレッドを同時に開始し、例外があれば送出する"""
+    barrier = threading.Barrier(len(workers))
+    errors = []
+
+    def _run(worker):
+        barrier.wait()
+        try:
+            worker()
+        except Exception as e:  # pragma: no cover - 失敗時の報告用
+            errors.append(e)
+
+    threads = [threading.Thread(target=_run, args=(w,)) for w in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+def test_put_if_match_rejects_stale_etag(storage):
+    assert storage.put_if_match("state.json", b"1", None) is not None
+    _, etag = storage.get_with_etag("state.json")
+    storage.put("state.json", b"2")
+
+    with pytest.raises(PreconditionFailedError):
+        storage.put_if_match("state.json", b"3", etag)
+    with pytest.raises(PreconditionFailedError):
+        storage.put_if_match("state.json", b"3", None)
+    assert storage.get("state.json") == b"2"
+
+
+def test_update_json_merges_and_retries_after_conflict(storage):
+    storage.put_json("state.json", [1])
+    calls = []
+
+    def _add(current):
+        calls.append(list(current))
+        if len(calls) == 1:
+            # 読み込みと書き込みの間に他の実行が書き込む
+            storage.put_json("state.json", current + [2])
+        return current + [3]
+
+    assert storage.update_json("state.json", _add) == [1, 2, 3]
+    assert calls == [[1], [1, 2]]
+    assert storage.get_json("state.json") == [1, 2, 3]
+
+
+def test_update_json_gives_up_after_max_retries(storage):
+    storage.put_json("state.json", 0)
+
+    def _always_conflict(current):
+        storage.put_json("state.json", storage.get_json("state.json") + 1)
+        return -1
+
+    with pytest.raises(PreconditionFailedError):
+        storage.update_json("state.json", _always_conflict, max_retries=1)
+
+
+def test_concurrent_update_json_loses_no_updates(storage):
+    def _worker(n):
+        def _run():
+            for i in range(10):
+                storage.update_json("counter.json", lambda c, v=f"{n}-{i}": (c or []) + [v])
+        return _run
+
+    _race([_worker(0), _worker(1)])
+    assert sorted(storage.get_json("counter.json")) == sorted(
+        f"{n}-{i}" for n in range(2) for i in range(10))
+
+
+def test_racing_save_processed_ids_keeps_both_sets(storage):
+    first = {f"a{i}" for i in range(20)}
+    second = {f"b{i}" for i in range(20)}
+
+    def _save(ids):
+        return lambda: [save_processed_ids({i}, storage=storage) for i in sorted(ids)]
+
+    _race([_save(first), _save(second)])
+    assert load_processed_ids(storage=storage) == first | second
+
+
+def test_racing_update_episodes_list_keeps_every_episode(storage):
+    days = [f"2024-01-{d:02d}" for d in range(1, 21)]
+
+    def _update(ids):
+        return lambda: [update_episodes_list(_episode(i), storage=storage) for i in ids]
+
+    _race([_update(days[0::2]), _update(days[1::2])])
+    episodes_list = storage.get_json(data_key("episodes_list.json"))
+    assert [e["episode_id"] for e in episodes_list] == sorted(days, reverse=True)
+
+
+def test_put_if_match_keeps_object_options():
+    storage = MemoryStorage()
+    storage.put_if_match("a.json", b"{}", None, content_type="application/json",
+                         cache_control="no-cache", metadata={DIGEST_METADATA_KEY: "x"})
+    entry = storage.objects["a.json"]
+    assert entry["content_type"] == "application/json"
+    assert entry["cache_control"] == "no-cache"
+    assert entry["metadata"] == {DIGEST_METADATA_KEY: "x"}
+
+
+def test_local_put_if_match_and_copy_pass_options_to_put(tmp_path):
+    puts = []
+
+    class RecordingStorage(LocalStorage):
+        def put(self, key, data, **options):
+            puts.append((key, options))
+            super().put(key, data, **options)
+
+    storage = RecordingStorage(str(tmp_path))
+    storage.put_if_match("a.json", b"{}", None, content_type="application/json",
+                         cache_control="no-cache", content_encoding="gzip",
+                         metadata={DIGEST_METADATA_KEY: content_digest(b"{}")})
+    storage.copy("a.json", "b.json")
+
+    assert puts[0] == ("a.json", {
+        "content_type": "application/json",
+        "cache_control": "no-cache",
+        "content_encoding": "gzip",
+        "metadata": {DIGEST_METADATA_KEY: content_digest(b"{}")}
+    })
+    assert puts[1][1]["metadata"] == {DIGEST_METADATA_KEY: content_digest(b"{}")}
+    assert storage.stored_digest("b.json") == content_digest(b"{}")
@@ -0,0 +1,108 @@
+"""WriteBatch（書き込みのまとめと並列フラッシュ）のテスト"""
+import threading
+
+from src.storage import DIGEST_METADATA_KEY, MemoryStorage, content_digest
+
+
+def test_batch_reads_its_own_pending_writes():
+    storage = MemoryStorage()
+    storage.put("a.json", b"old")
+    batch = storage.batch()
+
+    batch.put("a.json", b"new")
+    batch.put_json("b.json", {"x": 1})
+
+    assert batch.get("a.json") == b"new"
+    assert batch.get_json("b.json") == {"x": 1}
+    assert storage.get("a.json") == b"old"
+    assert storage.get("b.json") is None
+
+
+def test_flush_writes_last_put_per_key_and_clears_batch():
+    storage = MemoryStorage()
+    batch = storage.batch()
+    batch.put("a", b"1", content_type="text/plain")
+    batch.put("a", b"2", content_type="text/plain")
+
+    result = batch.flush()
+
+    assert result == {"puts": 1, "skipped": [], "copies": 0, "deletes": 0}
+    assert storage.get("a") == b"2"
+    assert batch.flush() == {"puts": 0, "skipped": [], "copies": 0, "deletes": 0}
+
+
+def test_put_if_changed_is_compared_at_flush_and_reported_as_skipped():
+    storage = MemoryStorage()
+    storage.put_if_changed("same", b"data")
+    storage.put_if_changed("changed", b"old")
+    batch = storage.batch()
+
+    assert batch.put_if_changed("same", b"data") is True
+    assert batch.put_if_changed("changed", b"new") is True
+    # 溜めた書き込みと同じ内容は溜め直さない
+    assert batch.put_if_changed("changed", b"new") is False
+
+    result = batch.flush()
+
+    assert result["skipped"] == ["same"]
+    assert result["puts"] == 1
+    assert storage.get("changed") == b"new"
+    assert storage.objects["changed"]["metadata"] == {DIGEST_METADATA_KEY: content_digest(b"new")}
+
+
+def test_copies_run_after_puts_and_deletes_run_last():
+    storage = MemoryStorage()
+    storage.put("old", b"x")
+    batch = storage.batch()
+    batch.put("src", b"audio")
+    batch.copy("src", "dest")
+    batch.delete("old")
+
+    assert batch.get("old") is None
+    assert batch.stored_digest("old") is None
+
+    result = batch.flush()
+
+    assert result == {"puts": 1, "skipped": [], "copies": 1, "deletes": 1}
+    assert storage.get("dest") == b"audio"
+    assert storage.get("old") is None
+
+
+def test_put_after_delete_keeps_the_object():
+    storage = MemoryStorage()
+    storage.put("a", b"1")
+    batch = storage.batch()
+    batch.delete("a")
+    batch.put("a", b"2")
+
+    assert batch.flush()["deletes"] == 0
+    assert storage.get("a") == b"2"
+
+
+def test_conditional_update_writes_pending_put_first():
+    storage = MemoryStorage()
+    batch = storage.batch()
+    batch.put_json("state.json", [1])
+
+    batch.update_json("state.json", lambda current: current + [2])
+
+    assert storage.get_json("state.json") == [1, 2]
+    assert batch.flush()["puts"] == 0
+
+
+def test_flush_writes_in_parallel():
+    # 2件の書き込みが同時に実行されなければ Barrier がタイムアウトする
+    barrier = threading.Barrier(2, timeout=5)
+
+    class WaitingStorage(MemoryStorage):
+        def put(self, key, data, **options):
+            barrier.wait()
+            super().put(key, data, **options)
+
+    storage = WaitingStorage()
+    batch = storage.batch()
+    batch.put("a", b"1")
+    batch.put("b", b"2")
+
+    assert batch.flush(max_workers=2)["puts"] == 2
+    assert storage.get("a") == b"1" and storage.get("b") == b"2"